@@ -0,0 +1,246 @@
+/* Automatically generated by meta-parse.py */
+
+// Copyright (c) 2016 Massachusetts Institute of Technology
+
+// Permission is hereby granted, free of charge, to any person
+// obtaining a copy of this software and associated documentation
+// files (the "Software"), to deal in the Software without
+// restriction, including without limitation the rights to use, copy,
+// modify, merge, publish, distribute, sublicense, and/or sell copies
+// of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+
+// The above copyright notice and this permission notice shall be
+// included in all copies or substantial portions of the Software.
+
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+// MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+// BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+// ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+// CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+#ifndef OPCODES_HPP
+#define OPCODES_HPP
+
+#include <stddef.h>
+#include <stdint.h>
+#include <stdio.h>
+
+namespace opcodes {
+
+constexpr int64_t sign_extend(uint64_t value, int width) {
+    return (int64_t) (value ^ (UINT64_C(1) << (width - 1))) - (int64_t) (UINT64_C(1) << (width - 1));
+}
+
+enum Operand : uint8_t {
+    OPERAND_NONE,
+    OPERAND_RD,
+    OPERAND_IMM20,
+    OPERAND_OIMM20,
+    OPERAND_JIMM20,
+    OPERAND_RS1,
+    OPERAND_OIMM12,
+    OPERAND_RS2,
+    OPERAND_SBIMM12,
+    OPERAND_IMM12,
+    OPERAND_SIMM12,
+    OPERAND_SHAMT5,
+    OPERAND_CSR12,
+    OPERAND_ZIMM
+};
+
+enum OperandKind : uint8_t { KIND_XREG, KIND_FREG, KIND_XREG_C, KIND_FREG_C, KIND_SIMM, KIND_UIMM };
+
+struct OperandInfo {
+    const char *name;
+    OperandKind kind;
+};
+
+constexpr OperandInfo operand_info[] = {
+    {"none", KIND_UIMM},
+    {"rd", KIND_XREG},
+    {"imm20", KIND_SIMM},
+    {"oimm20", KIND_SIMM},
+    {"jimm20", KIND_SIMM},
+    {"rs1", KIND_XREG},
+    {"oimm12", KIND_SIMM},
+    {"rs2", KIND_XREG},
+    {"sbimm12", KIND_SIMM},
+    {"imm12", KIND_SIMM},
+    {"simm12", KIND_SIMM},
+    {"shamt5", KIND_UIMM},
+    {"csr12", KIND_UIMM},
+    {"zimm", KIND_UIMM}
+};
+
+constexpr int64_t extract_rd(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 7) & 0x1f)); }
+constexpr int64_t extract_imm20(uint32_t inst) { return sign_extend(((uint64_t) ((inst >> 12) & 0xfffff) << 12), 32); }
+constexpr int64_t extract_oimm20(uint32_t inst) { return sign_extend(((uint64_t) ((inst >> 12) & 0xfffff) << 12), 32); }
+constexpr int64_t extract_jimm20(uint32_t inst) { return sign_extend(((uint64_t) ((inst >> 21) & 0x3ff) << 1) | ((uint64_t) ((inst >> 20) & 0x1) << 11) | ((uint64_t) ((inst >> 12) & 0xff) << 12) | ((uint64_t) ((inst >> 31) & 0x1) << 20), 21); }
+constexpr int64_t extract_rs1(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 15) & 0x1f)); }
+constexpr int64_t extract_oimm12(uint32_t inst) { return sign_extend((uint64_t) ((inst >> 20) & 0xfff), 12); }
+constexpr int64_t extract_rs2(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 20) & 0x1f)); }
+constexpr int64_t extract_sbimm12(uint32_t inst) { return sign_extend(((uint64_t) ((inst >> 8) & 0xf) << 1) | ((uint64_t) ((inst >> 25) & 0x3f) << 5) | ((uint64_t) ((inst >> 7) & 0x1) << 11) | ((uint64_t) ((inst >> 31) & 0x1) << 12), 13); }
+constexpr int64_t extract_imm12(uint32_t inst) { return sign_extend((uint64_t) ((inst >> 20) & 0xfff), 12); }
+constexpr int64_t extract_simm12(uint32_t inst) { return sign_extend((uint64_t) ((inst >> 7) & 0x1f) | ((uint64_t) ((inst >> 25) & 0x7f) << 5), 12); }
+constexpr int64_t extract_shamt5(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 20) & 0x1f)); }
+constexpr int64_t extract_csr12(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 20) & 0xfff)); }
+constexpr int64_t extract_zimm(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 15) & 0x1f)); }
+
+inline int64_t operand_value(Operand operand, uint32_t inst) {
+    switch (operand) {
+        case OPERAND_RD: return extract_rd(inst);
+        case OPERAND_IMM20: return extract_imm20(inst);
+        case OPERAND_OIMM20: return extract_oimm20(inst);
+        case OPERAND_JIMM20: return extract_jimm20(inst);
+        case OPERAND_RS1: return extract_rs1(inst);
+        case OPERAND_OIMM12: return extract_oimm12(inst);
+        case OPERAND_RS2: return extract_rs2(inst);
+        case OPERAND_SBIMM12: return extract_sbimm12(inst);
+        case OPERAND_IMM12: return extract_imm12(inst);
+        case OPERAND_SIMM12: return extract_simm12(inst);
+        case OPERAND_SHAMT5: return extract_shamt5(inst);
+        case OPERAND_CSR12: return extract_csr12(inst);
+        case OPERAND_ZIMM: return extract_zimm(inst);
+        default: return 0;
+    }
+}
+
+constexpr int max_operands = 3;
+
+struct InstEntry {
+    uint32_t match;
+    uint32_t mask;
+    const char *name;
+    Operand operands[max_operands];
+};
+
+// in decode priority order
+constexpr InstEntry inst_table[] = {
+    {0x00000037, 0x0000007f, "lui",           {OPERAND_RD, OPERAND_IMM20}},
+    {0x00000017, 0x0000007f, "auipc",         {OPERAND_RD, OPERAND_OIMM20}},
+    {0x0000006f, 0x0000007f, "jal",           {OPERAND_RD, OPERAND_JIMM20}},
+    {0x00000067, 0x0000707f, "jalr",          {OPERAND_RD, OPERAND_RS1, OPERAND_OIMM12}},
+    {0x00000063, 0x0000707f, "beq",           {OPERAND_RS1, OPERAND_RS2, OPERAND_SBIMM12}},
+    {0x00001063, 0x0000707f, "bne",           {OPERAND_RS1, OPERAND_RS2, OPERAND_SBIMM12}},
+    {0x00004063, 0x0000707f, "blt",           {OPERAND_RS1, OPERAND_RS2, OPERAND_SBIMM12}},
+    {0x00005063, 0x0000707f, "bge",           {OPERAND_RS1, OPERAND_RS2, OPERAND_SBIMM12}},
+    {0x00006063, 0x0000707f, "bltu",          {OPERAND_RS1, OPERAND_RS2, OPERAND_SBIMM12}},
+    {0x00007063, 0x0000707f, "bgeu",          {OPERAND_RS1, OPERAND_RS2, OPERAND_SBIMM12}},
+    {0x00000003, 0x0000707f, "lb",            {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00001003, 0x0000707f, "lh",            {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00002003, 0x0000707f, "lw",            {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00004003, 0x0000707f, "lbu",           {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00005003, 0x0000707f, "lhu",           {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00000023, 0x0000707f, "sb",            {OPERAND_RS1, OPERAND_RS2, OPERAND_SIMM12}},
+    {0x00001023, 0x0000707f, "sh",            {OPERAND_RS1, OPERAND_RS2, OPERAND_SIMM12}},
+    {0x00002023, 0x0000707f, "sw",            {OPERAND_RS1, OPERAND_RS2, OPERAND_SIMM12}},
+    {0x00000013, 0x0000707f, "addi",          {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00002013, 0x0000707f, "slti",          {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00003013, 0x0000707f, "sltiu",         {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00004013, 0x0000707f, "xori",          {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00006013, 0x0000707f, "ori",           {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00007013, 0x0000707f, "andi",          {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00000033, 0xfe00707f, "add",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x40000033, 0xfe00707f, "sub",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00001033, 0xfe00707f, "sll",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00002033, 0xfe00707f, "slt",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00003033, 0xfe00707f, "sltu",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00004033, 0xfe00707f, "xor",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00005033, 0xfe00707f, "srl",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x40005033, 0xfe00707f, "sra",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00006033, 0xfe00707f, "or",            {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00007033, 0xfe00707f, "and",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x0000000f, 0x0000707f, "fence",         {OPERAND_NONE}},
+    {0x0000100f, 0x0000707f, "fence.i",       {OPERAND_NONE}},
+    {0x00001013, 0xfe00707f, "slli",          {OPERAND_RD, OPERAND_RS1, OPERAND_SHAMT5}},
+    {0x00005013, 0xfe00707f, "srli",          {OPERAND_RD, OPERAND_RS1, OPERAND_SHAMT5}},
+    {0x40005013, 0xfe00707f, "srai",          {OPERAND_RD, OPERAND_RS1, OPERAND_SHAMT5}},
+    {0x00000073, 0xffffffff, "ecall",         {OPERAND_NONE}},
+    {0x00100073, 0xffffffff, "ebreak",        {OPERAND_NONE}},
+    {0x00001073, 0x0000707f, "csrrw",         {OPERAND_RD, OPERAND_RS1, OPERAND_CSR12}},
+    {0x00002073, 0x0000707f, "csrrs",         {OPERAND_RD, OPERAND_RS1, OPERAND_CSR12}},
+    {0x00003073, 0x0000707f, "csrrc",         {OPERAND_RD, OPERAND_RS1, OPERAND_CSR12}},
+    {0x00005073, 0x0000707f, "csrrwi",        {OPERAND_RD, OPERAND_ZIMM, OPERAND_CSR12}},
+    {0x00006073, 0x0000707f, "csrrsi",        {OPERAND_RD, OPERAND_ZIMM, OPERAND_CSR12}},
+    {0x00007073, 0x0000707f, "csrrci",        {OPERAND_RD, OPERAND_ZIMM, OPERAND_CSR12}}
+};
+
+constexpr int num_insts = 47;
+
+// the entries of inst_table that can match an instruction are
+// bucket_insts[bucket_start[inst & 0x7f]] up to bucket_insts[bucket_start[(inst & 0x7f) + 1]]
+constexpr uint16_t bucket_start[129] = {
+    0, 0, 0, 0, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5,
+    7, 7, 7, 7, 16, 16, 16, 16, 17, 17, 17, 17, 17, 17, 17, 17,
+    17, 17, 17, 17, 20, 20, 20, 20, 20, 20, 20, 20, 20, 20, 20, 20,
+    20, 20, 20, 20, 30, 30, 30, 30, 31, 31, 31, 31, 31, 31, 31, 31,
+    31, 31, 31, 31, 31, 31, 31, 31, 31, 31, 31, 31, 31, 31, 31, 31,
+    31, 31, 31, 31, 31, 31, 31, 31, 31, 31, 31, 31, 31, 31, 31, 31,
+    31, 31, 31, 31, 37, 37, 37, 37, 38, 38, 38, 38, 38, 38, 38, 38,
+    39, 39, 39, 39, 47, 47, 47, 47, 47, 47, 47, 47, 47, 47, 47, 47,
+    47
+};
+
+constexpr uint16_t bucket_insts[] = {
+    10, 11, 12, 13, 14, 34, 35, 18, 19, 20, 21, 22, 23, 36, 37, 38,
+    1, 15, 16, 17, 24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 0, 4,
+    5, 6, 7, 8, 9, 3, 2, 39, 40, 41, 42, 43, 44, 45, 46
+};
+
+constexpr const char *xpr_names[32] = {
+    "zero", "ra", "sp", "gp", "tp", "t0", "t1", "t2",
+    "s0", "s1", "a0", "a1", "a2", "a3", "a4", "a5",
+    "a6", "a7", "s2", "s3", "s4", "s5", "s6", "s7",
+    "s8", "s9", "s10", "s11", "t3", "t4", "t5", "t6"
+};
+
+constexpr const char *fpr_names[32] = {
+    "ft0", "ft1", "ft2", "ft3", "ft4", "ft5", "ft6", "ft7",
+    "fs0", "fs1", "fa0", "fa1", "fa2", "fa3", "fa4", "fa5",
+    "fa6", "fa7", "fs2", "fs3", "fs4", "fs5", "fs6", "fs7",
+    "fs8", "fs9", "fs10", "fs11", "ft8", "ft9", "ft10", "ft11"
+};
+
+// Returns the index of inst in inst_table, or -1 if it isn't recognized
+inline int decode(uint32_t inst) {
+    for (int i = bucket_start[inst & 0x7f]; i < bucket_start[(inst & 0x7f) + 1]; i++) {
+        const InstEntry &entry = inst_table[bucket_insts[i]];
+        if ((inst & entry.mask) == entry.match) {
+            return bucket_insts[i];
+        }
+    }
+    return -1;
+}
+
+// Writes the name and operands of inst, in riscv-meta order (e.g.
+// "sd sp, ra, 8"), to buf like snprintf, and returns the length it needed
+inline int format_inst(char *buf, size_t size, uint32_t inst) {
+    int index = decode(inst);
+    if (index < 0) {
+        return snprintf(buf, size, "unknown");
+    }
+    const InstEntry &entry = inst_table[index];
+    int length = snprintf(buf, size, "%s", entry.name);
+    for (int i = 0; i < max_operands && entry.operands[i] != OPERAND_NONE; i++) {
+        int64_t value = operand_value(entry.operands[i], inst);
+        size_t used = ((size_t) length < size) ? length : size;
+        const char *separator = (i == 0) ? " " : ", ";
+        switch (operand_info[entry.operands[i]].kind) {
+            case KIND_XREG: length += snprintf(buf + used, size - used, "%s%s", separator, xpr_names[value]); break;
+            case KIND_FREG: length += snprintf(buf + used, size - used, "%s%s", separator, fpr_names[value]); break;
+            case KIND_XREG_C: length += snprintf(buf + used, size - used, "%s%s", separator, xpr_names[value + 8]); break;
+            case KIND_FREG_C: length += snprintf(buf + used, size - used, "%s%s", separator, fpr_names[value + 8]); break;
+            case KIND_SIMM: length += snprintf(buf + used, size - used, "%s%lld", separator, (long long) value); break;
+            default: length += snprintf(buf + used, size - used, "%s0x%llx", separator, (unsigned long long) value); break;
+        }
+    }
+    return length;
+}
+
+} // namespace opcodes
+
+#endif
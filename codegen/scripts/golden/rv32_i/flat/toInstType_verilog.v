@@ -0,0 +1,114 @@
+/* Automatically generated by meta-parse.py */
+
+// Copyright (c) 2016 Massachusetts Institute of Technology
+
+// Permission is hereby granted, free of charge, to any person
+// obtaining a copy of this software and associated documentation
+// files (the "Software"), to deal in the Software without
+// restriction, including without limitation the rights to use, copy,
+// modify, merge, publish, distribute, sublicense, and/or sell copies
+// of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+
+// The above copyright notice and this permission notice shall be
+// included in all copies or substantial portions of the Software.
+
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+// MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+// BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+// ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+// CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+module toInstType_verilog (in, out);
+    input [31:0] in;
+    output [10:0] out;
+
+    wire [1:0] i;
+    wire [1:0] f;
+    wire [1:0] n;
+
+    wire [2:0] None;
+    wire [2:0] I;
+    wire [2:0] S;
+    wire [2:0] SB;
+    wire [2:0] U;
+    wire [2:0] UJ;
+    wire [2:0] Z;
+
+    reg [10:0] out_tmp;
+    reg [10:0] out;
+
+    // assign n = 2'b0x;
+    assign i = 2'b10;
+    assign f = 2'b11;
+
+    assign None = 3'b000;
+    assign I    = 3'b001;
+    assign S    = 3'b010;
+    assign SB   = 3'b011;
+    assign U    = 3'b100;
+    assign UJ   = 3'b101;
+    assign Z    = 3'b110;
+
+    always @ (in)
+        casez (in)
+            32'b?????????????????????????0110111: out_tmp = {2'b0x, 2'b0x, 2'b0x, i, U};
+            32'b?????????????????????????0010111: out_tmp = {2'b0x, 2'b0x, 2'b0x, i, U};
+            32'b?????????????????????????1101111: out_tmp = {2'b0x, 2'b0x, 2'b0x, i, UJ};
+            32'b?????????????????000?????1100111: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????000?????1100011: out_tmp = {i, i, 2'b0x, 2'b0x, SB};
+            32'b?????????????????001?????1100011: out_tmp = {i, i, 2'b0x, 2'b0x, SB};
+            32'b?????????????????100?????1100011: out_tmp = {i, i, 2'b0x, 2'b0x, SB};
+            32'b?????????????????101?????1100011: out_tmp = {i, i, 2'b0x, 2'b0x, SB};
+            32'b?????????????????110?????1100011: out_tmp = {i, i, 2'b0x, 2'b0x, SB};
+            32'b?????????????????111?????1100011: out_tmp = {i, i, 2'b0x, 2'b0x, SB};
+            32'b?????????????????000?????0000011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????001?????0000011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????010?????0000011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????100?????0000011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????101?????0000011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????000?????0100011: out_tmp = {i, i, 2'b0x, 2'b0x, S};
+            32'b?????????????????001?????0100011: out_tmp = {i, i, 2'b0x, 2'b0x, S};
+            32'b?????????????????010?????0100011: out_tmp = {i, i, 2'b0x, 2'b0x, S};
+            32'b?????????????????000?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????010?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????011?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????100?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????110?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????111?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b0000000??????????000?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0100000??????????000?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????001?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????010?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????011?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????100?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????101?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0100000??????????101?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????110?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????111?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b?????????????????000?????0001111: out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b?????????????????001?????0001111: out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b0000000??????????001?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b0000000??????????101?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b0100000??????????101?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b00000000000000000000000001110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b00000000000100000000000001110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b?????????????????001?????1110011: out_tmp = {i, 2'b0x, 2'b0x, i, None};
+            32'b?????????????????010?????1110011: out_tmp = {i, 2'b0x, 2'b0x, i, None};
+            32'b?????????????????011?????1110011: out_tmp = {i, 2'b0x, 2'b0x, i, None};
+            32'b?????????????????101?????1110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, i, Z};
+            32'b?????????????????110?????1110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, i, Z};
+            32'b?????????????????111?????1110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, i, Z};
+            default: out_tmp = 11'bxxxxxxxxxxx;
+        endcase
+
+    always @ (in or out_tmp)
+        if ((out_tmp[4:3] == 2'b10) && (in[11:7] == 5'b00000))
+            out = out_tmp & 11'b11111100111;
+        else
+            out = out_tmp;
+
+endmodule
@@ -0,0 +1,588 @@
+/* Automatically generated by meta-parse.py */
+
+// Copyright (c) 2016 Massachusetts Institute of Technology
+
+// Permission is hereby granted, free of charge, to any person
+// obtaining a copy of this software and associated documentation
+// files (the "Software"), to deal in the Software without
+// restriction, including without limitation the rights to use, copy,
+// modify, merge, publish, distribute, sublicense, and/or sell copies
+// of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+
+// The above copyright notice and this permission notice shall be
+// included in all copies or substantial portions of the Software.
+
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+// MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+// BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+// ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+// CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+#ifndef OPCODES_HPP
+#define OPCODES_HPP
+
+#include <stddef.h>
+#include <stdint.h>
+#include <stdio.h>
+
+namespace opcodes {
+
+constexpr int64_t sign_extend(uint64_t value, int width) {
+    return (int64_t) (value ^ (UINT64_C(1) << (width - 1))) - (int64_t) (UINT64_C(1) << (width - 1));
+}
+
+enum Operand : uint8_t {
+    OPERAND_NONE,
+    OPERAND_RD,
+    OPERAND_IMM20,
+    OPERAND_OIMM20,
+    OPERAND_JIMM20,
+    OPERAND_RS1,
+    OPERAND_OIMM12,
+    OPERAND_RS2,
+    OPERAND_SBIMM12,
+    OPERAND_IMM12,
+    OPERAND_SIMM12,
+    OPERAND_SHAMT6,
+    OPERAND_SHAMT5,
+    OPERAND_CSR12,
+    OPERAND_ZIMM,
+    OPERAND_FRD,
+    OPERAND_FRS2,
+    OPERAND_FRS1,
+    OPERAND_FRS3,
+    OPERAND_CRDQ,
+    OPERAND_CIMM4SPN,
+    OPERAND_CFRDQ,
+    OPERAND_CRS1Q,
+    OPERAND_CIMMD,
+    OPERAND_CIMMW,
+    OPERAND_CFRS2Q,
+    OPERAND_CRS2Q,
+    OPERAND_CRS1RD,
+    OPERAND_CNZIMMI,
+    OPERAND_CIMMI,
+    OPERAND_CRD,
+    OPERAND_CIMM16SP,
+    OPERAND_CIMMUI,
+    OPERAND_CRS1RDQ,
+    OPERAND_CIMMSH6,
+    OPERAND_CIMMJ,
+    OPERAND_CIMMB,
+    OPERAND_CFRD,
+    OPERAND_CIMMLDSP,
+    OPERAND_CIMMLWSP,
+    OPERAND_CRS1,
+    OPERAND_CRS2,
+    OPERAND_CFRS2,
+    OPERAND_CIMMSDSP,
+    OPERAND_CIMMSWSP
+};
+
+enum OperandKind : uint8_t { KIND_XREG, KIND_FREG, KIND_XREG_C, KIND_FREG_C, KIND_SIMM, KIND_UIMM };
+
+struct OperandInfo {
+    const char *name;
+    OperandKind kind;
+};
+
+constexpr OperandInfo operand_info[] = {
+    {"none", KIND_UIMM},
+    {"rd", KIND_XREG},
+    {"imm20", KIND_SIMM},
+    {"oimm20", KIND_SIMM},
+    {"jimm20", KIND_SIMM},
+    {"rs1", KIND_XREG},
+    {"oimm12", KIND_SIMM},
+    {"rs2", KIND_XREG},
+    {"sbimm12", KIND_SIMM},
+    {"imm12", KIND_SIMM},
+    {"simm12", KIND_SIMM},
+    {"shamt6", KIND_UIMM},
+    {"shamt5", KIND_UIMM},
+    {"csr12", KIND_UIMM},
+    {"zimm", KIND_UIMM},
+    {"frd", KIND_FREG},
+    {"frs2", KIND_FREG},
+    {"frs1", KIND_FREG},
+    {"frs3", KIND_FREG},
+    {"crdq", KIND_XREG_C},
+    {"cimm4spn", KIND_UIMM},
+    {"cfrdq", KIND_FREG_C},
+    {"crs1q", KIND_XREG_C},
+    {"cimmd", KIND_UIMM},
+    {"cimmw", KIND_UIMM},
+    {"cfrs2q", KIND_FREG_C},
+    {"crs2q", KIND_XREG_C},
+    {"crs1rd", KIND_XREG},
+    {"cnzimmi", KIND_SIMM},
+    {"cimmi", KIND_SIMM},
+    {"crd", KIND_XREG},
+    {"cimm16sp", KIND_SIMM},
+    {"cimmui", KIND_SIMM},
+    {"crs1rdq", KIND_XREG_C},
+    {"cimmsh6", KIND_UIMM},
+    {"cimmj", KIND_SIMM},
+    {"cimmb", KIND_SIMM},
+    {"cfrd", KIND_FREG},
+    {"cimmldsp", KIND_UIMM},
+    {"cimmlwsp", KIND_UIMM},
+    {"crs1", KIND_XREG},
+    {"crs2", KIND_XREG},
+    {"cfrs2", KIND_FREG},
+    {"cimmsdsp", KIND_UIMM},
+    {"cimmswsp", KIND_UIMM}
+};
+
+constexpr int64_t extract_rd(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 7) & 0x1f)); }
+constexpr int64_t extract_imm20(uint32_t inst) { return sign_extend(((uint64_t) ((inst >> 12) & 0xfffff) << 12), 32); }
+constexpr int64_t extract_oimm20(uint32_t inst) { return sign_extend(((uint64_t) ((inst >> 12) & 0xfffff) << 12), 32); }
+constexpr int64_t extract_jimm20(uint32_t inst) { return sign_extend(((uint64_t) ((inst >> 21) & 0x3ff) << 1) | ((uint64_t) ((inst >> 20) & 0x1) << 11) | ((uint64_t) ((inst >> 12) & 0xff) << 12) | ((uint64_t) ((inst >> 31) & 0x1) << 20), 21); }
+constexpr int64_t extract_rs1(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 15) & 0x1f)); }
+constexpr int64_t extract_oimm12(uint32_t inst) { return sign_extend((uint64_t) ((inst >> 20) & 0xfff), 12); }
+constexpr int64_t extract_rs2(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 20) & 0x1f)); }
+constexpr int64_t extract_sbimm12(uint32_t inst) { return sign_extend(((uint64_t) ((inst >> 8) & 0xf) << 1) | ((uint64_t) ((inst >> 25) & 0x3f) << 5) | ((uint64_t) ((inst >> 7) & 0x1) << 11) | ((uint64_t) ((inst >> 31) & 0x1) << 12), 13); }
+constexpr int64_t extract_imm12(uint32_t inst) { return sign_extend((uint64_t) ((inst >> 20) & 0xfff), 12); }
+constexpr int64_t extract_simm12(uint32_t inst) { return sign_extend((uint64_t) ((inst >> 7) & 0x1f) | ((uint64_t) ((inst >> 25) & 0x7f) << 5), 12); }
+constexpr int64_t extract_shamt6(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 20) & 0x3f)); }
+constexpr int64_t extract_shamt5(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 20) & 0x1f)); }
+constexpr int64_t extract_csr12(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 20) & 0xfff)); }
+constexpr int64_t extract_zimm(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 15) & 0x1f)); }
+constexpr int64_t extract_frd(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 7) & 0x1f)); }
+constexpr int64_t extract_frs2(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 20) & 0x1f)); }
+constexpr int64_t extract_frs1(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 15) & 0x1f)); }
+constexpr int64_t extract_frs3(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 27) & 0x1f)); }
+constexpr int64_t extract_crdq(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 2) & 0x7)); }
+constexpr int64_t extract_cimm4spn(uint32_t inst) { return (int64_t) (((uint64_t) ((inst >> 6) & 0x1) << 2) | ((uint64_t) ((inst >> 5) & 0x1) << 3) | ((uint64_t) ((inst >> 11) & 0x3) << 4) | ((uint64_t) ((inst >> 7) & 0xf) << 6)); }
+constexpr int64_t extract_cfrdq(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 2) & 0x7)); }
+constexpr int64_t extract_crs1q(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 7) & 0x7)); }
+constexpr int64_t extract_cimmd(uint32_t inst) { return (int64_t) (((uint64_t) ((inst >> 10) & 0x7) << 3) | ((uint64_t) ((inst >> 5) & 0x3) << 6)); }
+constexpr int64_t extract_cimmw(uint32_t inst) { return (int64_t) (((uint64_t) ((inst >> 6) & 0x1) << 2) | ((uint64_t) ((inst >> 10) & 0x7) << 3) | ((uint64_t) ((inst >> 5) & 0x1) << 6)); }
+constexpr int64_t extract_cfrs2q(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 2) & 0x7)); }
+constexpr int64_t extract_crs2q(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 2) & 0x7)); }
+constexpr int64_t extract_crs1rd(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 7) & 0x1f)); }
+constexpr int64_t extract_cnzimmi(uint32_t inst) { return sign_extend((uint64_t) ((inst >> 2) & 0x1f) | ((uint64_t) ((inst >> 12) & 0x1) << 5), 6); }
+constexpr int64_t extract_cimmi(uint32_t inst) { return sign_extend((uint64_t) ((inst >> 2) & 0x1f) | ((uint64_t) ((inst >> 12) & 0x1) << 5), 6); }
+constexpr int64_t extract_crd(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 7) & 0x1f)); }
+constexpr int64_t extract_cimm16sp(uint32_t inst) { return sign_extend(((uint64_t) ((inst >> 6) & 0x1) << 4) | ((uint64_t) ((inst >> 2) & 0x1) << 5) | ((uint64_t) ((inst >> 5) & 0x1) << 6) | ((uint64_t) ((inst >> 3) & 0x3) << 7) | ((uint64_t) ((inst >> 12) & 0x1) << 9), 10); }
+constexpr int64_t extract_cimmui(uint32_t inst) { return sign_extend(((uint64_t) ((inst >> 2) & 0x1f) << 12) | ((uint64_t) ((inst >> 12) & 0x1) << 17), 18); }
+constexpr int64_t extract_crs1rdq(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 7) & 0x7)); }
+constexpr int64_t extract_cimmsh6(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 2) & 0x1f) | ((uint64_t) ((inst >> 12) & 0x1) << 5)); }
+constexpr int64_t extract_cimmj(uint32_t inst) { return sign_extend(((uint64_t) ((inst >> 3) & 0x7) << 1) | ((uint64_t) ((inst >> 11) & 0x1) << 4) | ((uint64_t) ((inst >> 2) & 0x1) << 5) | ((uint64_t) ((inst >> 7) & 0x1) << 6) | ((uint64_t) ((inst >> 6) & 0x1) << 7) | ((uint64_t) ((inst >> 9) & 0x3) << 8) | ((uint64_t) ((inst >> 8) & 0x1) << 10) | ((uint64_t) ((inst >> 12) & 0x1) << 11), 12); }
+constexpr int64_t extract_cimmb(uint32_t inst) { return sign_extend(((uint64_t) ((inst >> 3) & 0x3) << 1) | ((uint64_t) ((inst >> 10) & 0x3) << 3) | ((uint64_t) ((inst >> 2) & 0x1) << 5) | ((uint64_t) ((inst >> 5) & 0x3) << 6) | ((uint64_t) ((inst >> 12) & 0x1) << 8), 9); }
+constexpr int64_t extract_cfrd(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 7) & 0x1f)); }
+constexpr int64_t extract_cimmldsp(uint32_t inst) { return (int64_t) (((uint64_t) ((inst >> 5) & 0x3) << 3) | ((uint64_t) ((inst >> 12) & 0x1) << 5) | ((uint64_t) ((inst >> 2) & 0x7) << 6)); }
+constexpr int64_t extract_cimmlwsp(uint32_t inst) { return (int64_t) (((uint64_t) ((inst >> 4) & 0x7) << 2) | ((uint64_t) ((inst >> 12) & 0x1) << 5) | ((uint64_t) ((inst >> 2) & 0x3) << 6)); }
+constexpr int64_t extract_crs1(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 7) & 0x1f)); }
+constexpr int64_t extract_crs2(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 2) & 0x1f)); }
+constexpr int64_t extract_cfrs2(uint32_t inst) { return (int64_t) ((uint64_t) ((inst >> 2) & 0x1f)); }
+constexpr int64_t extract_cimmsdsp(uint32_t inst) { return (int64_t) (((uint64_t) ((inst >> 10) & 0x7) << 3) | ((uint64_t) ((inst >> 7) & 0x7) << 6)); }
+constexpr int64_t extract_cimmswsp(uint32_t inst) { return (int64_t) (((uint64_t) ((inst >> 9) & 0xf) << 2) | ((uint64_t) ((inst >> 7) & 0x3) << 6)); }
+
+inline int64_t operand_value(Operand operand, uint32_t inst) {
+    switch (operand) {
+        case OPERAND_RD: return extract_rd(inst);
+        case OPERAND_IMM20: return extract_imm20(inst);
+        case OPERAND_OIMM20: return extract_oimm20(inst);
+        case OPERAND_JIMM20: return extract_jimm20(inst);
+        case OPERAND_RS1: return extract_rs1(inst);
+        case OPERAND_OIMM12: return extract_oimm12(inst);
+        case OPERAND_RS2: return extract_rs2(inst);
+        case OPERAND_SBIMM12: return extract_sbimm12(inst);
+        case OPERAND_IMM12: return extract_imm12(inst);
+        case OPERAND_SIMM12: return extract_simm12(inst);
+        case OPERAND_SHAMT6: return extract_shamt6(inst);
+        case OPERAND_SHAMT5: return extract_shamt5(inst);
+        case OPERAND_CSR12: return extract_csr12(inst);
+        case OPERAND_ZIMM: return extract_zimm(inst);
+        case OPERAND_FRD: return extract_frd(inst);
+        case OPERAND_FRS2: return extract_frs2(inst);
+        case OPERAND_FRS1: return extract_frs1(inst);
+        case OPERAND_FRS3: return extract_frs3(inst);
+        case OPERAND_CRDQ: return extract_crdq(inst);
+        case OPERAND_CIMM4SPN: return extract_cimm4spn(inst);
+        case OPERAND_CFRDQ: return extract_cfrdq(inst);
+        case OPERAND_CRS1Q: return extract_crs1q(inst);
+        case OPERAND_CIMMD: return extract_cimmd(inst);
+        case OPERAND_CIMMW: return extract_cimmw(inst);
+        case OPERAND_CFRS2Q: return extract_cfrs2q(inst);
+        case OPERAND_CRS2Q: return extract_crs2q(inst);
+        case OPERAND_CRS1RD: return extract_crs1rd(inst);
+        case OPERAND_CNZIMMI: return extract_cnzimmi(inst);
+        case OPERAND_CIMMI: return extract_cimmi(inst);
+        case OPERAND_CRD: return extract_crd(inst);
+        case OPERAND_CIMM16SP: return extract_cimm16sp(inst);
+        case OPERAND_CIMMUI: return extract_cimmui(inst);
+        case OPERAND_CRS1RDQ: return extract_crs1rdq(inst);
+        case OPERAND_CIMMSH6: return extract_cimmsh6(inst);
+        case OPERAND_CIMMJ: return extract_cimmj(inst);
+        case OPERAND_CIMMB: return extract_cimmb(inst);
+        case OPERAND_CFRD: return extract_cfrd(inst);
+        case OPERAND_CIMMLDSP: return extract_cimmldsp(inst);
+        case OPERAND_CIMMLWSP: return extract_cimmlwsp(inst);
+        case OPERAND_CRS1: return extract_crs1(inst);
+        case OPERAND_CRS2: return extract_crs2(inst);
+        case OPERAND_CFRS2: return extract_cfrs2(inst);
+        case OPERAND_CIMMSDSP: return extract_cimmsdsp(inst);
+        case OPERAND_CIMMSWSP: return extract_cimmswsp(inst);
+        default: return 0;
+    }
+}
+
+constexpr int max_operands = 4;
+
+struct InstEntry {
+    uint32_t match;
+    uint32_t mask;
+    const char *name;
+    Operand operands[max_operands];
+};
+
+// in decode priority order
+constexpr InstEntry inst_table[] = {
+    {0x00000037, 0x0000007f, "lui",           {OPERAND_RD, OPERAND_IMM20}},
+    {0x00000017, 0x0000007f, "auipc",         {OPERAND_RD, OPERAND_OIMM20}},
+    {0x0000006f, 0x0000007f, "jal",           {OPERAND_RD, OPERAND_JIMM20}},
+    {0x00000067, 0x0000707f, "jalr",          {OPERAND_RD, OPERAND_RS1, OPERAND_OIMM12}},
+    {0x00000063, 0x0000707f, "beq",           {OPERAND_RS1, OPERAND_RS2, OPERAND_SBIMM12}},
+    {0x00001063, 0x0000707f, "bne",           {OPERAND_RS1, OPERAND_RS2, OPERAND_SBIMM12}},
+    {0x00004063, 0x0000707f, "blt",           {OPERAND_RS1, OPERAND_RS2, OPERAND_SBIMM12}},
+    {0x00005063, 0x0000707f, "bge",           {OPERAND_RS1, OPERAND_RS2, OPERAND_SBIMM12}},
+    {0x00006063, 0x0000707f, "bltu",          {OPERAND_RS1, OPERAND_RS2, OPERAND_SBIMM12}},
+    {0x00007063, 0x0000707f, "bgeu",          {OPERAND_RS1, OPERAND_RS2, OPERAND_SBIMM12}},
+    {0x00000003, 0x0000707f, "lb",            {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00001003, 0x0000707f, "lh",            {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00002003, 0x0000707f, "lw",            {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00004003, 0x0000707f, "lbu",           {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00005003, 0x0000707f, "lhu",           {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00000023, 0x0000707f, "sb",            {OPERAND_RS1, OPERAND_RS2, OPERAND_SIMM12}},
+    {0x00001023, 0x0000707f, "sh",            {OPERAND_RS1, OPERAND_RS2, OPERAND_SIMM12}},
+    {0x00002023, 0x0000707f, "sw",            {OPERAND_RS1, OPERAND_RS2, OPERAND_SIMM12}},
+    {0x00000013, 0x0000707f, "addi",          {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00002013, 0x0000707f, "slti",          {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00003013, 0x0000707f, "sltiu",         {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00004013, 0x0000707f, "xori",          {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00006013, 0x0000707f, "ori",           {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00007013, 0x0000707f, "andi",          {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00000033, 0xfe00707f, "add",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x40000033, 0xfe00707f, "sub",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00001033, 0xfe00707f, "sll",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00002033, 0xfe00707f, "slt",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00003033, 0xfe00707f, "sltu",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00004033, 0xfe00707f, "xor",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00005033, 0xfe00707f, "srl",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x40005033, 0xfe00707f, "sra",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00006033, 0xfe00707f, "or",            {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00007033, 0xfe00707f, "and",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x0000000f, 0x0000707f, "fence",         {OPERAND_NONE}},
+    {0x0000100f, 0x0000707f, "fence.i",       {OPERAND_NONE}},
+    {0x00006003, 0x0000707f, "lwu",           {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00003003, 0x0000707f, "ld",            {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00003023, 0x0000707f, "sd",            {OPERAND_RS1, OPERAND_RS2, OPERAND_SIMM12}},
+    {0x00001013, 0xfc00707f, "slli",          {OPERAND_RD, OPERAND_RS1, OPERAND_SHAMT6}},
+    {0x00005013, 0xfc00707f, "srli",          {OPERAND_RD, OPERAND_RS1, OPERAND_SHAMT6}},
+    {0x40005013, 0xfc00707f, "srai",          {OPERAND_RD, OPERAND_RS1, OPERAND_SHAMT6}},
+    {0x0000001b, 0x0000707f, "addiw",         {OPERAND_RD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x0000101b, 0xfe00707f, "slliw",         {OPERAND_RD, OPERAND_RS1, OPERAND_SHAMT5}},
+    {0x0000501b, 0xfe00707f, "srliw",         {OPERAND_RD, OPERAND_RS1, OPERAND_SHAMT5}},
+    {0x4000501b, 0xfe00707f, "sraiw",         {OPERAND_RD, OPERAND_RS1, OPERAND_SHAMT5}},
+    {0x0000003b, 0xfe00707f, "addw",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x4000003b, 0xfe00707f, "subw",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x0000103b, 0xfe00707f, "sllw",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x0000503b, 0xfe00707f, "srlw",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x4000503b, 0xfe00707f, "sraw",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x02000033, 0xfe00707f, "mul",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x02001033, 0xfe00707f, "mulh",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x02002033, 0xfe00707f, "mulhsu",        {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x02003033, 0xfe00707f, "mulhu",         {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x02004033, 0xfe00707f, "div",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x02005033, 0xfe00707f, "divu",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x02006033, 0xfe00707f, "rem",           {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x02007033, 0xfe00707f, "remu",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x0200003b, 0xfe00707f, "mulw",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x0200403b, 0xfe00707f, "divw",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x0200503b, 0xfe00707f, "divuw",         {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x0200603b, 0xfe00707f, "remw",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x0200703b, 0xfe00707f, "remuw",         {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x1000202f, 0xf9f0707f, "lr.w",          {OPERAND_RD, OPERAND_RS1}},
+    {0x1800202f, 0xf800707f, "sc.w",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x0800202f, 0xf800707f, "amoswap.w",     {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x0000202f, 0xf800707f, "amoadd.w",      {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x2000202f, 0xf800707f, "amoxor.w",      {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x4000202f, 0xf800707f, "amoor.w",       {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x6000202f, 0xf800707f, "amoand.w",      {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x8000202f, 0xf800707f, "amomin.w",      {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0xa000202f, 0xf800707f, "amomax.w",      {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0xc000202f, 0xf800707f, "amominu.w",     {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0xe000202f, 0xf800707f, "amomaxu.w",     {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x1000302f, 0xf9f0707f, "lr.d",          {OPERAND_RD, OPERAND_RS1}},
+    {0x1800302f, 0xf800707f, "sc.d",          {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x0800302f, 0xf800707f, "amoswap.d",     {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x0000302f, 0xf800707f, "amoadd.d",      {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x2000302f, 0xf800707f, "amoxor.d",      {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x4000302f, 0xf800707f, "amoor.d",       {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x6000302f, 0xf800707f, "amoand.d",      {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x8000302f, 0xf800707f, "amomin.d",      {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0xa000302f, 0xf800707f, "amomax.d",      {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0xc000302f, 0xf800707f, "amominu.d",     {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0xe000302f, 0xf800707f, "amomaxu.d",     {OPERAND_RD, OPERAND_RS1, OPERAND_RS2}},
+    {0x00000073, 0xffffffff, "ecall",         {OPERAND_NONE}},
+    {0x00100073, 0xffffffff, "ebreak",        {OPERAND_NONE}},
+    {0x00200073, 0xffffffff, "uret",          {OPERAND_NONE}},
+    {0x10200073, 0xffffffff, "sret",          {OPERAND_NONE}},
+    {0x20200073, 0xffffffff, "hret",          {OPERAND_NONE}},
+    {0x30200073, 0xffffffff, "mret",          {OPERAND_NONE}},
+    {0x7b200073, 0xffffffff, "dret",          {OPERAND_NONE}},
+    {0x10400073, 0xfff07fff, "sfence.vm",     {OPERAND_RS1}},
+    {0x10500073, 0xffffffff, "wfi",           {OPERAND_NONE}},
+    {0x00001073, 0x0000707f, "csrrw",         {OPERAND_RD, OPERAND_RS1, OPERAND_CSR12}},
+    {0x00002073, 0x0000707f, "csrrs",         {OPERAND_RD, OPERAND_RS1, OPERAND_CSR12}},
+    {0x00003073, 0x0000707f, "csrrc",         {OPERAND_RD, OPERAND_RS1, OPERAND_CSR12}},
+    {0x00005073, 0x0000707f, "csrrwi",        {OPERAND_RD, OPERAND_ZIMM, OPERAND_CSR12}},
+    {0x00006073, 0x0000707f, "csrrsi",        {OPERAND_RD, OPERAND_ZIMM, OPERAND_CSR12}},
+    {0x00007073, 0x0000707f, "csrrci",        {OPERAND_RD, OPERAND_ZIMM, OPERAND_CSR12}},
+    {0x00002007, 0x0000707f, "flw",           {OPERAND_FRD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00002027, 0x0000707f, "fsw",           {OPERAND_RS1, OPERAND_FRS2, OPERAND_SIMM12}},
+    {0x00000043, 0x0600007f, "fmadd.s",       {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2, OPERAND_FRS3}},
+    {0x00000047, 0x0600007f, "fmsub.s",       {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2, OPERAND_FRS3}},
+    {0x0000004b, 0x0600007f, "fnmsub.s",      {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2, OPERAND_FRS3}},
+    {0x0000004f, 0x0600007f, "fnmadd.s",      {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2, OPERAND_FRS3}},
+    {0x00000053, 0xfe00007f, "fadd.s",        {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x08000053, 0xfe00007f, "fsub.s",        {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x10000053, 0xfe00007f, "fmul.s",        {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x18000053, 0xfe00007f, "fdiv.s",        {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x20000053, 0xfe00707f, "fsgnj.s",       {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x20001053, 0xfe00707f, "fsgnjn.s",      {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x20002053, 0xfe00707f, "fsgnjx.s",      {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x28000053, 0xfe00707f, "fmin.s",        {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x28001053, 0xfe00707f, "fmax.s",        {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x58000053, 0xfff0007f, "fsqrt.s",       {OPERAND_FRD, OPERAND_FRS1}},
+    {0xa0000053, 0xfe00707f, "fle.s",         {OPERAND_RD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0xa0001053, 0xfe00707f, "flt.s",         {OPERAND_RD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0xa0002053, 0xfe00707f, "feq.s",         {OPERAND_RD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0xc0000053, 0xfff0007f, "fcvt.w.s",      {OPERAND_RD, OPERAND_FRS1}},
+    {0xc0100053, 0xfff0007f, "fcvt.wu.s",     {OPERAND_RD, OPERAND_FRS1}},
+    {0xd0000053, 0xfff0007f, "fcvt.s.w",      {OPERAND_FRD, OPERAND_RS1}},
+    {0xd0100053, 0xfff0007f, "fcvt.s.wu",     {OPERAND_FRD, OPERAND_RS1}},
+    {0xe0000053, 0xfff0707f, "fmv.x.s",       {OPERAND_RD, OPERAND_FRS1}},
+    {0xe0001053, 0xfff0707f, "fclass.s",      {OPERAND_RD, OPERAND_FRS1}},
+    {0xf0000053, 0xfff0707f, "fmv.s.x",       {OPERAND_FRD, OPERAND_RS1}},
+    {0xc0200053, 0xfff0007f, "fcvt.l.s",      {OPERAND_RD, OPERAND_FRS1}},
+    {0xc0300053, 0xfff0007f, "fcvt.lu.s",     {OPERAND_RD, OPERAND_FRS1}},
+    {0xd0200053, 0xfff0007f, "fcvt.s.l",      {OPERAND_FRD, OPERAND_RS1}},
+    {0xd0300053, 0xfff0007f, "fcvt.s.lu",     {OPERAND_FRD, OPERAND_RS1}},
+    {0x00003007, 0x0000707f, "fld",           {OPERAND_FRD, OPERAND_RS1, OPERAND_IMM12}},
+    {0x00003027, 0x0000707f, "fsd",           {OPERAND_RS1, OPERAND_FRS2, OPERAND_SIMM12}},
+    {0x02000043, 0x0600007f, "fmadd.d",       {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2, OPERAND_FRS3}},
+    {0x02000047, 0x0600007f, "fmsub.d",       {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2, OPERAND_FRS3}},
+    {0x0200004b, 0x0600007f, "fnmsub.d",      {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2, OPERAND_FRS3}},
+    {0x0200004f, 0x0600007f, "fnmadd.d",      {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2, OPERAND_FRS3}},
+    {0x02000053, 0xfe00007f, "fadd.d",        {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x0a000053, 0xfe00007f, "fsub.d",        {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x12000053, 0xfe00007f, "fmul.d",        {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x1a000053, 0xfe00007f, "fdiv.d",        {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x22000053, 0xfe00707f, "fsgnj.d",       {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x22001053, 0xfe00707f, "fsgnjn.d",      {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x22002053, 0xfe00707f, "fsgnjx.d",      {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x2a000053, 0xfe00707f, "fmin.d",        {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x2a001053, 0xfe00707f, "fmax.d",        {OPERAND_FRD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0x40100053, 0xfff0007f, "fcvt.s.d",      {OPERAND_FRD, OPERAND_FRS1}},
+    {0x42000053, 0xfff0007f, "fcvt.d.s",      {OPERAND_FRD, OPERAND_FRS1}},
+    {0x5a000053, 0xfff0007f, "fsqrt.d",       {OPERAND_FRD, OPERAND_FRS1}},
+    {0xa2000053, 0xfe00707f, "fle.d",         {OPERAND_RD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0xa2001053, 0xfe00707f, "flt.d",         {OPERAND_RD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0xa2002053, 0xfe00707f, "feq.d",         {OPERAND_RD, OPERAND_FRS1, OPERAND_FRS2}},
+    {0xc2000053, 0xfff0007f, "fcvt.w.d",      {OPERAND_RD, OPERAND_FRS1}},
+    {0xc2100053, 0xfff0007f, "fcvt.wu.d",     {OPERAND_RD, OPERAND_FRS1}},
+    {0xd2000053, 0xfff0007f, "fcvt.d.w",      {OPERAND_FRD, OPERAND_RS1}},
+    {0xd2100053, 0xfff0007f, "fcvt.d.wu",     {OPERAND_FRD, OPERAND_RS1}},
+    {0xe2001053, 0xfff0707f, "fclass.d",      {OPERAND_RD, OPERAND_FRS1}},
+    {0xc2200053, 0xfff0007f, "fcvt.l.d",      {OPERAND_RD, OPERAND_FRS1}},
+    {0xc2300053, 0xfff0007f, "fcvt.lu.d",     {OPERAND_RD, OPERAND_FRS1}},
+    {0xe2000053, 0xfff0707f, "fmv.x.d",       {OPERAND_RD, OPERAND_FRS1}},
+    {0xd2200053, 0xfff0007f, "fcvt.d.l",      {OPERAND_FRD, OPERAND_RS1}},
+    {0xd2300053, 0xfff0007f, "fcvt.d.lu",     {OPERAND_FRD, OPERAND_RS1}},
+    {0xf2000053, 0xfff0707f, "fmv.d.x",       {OPERAND_FRD, OPERAND_RS1}},
+    {0x00000000, 0x0000e003, "c.addi4spn",    {OPERAND_CRDQ, OPERAND_CIMM4SPN}},
+    {0x00002000, 0x0000e003, "c.fld",         {OPERAND_CFRDQ, OPERAND_CRS1Q, OPERAND_CIMMD}},
+    {0x00004000, 0x0000e003, "c.lw",          {OPERAND_CRDQ, OPERAND_CRS1Q, OPERAND_CIMMW}},
+    {0x00006000, 0x0000e003, "c.ld",          {OPERAND_CRDQ, OPERAND_CRS1Q, OPERAND_CIMMD}},
+    {0x0000a000, 0x0000e003, "c.fsd",         {OPERAND_CFRS2Q, OPERAND_CRS1Q, OPERAND_CIMMD}},
+    {0x0000c000, 0x0000e003, "c.sw",          {OPERAND_CRS2Q, OPERAND_CRS1Q, OPERAND_CIMMW}},
+    {0x0000e000, 0x0000e003, "c.sd",          {OPERAND_CRS2Q, OPERAND_CRS1Q, OPERAND_CIMMD}},
+    {0x00000001, 0x0000ffff, "c.nop",         {OPERAND_NONE}},
+    {0x00000001, 0x0000e003, "c.addi",        {OPERAND_CRS1RD, OPERAND_CNZIMMI}},
+    {0x00002001, 0x0000e003, "c.addiw",       {OPERAND_CRS1RD, OPERAND_CIMMI}},
+    {0x00004001, 0x0000e003, "c.li",          {OPERAND_CRD, OPERAND_CIMMI}},
+    {0x00006101, 0x0000ef83, "c.addi16sp",    {OPERAND_CIMM16SP}},
+    {0x00006001, 0x0000e003, "c.lui",         {OPERAND_CRD, OPERAND_CIMMUI}},
+    {0x00008001, 0x0000ec03, "c.srli",        {OPERAND_CRS1RDQ, OPERAND_CIMMSH6}},
+    {0x00008401, 0x0000ec03, "c.srai",        {OPERAND_CRS1RDQ, OPERAND_CIMMSH6}},
+    {0x00008801, 0x0000ec03, "c.andi",        {OPERAND_CRS1RDQ, OPERAND_CIMMI}},
+    {0x00008c01, 0x0000fc63, "c.sub",         {OPERAND_CRS1RDQ, OPERAND_CRS2Q}},
+    {0x00008c21, 0x0000fc63, "c.xor",         {OPERAND_CRS1RDQ, OPERAND_CRS2Q}},
+    {0x00008c41, 0x0000fc63, "c.or",          {OPERAND_CRS1RDQ, OPERAND_CRS2Q}},
+    {0x00008c61, 0x0000fc63, "c.and",         {OPERAND_CRS1RDQ, OPERAND_CRS2Q}},
+    {0x00009c01, 0x0000fc63, "c.subw",        {OPERAND_CRS1RDQ, OPERAND_CRS2Q}},
+    {0x00009c21, 0x0000fc63, "c.addw",        {OPERAND_CRS1RDQ, OPERAND_CRS2Q}},
+    {0x0000a001, 0x0000e003, "c.j",           {OPERAND_CIMMJ}},
+    {0x0000c001, 0x0000e003, "c.beqz",        {OPERAND_CRS1Q, OPERAND_CIMMB}},
+    {0x0000e001, 0x0000e003, "c.bnez",        {OPERAND_CRS1Q, OPERAND_CIMMB}},
+    {0x00000002, 0x0000e003, "c.slli",        {OPERAND_CRS1RD, OPERAND_CIMMSH6}},
+    {0x00002002, 0x0000e003, "c.fldsp",       {OPERAND_CFRD, OPERAND_CIMMLDSP}},
+    {0x00004002, 0x0000e003, "c.lwsp",        {OPERAND_CRD, OPERAND_CIMMLWSP}},
+    {0x00006002, 0x0000e003, "c.ldsp",        {OPERAND_CRD, OPERAND_CIMMLDSP}},
+    {0x00008002, 0x0000f07f, "c.jr",          {OPERAND_CRS1}},
+    {0x00008002, 0x0000f003, "c.mv",          {OPERAND_CRD, OPERAND_CRS2}},
+    {0x00009002, 0x0000ffff, "c.ebreak",      {OPERAND_NONE}},
+    {0x00009002, 0x0000f07f, "c.jalr",        {OPERAND_CRS1}},
+    {0x00009002, 0x0000f003, "c.add",         {OPERAND_CRS1RD, OPERAND_CRS2}},
+    {0x0000a002, 0x0000e003, "c.fsdsp",       {OPERAND_CFRS2, OPERAND_CIMMSDSP}},
+    {0x0000c002, 0x0000e003, "c.swsp",        {OPERAND_CRS2, OPERAND_CIMMSWSP}},
+    {0x0000e002, 0x0000e003, "c.sdsp",        {OPERAND_CRS2, OPERAND_CIMMSDSP}}
+};
+
+constexpr int num_insts = 200;
+
+// the entries of inst_table that can match an instruction are
+// bucket_insts[bucket_start[inst & 0x7f]] up to bucket_insts[bucket_start[(inst & 0x7f) + 1]]
+constexpr uint16_t bucket_start[129] = {
+    0, 7, 21, 33, 40, 47, 60, 69, 71, 78, 91, 100, 100, 107, 120, 129,
+    131, 138, 151, 160, 169, 176, 189, 198, 199, 206, 219, 228, 232, 239, 252, 261,
+    261, 268, 281, 290, 294, 301, 314, 323, 325, 332, 345, 354, 354, 361, 374, 383,
+    405, 412, 425, 434, 452, 459, 472, 481, 482, 489, 502, 511, 521, 528, 541, 550,
+    550, 557, 569, 578, 580, 587, 599, 608, 610, 617, 629, 638, 640, 647, 659, 668,
+    670, 677, 689, 698, 748, 755, 767, 776, 776, 783, 795, 804, 804, 811, 823, 832,
+    832, 839, 851, 860, 866, 873, 885, 894, 895, 902, 914, 923, 923, 930, 942, 951,
+    952, 959, 971, 980, 995, 1002, 1014, 1023, 1023, 1030, 1042, 1051, 1051, 1058, 1070, 1079,
+    1079
+};
+
+constexpr uint16_t bucket_insts[] = {
+    163, 164, 165, 166, 167, 168, 169, 170, 171, 172, 173, 174, 175, 176, 177, 178,
+    179, 183, 185, 186, 187, 188, 189, 190, 191, 192, 193, 194, 195, 196, 197, 198,
+    199, 10, 11, 12, 13, 14, 36, 37, 163, 164, 165, 166, 167, 168, 169, 171,
+    172, 173, 174, 175, 176, 177, 178, 179, 183, 185, 186, 187, 188, 189, 190, 191,
+    193, 196, 197, 198, 199, 101, 131, 163, 164, 165, 166, 167, 168, 169, 171, 172,
+    173, 174, 175, 176, 177, 178, 179, 183, 185, 186, 187, 188, 189, 190, 191, 193,
+    196, 197, 198, 199, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174, 175,
+    176, 177, 178, 179, 183, 185, 186, 187, 188, 189, 190, 191, 193, 196, 197, 198,
+    199, 34, 35, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174, 175, 176,
+    177, 178, 179, 183, 185, 186, 187, 188, 189, 190, 191, 193, 196, 197, 198, 199,
+    18, 19, 20, 21, 22, 23, 39, 40, 41, 163, 164, 165, 166, 167, 168, 169,
+    171, 172, 173, 174, 175, 176, 177, 178, 179, 183, 185, 186, 187, 188, 189, 190,
+    191, 193, 196, 197, 198, 199, 1, 163, 164, 165, 166, 167, 168, 169, 171, 172,
+    173, 174, 175, 176, 177, 178, 179, 183, 185, 186, 187, 188, 189, 190, 191, 193,
+    196, 197, 198, 199, 42, 43, 44, 45, 163, 164, 165, 166, 167, 168, 169, 171,
+    172, 173, 174, 175, 176, 177, 178, 179, 183, 185, 186, 187, 188, 189, 190, 191,
+    193, 196, 197, 198, 199, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174,
+    175, 176, 177, 178, 180, 184, 185, 186, 187, 188, 189, 190, 191, 193, 196, 197,
+    198, 199, 15, 16, 17, 38, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173,
+    174, 175, 176, 177, 178, 180, 184, 185, 186, 187, 188, 189, 190, 191, 193, 196,
+    197, 198, 199, 102, 132, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174,
+    175, 176, 177, 178, 180, 184, 185, 186, 187, 188, 189, 190, 191, 193, 196, 197,
+    198, 199, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174, 175, 176, 177,
+    178, 180, 184, 185, 186, 187, 188, 189, 190, 191, 193, 196, 197, 198, 199, 64,
+    65, 66, 67, 68, 69, 70, 71, 72, 73, 74, 75, 76, 77, 78, 79, 80,
+    81, 82, 83, 84, 85, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174,
+    175, 176, 177, 178, 180, 184, 185, 186, 187, 188, 189, 190, 191, 193, 196, 197,
+    198, 199, 24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 51, 52, 53, 54,
+    55, 56, 57, 58, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174, 175,
+    176, 177, 178, 180, 184, 185, 186, 187, 188, 189, 190, 191, 193, 196, 197, 198,
+    199, 0, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174, 175, 176, 177,
+    178, 180, 184, 185, 186, 187, 188, 189, 190, 191, 193, 196, 197, 198, 199, 46,
+    47, 48, 49, 50, 59, 60, 61, 62, 63, 163, 164, 165, 166, 167, 168, 169,
+    171, 172, 173, 174, 175, 176, 177, 178, 180, 184, 185, 186, 187, 188, 189, 190,
+    191, 193, 196, 197, 198, 199, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173,
+    174, 175, 176, 177, 178, 181, 185, 186, 187, 188, 189, 190, 191, 193, 196, 197,
+    198, 199, 103, 133, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174, 175,
+    176, 177, 178, 181, 185, 186, 187, 188, 189, 190, 191, 193, 196, 197, 198, 199,
+    104, 134, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174, 175, 176, 177,
+    178, 181, 185, 186, 187, 188, 189, 190, 191, 193, 196, 197, 198, 199, 105, 135,
+    163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174, 175, 176, 177, 178, 181,
+    185, 186, 187, 188, 189, 190, 191, 193, 196, 197, 198, 199, 106, 136, 163, 164,
+    165, 166, 167, 168, 169, 171, 172, 173, 174, 175, 176, 177, 178, 181, 185, 186,
+    187, 188, 189, 190, 191, 193, 196, 197, 198, 199, 107, 108, 109, 110, 111, 112,
+    113, 114, 115, 116, 117, 118, 119, 120, 121, 122, 123, 124, 125, 126, 127, 128,
+    129, 130, 137, 138, 139, 140, 141, 142, 143, 144, 145, 146, 147, 148, 149, 150,
+    151, 152, 153, 154, 155, 156, 157, 158, 159, 160, 161, 162, 163, 164, 165, 166,
+    167, 168, 169, 171, 172, 173, 174, 175, 176, 177, 178, 181, 185, 186, 187, 188,
+    189, 190, 191, 193, 196, 197, 198, 199, 163, 164, 165, 166, 167, 168, 169, 171,
+    172, 173, 174, 175, 176, 177, 178, 181, 185, 186, 187, 188, 189, 190, 191, 193,
+    196, 197, 198, 199, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174, 175,
+    176, 177, 178, 181, 185, 186, 187, 188, 189, 190, 191, 193, 196, 197, 198, 199,
+    163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174, 175, 176, 177, 178, 182,
+    185, 186, 187, 188, 189, 190, 191, 193, 196, 197, 198, 199, 4, 5, 6, 7,
+    8, 9, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174, 175, 176, 177,
+    178, 182, 185, 186, 187, 188, 189, 190, 191, 193, 196, 197, 198, 199, 3, 163,
+    164, 165, 166, 167, 168, 169, 171, 172, 173, 174, 175, 176, 177, 178, 182, 185,
+    186, 187, 188, 189, 190, 191, 193, 196, 197, 198, 199, 163, 164, 165, 166, 167,
+    168, 169, 171, 172, 173, 174, 175, 176, 177, 178, 182, 185, 186, 187, 188, 189,
+    190, 191, 193, 196, 197, 198, 199, 2, 163, 164, 165, 166, 167, 168, 169, 171,
+    172, 173, 174, 175, 176, 177, 178, 182, 185, 186, 187, 188, 189, 190, 191, 193,
+    196, 197, 198, 199, 86, 87, 88, 89, 90, 91, 92, 93, 94, 95, 96, 97,
+    98, 99, 100, 163, 164, 165, 166, 167, 168, 169, 171, 172, 173, 174, 175, 176,
+    177, 178, 182, 185, 186, 187, 188, 189, 190, 191, 193, 196, 197, 198, 199, 163,
+    164, 165, 166, 167, 168, 169, 171, 172, 173, 174, 175, 176, 177, 178, 182, 185,
+    186, 187, 188, 189, 190, 191, 193, 196, 197, 198, 199, 163, 164, 165, 166, 167,
+    168, 169, 171, 172, 173, 174, 175, 176, 177, 178, 182, 185, 186, 187, 188, 189,
+    190, 191, 193, 196, 197, 198, 199
+};
+
+constexpr const char *xpr_names[32] = {
+    "zero", "ra", "sp", "gp", "tp", "t0", "t1", "t2",
+    "s0", "s1", "a0", "a1", "a2", "a3", "a4", "a5",
+    "a6", "a7", "s2", "s3", "s4", "s5", "s6", "s7",
+    "s8", "s9", "s10", "s11", "t3", "t4", "t5", "t6"
+};
+
+constexpr const char *fpr_names[32] = {
+    "ft0", "ft1", "ft2", "ft3", "ft4", "ft5", "ft6", "ft7",
+    "fs0", "fs1", "fa0", "fa1", "fa2", "fa3", "fa4", "fa5",
+    "fa6", "fa7", "fs2", "fs3", "fs4", "fs5", "fs6", "fs7",
+    "fs8", "fs9", "fs10", "fs11", "ft8", "ft9", "ft10", "ft11"
+};
+
+// Returns the index of inst in inst_table, or -1 if it isn't recognized
+inline int decode(uint32_t inst) {
+    for (int i = bucket_start[inst & 0x7f]; i < bucket_start[(inst & 0x7f) + 1]; i++) {
+        const InstEntry &entry = inst_table[bucket_insts[i]];
+        if ((inst & entry.mask) == entry.match) {
+            return bucket_insts[i];
+        }
+    }
+    return -1;
+}
+
+// Writes the name and operands of inst, in riscv-meta order (e.g.
+// "sd sp, ra, 8"), to buf like snprintf, and returns the length it needed
+inline int format_inst(char *buf, size_t size, uint32_t inst) {
+    int index = decode(inst);
+    if (index < 0) {
+        return snprintf(buf, size, "unknown");
+    }
+    const InstEntry &entry = inst_table[index];
+    int length = snprintf(buf, size, "%s", entry.name);
+    for (int i = 0; i < max_operands && entry.operands[i] != OPERAND_NONE; i++) {
+        int64_t value = operand_value(entry.operands[i], inst);
+        size_t used = ((size_t) length < size) ? length : size;
+        const char *separator = (i == 0) ? " " : ", ";
+        switch (operand_info[entry.operands[i]].kind) {
+            case KIND_XREG: length += snprintf(buf + used, size - used, "%s%s", separator, xpr_names[value]); break;
+            case KIND_FREG: length += snprintf(buf + used, size - used, "%s%s", separator, fpr_names[value]); break;
+            case KIND_XREG_C: length += snprintf(buf + used, size - used, "%s%s", separator, xpr_names[value + 8]); break;
+            case KIND_FREG_C: length += snprintf(buf + used, size - used, "%s%s", separator, fpr_names[value + 8]); break;
+            case KIND_SIMM: length += snprintf(buf + used, size - used, "%s%lld", separator, (long long) value); break;
+            default: length += snprintf(buf + used, size - used, "%s0x%llx", separator, (unsigned long long) value); break;
+        }
+    }
+    return length;
+}
+
+} // namespace opcodes
+
+#endif
@@ -0,0 +1,224 @@
+/* Automatically generated by meta-parse.py */
+
+// Copyright (c) 2016 Massachusetts Institute of Technology
+
+// Permission is hereby granted, free of charge, to any person
+// obtaining a copy of this software and associated documentation
+// files (the "Software"), to deal in the Software without
+// restriction, including without limitation the rights to use, copy,
+// modify, merge, publish, distribute, sublicense, and/or sell copies
+// of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+
+// The above copyright notice and this permission notice shall be
+// included in all copies or substantial portions of the Software.
+
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+// MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+// BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+// ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+// CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+module expandCompressed_verilog (in, out, valid);
+    input [15:0] in;
+    output [31:0] out;
+    output valid;
+
+    reg [31:0] out;
+    reg valid;
+
+    always @ (in)
+        if (((in & 16'he003) == 16'h0000) && ({in[10:7], in[12:11], in[5], in[6], 2'b00} != 10'd0)) begin
+            // c.addi4spn -> addi
+            out = {2'b00, in[10:7], in[12:11], in[5], in[6], 12'b000001000001, in[4:2], 7'b0010011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'h2000)) begin
+            // c.fld -> fld
+            out = {4'b0000, in[6:5], in[12:10], 5'b00001, in[9:7], 5'b01101, in[4:2], 7'b0000111};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'h4000)) begin
+            // c.lw -> lw
+            out = {5'b00000, in[5], in[12:10], in[6], 4'b0001, in[9:7], 5'b01001, in[4:2], 7'b0000011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'h6000)) begin
+            // c.ld -> ld
+            out = {4'b0000, in[6:5], in[12:10], 5'b00001, in[9:7], 5'b01101, in[4:2], 7'b0000011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'ha000)) begin
+            // c.fsd -> fsd
+            out = {4'b0000, in[6:5], in[12], 2'b01, in[4:2], 2'b01, in[9:7], 3'b011, in[11:10], 10'b0000100111};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'hc000)) begin
+            // c.sw -> sw
+            out = {5'b00000, in[5], in[12], 2'b01, in[4:2], 2'b01, in[9:7], 3'b010, in[11:10], in[6], 9'b000100011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'he000)) begin
+            // c.sd -> sd
+            out = {4'b0000, in[6:5], in[12], 2'b01, in[4:2], 2'b01, in[9:7], 3'b011, in[11:10], 10'b0000100011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hffff) == 16'h0001)) begin
+            // c.nop -> addi
+            out = 32'b00000000000000000000000000010011;
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'h0001) && (in[11:7] != 5'd0) && ({in[12], in[6:2]} != 6'd0)) begin
+            // c.addi -> addi
+            out = {in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[6:2], in[11:7], 3'b000, in[11:7], 7'b0010011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'h2001) && (in[11:7] != 5'd0)) begin
+            // c.addiw -> addiw
+            out = {in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[6:2], in[11:7], 3'b000, in[11:7], 7'b0011011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'h4001) && (in[11:7] != 5'd0)) begin
+            // c.li -> addi
+            out = {in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[6:2], 8'b00000000, in[11:7], 7'b0010011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hef83) == 16'h6101) && ({in[12], in[4:3], in[5], in[2], in[6], 4'b0000} != 10'd0)) begin
+            // c.addi16sp -> addi
+            out = {in[12], in[12], in[12], in[4:3], in[5], in[2], in[6], 24'b000000010000000100010011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'h6001) && (in[11:7] != 5'd0) && (in[11:7] != 5'd2) && ({in[12], in[6:2], 12'b000000000000} != 18'd0)) begin
+            // c.lui -> lui
+            out = {in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[6:2], in[11:7], 7'b0110111};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hec03) == 16'h8001) && ({in[12], in[6:2]} != 6'd0)) begin
+            // c.srli -> srli
+            out = {6'b000000, in[12], in[6:2], 2'b01, in[9:7], 5'b10101, in[9:7], 7'b0010011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hec03) == 16'h8401) && ({in[12], in[6:2]} != 6'd0)) begin
+            // c.srai -> srai
+            out = {6'b010000, in[12], in[6:2], 2'b01, in[9:7], 5'b10101, in[9:7], 7'b0010011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hec03) == 16'h8801)) begin
+            // c.andi -> andi
+            out = {in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[6:2], 2'b01, in[9:7], 5'b11101, in[9:7], 7'b0010011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hfc63) == 16'h8c01)) begin
+            // c.sub -> sub
+            out = {9'b010000001, in[4:2], 2'b01, in[9:7], 5'b00001, in[9:7], 7'b0110011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hfc63) == 16'h8c21)) begin
+            // c.xor -> xor
+            out = {9'b000000001, in[4:2], 2'b01, in[9:7], 5'b10001, in[9:7], 7'b0110011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hfc63) == 16'h8c41)) begin
+            // c.or -> or
+            out = {9'b000000001, in[4:2], 2'b01, in[9:7], 5'b11001, in[9:7], 7'b0110011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hfc63) == 16'h8c61)) begin
+            // c.and -> and
+            out = {9'b000000001, in[4:2], 2'b01, in[9:7], 5'b11101, in[9:7], 7'b0110011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hfc63) == 16'h9c01)) begin
+            // c.subw -> subw
+            out = {9'b010000001, in[4:2], 2'b01, in[9:7], 5'b00001, in[9:7], 7'b0111011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hfc63) == 16'h9c21)) begin
+            // c.addw -> addw
+            out = {9'b000000001, in[4:2], 2'b01, in[9:7], 5'b00001, in[9:7], 7'b0111011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'ha001)) begin
+            // c.j -> jal
+            out = {in[12], in[8], in[10:9], in[6], in[7], in[2], in[11], in[5:3], in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[12], in[12], 12'b000001101111};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'hc001)) begin
+            // c.beqz -> beq
+            out = {in[12], in[12], in[12], in[12], in[6:5], in[2], 7'b0000001, in[9:7], 3'b000, in[11:10], in[4:3], in[12], 7'b1100011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'he001)) begin
+            // c.bnez -> bne
+            out = {in[12], in[12], in[12], in[12], in[6:5], in[2], 7'b0000001, in[9:7], 3'b001, in[11:10], in[4:3], in[12], 7'b1100011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'h0002) && (in[11:7] != 5'd0) && ({in[12], in[6:2]} != 6'd0)) begin
+            // c.slli -> slli
+            out = {6'b000000, in[12], in[6:2], in[11:7], 3'b001, in[11:7], 7'b0010011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'h2002)) begin
+            // c.fldsp -> fld
+            out = {3'b000, in[4:2], in[12], in[6:5], 11'b00000010011, in[11:7], 7'b0000111};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'h4002) && (in[11:7] != 5'd0)) begin
+            // c.lwsp -> lw
+            out = {4'b0000, in[3:2], in[12], in[6:4], 10'b0000010010, in[11:7], 7'b0000011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'h6002) && (in[11:7] != 5'd0)) begin
+            // c.ldsp -> ld
+            out = {3'b000, in[4:2], in[12], in[6:5], 11'b00000010011, in[11:7], 7'b0000011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hf07f) == 16'h8002) && (in[11:7] != 5'd0)) begin
+            // c.jr -> jalr
+            out = {12'b000000000000, in[11:7], 15'b000000001100111};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hf003) == 16'h8002) && (in[11:7] != 5'd0) && (in[6:2] != 5'd0)) begin
+            // c.mv -> add
+            out = {7'b0000000, in[6:2], 8'b00000000, in[11:7], 7'b0110011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hffff) == 16'h9002)) begin
+            // c.ebreak -> ebreak
+            out = 32'b00000000000100000000000001110011;
+            valid = 1'b1;
+        end
+        else if (((in & 16'hf07f) == 16'h9002) && (in[11:7] != 5'd0)) begin
+            // c.jalr -> jalr
+            out = {12'b000000000000, in[11:7], 15'b000000011100111};
+            valid = 1'b1;
+        end
+        else if (((in & 16'hf003) == 16'h9002) && (in[11:7] != 5'd0) && (in[6:2] != 5'd0)) begin
+            // c.add -> add
+            out = {7'b0000000, in[6:2], in[11:7], 3'b000, in[11:7], 7'b0110011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'ha002)) begin
+            // c.fsdsp -> fsd
+            out = {3'b000, in[9:7], in[12], in[6:2], 8'b00010011, in[11:10], 10'b0000100111};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'hc002)) begin
+            // c.swsp -> sw
+            out = {4'b0000, in[8:7], in[12], in[6:2], 8'b00010010, in[11:9], 9'b000100011};
+            valid = 1'b1;
+        end
+        else if (((in & 16'he003) == 16'he002)) begin
+            // c.sdsp -> sd
+            out = {3'b000, in[9:7], in[12], in[6:2], 8'b00010011, in[11:10], 10'b0000100011};
+            valid = 1'b1;
+        end
+        else begin
+            out = 32'b0;
+            valid = 1'b0;
+        end
+
+endmodule
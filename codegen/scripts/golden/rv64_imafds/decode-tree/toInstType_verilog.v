@@ -0,0 +1,135 @@
+/* Automatically generated by meta-parse.py */
+
+// Copyright (c) 2016 Massachusetts Institute of Technology
+
+// Permission is hereby granted, free of charge, to any person
+// obtaining a copy of this software and associated documentation
+// files (the "Software"), to deal in the Software without
+// restriction, including without limitation the rights to use, copy,
+// modify, merge, publish, distribute, sublicense, and/or sell copies
+// of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+
+// The above copyright notice and this permission notice shall be
+// included in all copies or substantial portions of the Software.
+
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+// MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+// BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+// ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+// CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+module toInstType_verilog (in, out);
+    input [31:0] in;
+    output [10:0] out;
+
+    wire [1:0] i;
+    wire [1:0] f;
+    wire [1:0] n;
+
+    wire [2:0] None;
+    wire [2:0] I;
+    wire [2:0] S;
+    wire [2:0] SB;
+    wire [2:0] U;
+    wire [2:0] UJ;
+    wire [2:0] Z;
+
+    reg [10:0] out_tmp;
+    reg [10:0] out;
+
+    // assign n = 2'b0x;
+    assign i = 2'b10;
+    assign f = 2'b11;
+
+    assign None = 3'b000;
+    assign I    = 3'b001;
+    assign S    = 3'b010;
+    assign SB   = 3'b011;
+    assign U    = 3'b100;
+    assign UJ   = 3'b101;
+    assign Z    = 3'b110;
+
+    always @ (in)
+        case (in[6:2])
+            5'b00000, 5'b00100, 5'b00110, 5'b11001:
+                out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            5'b00001:
+                out_tmp = {i, 2'b0x, 2'b0x, f, I};
+            5'b00011:
+                out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            5'b00101, 5'b01101:
+                out_tmp = {2'b0x, 2'b0x, 2'b0x, i, U};
+            5'b01000:
+                out_tmp = {i, i, 2'b0x, 2'b0x, S};
+            5'b01001:
+                out_tmp = {i, f, 2'b0x, 2'b0x, S};
+            5'b01011:
+                case (in[14:12])
+                    3'b010, 3'b011:
+                        case (in[31:27])
+                            5'b00000, 5'b00001, 5'b00011, 5'b00100, 5'b01000, 5'b01100, 5'b10000, 5'b10100, 5'b11000, 5'b11100:
+                                out_tmp = {i, i, 2'b0x, i, None};
+                            5'b00010:
+                                out_tmp = {i, 2'b0x, 2'b0x, i, None};
+                            default: out_tmp = 11'bxxxxxxxxxxx;
+                        endcase
+                    default: out_tmp = 11'bxxxxxxxxxxx;
+                endcase
+            5'b01100, 5'b01110:
+                out_tmp = {i, i, 2'b0x, i, None};
+            5'b10000, 5'b10001, 5'b10010, 5'b10011:
+                out_tmp = {f, f, f, f, None};
+            5'b10100:
+                case (in[31:25])
+                    7'b0000000, 7'b0000001, 7'b0000100, 7'b0000101, 7'b0001000, 7'b0001001, 7'b0001100, 7'b0001101, 7'b0010000, 7'b0010001, 7'b0010100, 7'b0010101:
+                        out_tmp = {f, f, 2'b0x, f, None};
+                    7'b0100000, 7'b0100001, 7'b0101100, 7'b0101101:
+                        out_tmp = {f, 2'b0x, 2'b0x, f, None};
+                    7'b1010000, 7'b1010001:
+                        out_tmp = {f, f, 2'b0x, i, None};
+                    7'b1100000, 7'b1100001, 7'b1110000, 7'b1110001:
+                        out_tmp = {f, 2'b0x, 2'b0x, i, None};
+                    7'b1101000, 7'b1101001, 7'b1111000, 7'b1111001:
+                        out_tmp = {i, 2'b0x, 2'b0x, f, None};
+                    default: out_tmp = 11'bxxxxxxxxxxx;
+                endcase
+            5'b11000:
+                out_tmp = {i, i, 2'b0x, 2'b0x, SB};
+            5'b11011:
+                out_tmp = {2'b0x, 2'b0x, 2'b0x, i, UJ};
+            5'b11100:
+                case (in[14:12])
+                    3'b000:
+                        case (in[31:25])
+                            7'b0000000, 7'b0010000, 7'b0011000, 7'b0111101:
+                                out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+                            7'b0001000:
+                                case (in[24:20])
+                                    5'b00010, 5'b00101:
+                                        out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+                                    5'b00100:
+                                        out_tmp = {i, 2'b0x, 2'b0x, 2'b0x, None};
+                                    default: out_tmp = 11'bxxxxxxxxxxx;
+                                endcase
+                            default: out_tmp = 11'bxxxxxxxxxxx;
+                        endcase
+                    3'b001, 3'b010, 3'b011:
+                        out_tmp = {i, 2'b0x, 2'b0x, i, None};
+                    3'b101, 3'b110, 3'b111:
+                        out_tmp = {2'b0x, 2'b0x, 2'b0x, i, Z};
+                    default: out_tmp = 11'bxxxxxxxxxxx;
+                endcase
+            default: out_tmp = 11'bxxxxxxxxxxx;
+        endcase
+
+    always @ (in or out_tmp)
+        if ((out_tmp[4:3] == 2'b10) && (in[11:7] == 5'b00000))
+            out = out_tmp & 11'b11111100111;
+        else
+            out = out_tmp;
+
+endmodule
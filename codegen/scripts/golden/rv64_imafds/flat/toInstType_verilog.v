@@ -0,0 +1,230 @@
+/* Automatically generated by meta-parse.py */
+
+// Copyright (c) 2016 Massachusetts Institute of Technology
+
+// Permission is hereby granted, free of charge, to any person
+// obtaining a copy of this software and associated documentation
+// files (the "Software"), to deal in the Software without
+// restriction, including without limitation the rights to use, copy,
+// modify, merge, publish, distribute, sublicense, and/or sell copies
+// of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+
+// The above copyright notice and this permission notice shall be
+// included in all copies or substantial portions of the Software.
+
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+// MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+// BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+// ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+// CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+module toInstType_verilog (in, out);
+    input [31:0] in;
+    output [10:0] out;
+
+    wire [1:0] i;
+    wire [1:0] f;
+    wire [1:0] n;
+
+    wire [2:0] None;
+    wire [2:0] I;
+    wire [2:0] S;
+    wire [2:0] SB;
+    wire [2:0] U;
+    wire [2:0] UJ;
+    wire [2:0] Z;
+
+    reg [10:0] out_tmp;
+    reg [10:0] out;
+
+    // assign n = 2'b0x;
+    assign i = 2'b10;
+    assign f = 2'b11;
+
+    assign None = 3'b000;
+    assign I    = 3'b001;
+    assign S    = 3'b010;
+    assign SB   = 3'b011;
+    assign U    = 3'b100;
+    assign UJ   = 3'b101;
+    assign Z    = 3'b110;
+
+    always @ (in)
+        casez (in)
+            32'b?????????????????????????0110111: out_tmp = {2'b0x, 2'b0x, 2'b0x, i, U};
+            32'b?????????????????????????0010111: out_tmp = {2'b0x, 2'b0x, 2'b0x, i, U};
+            32'b?????????????????????????1101111: out_tmp = {2'b0x, 2'b0x, 2'b0x, i, UJ};
+            32'b?????????????????000?????1100111: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????000?????1100011: out_tmp = {i, i, 2'b0x, 2'b0x, SB};
+            32'b?????????????????001?????1100011: out_tmp = {i, i, 2'b0x, 2'b0x, SB};
+            32'b?????????????????100?????1100011: out_tmp = {i, i, 2'b0x, 2'b0x, SB};
+            32'b?????????????????101?????1100011: out_tmp = {i, i, 2'b0x, 2'b0x, SB};
+            32'b?????????????????110?????1100011: out_tmp = {i, i, 2'b0x, 2'b0x, SB};
+            32'b?????????????????111?????1100011: out_tmp = {i, i, 2'b0x, 2'b0x, SB};
+            32'b?????????????????000?????0000011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????001?????0000011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????010?????0000011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????100?????0000011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????101?????0000011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????000?????0100011: out_tmp = {i, i, 2'b0x, 2'b0x, S};
+            32'b?????????????????001?????0100011: out_tmp = {i, i, 2'b0x, 2'b0x, S};
+            32'b?????????????????010?????0100011: out_tmp = {i, i, 2'b0x, 2'b0x, S};
+            32'b?????????????????000?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????010?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????011?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????100?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????110?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????111?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b0000000??????????000?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0100000??????????000?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????001?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????010?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????011?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????100?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????101?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0100000??????????101?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????110?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????111?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b?????????????????000?????0001111: out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b?????????????????001?????0001111: out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b?????????????????110?????0000011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????011?????0000011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????011?????0100011: out_tmp = {i, i, 2'b0x, 2'b0x, S};
+            32'b000000???????????001?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b000000???????????101?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b010000???????????101?????0010011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b?????????????????000?????0011011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b0000000??????????001?????0011011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b0000000??????????101?????0011011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b0100000??????????101?????0011011: out_tmp = {i, 2'b0x, 2'b0x, i, I};
+            32'b0000000??????????000?????0111011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0100000??????????000?????0111011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????001?????0111011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000000??????????101?????0111011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0100000??????????101?????0111011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000001??????????000?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000001??????????001?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000001??????????010?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000001??????????011?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000001??????????100?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000001??????????101?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000001??????????110?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000001??????????111?????0110011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000001??????????000?????0111011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000001??????????100?????0111011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000001??????????101?????0111011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000001??????????110?????0111011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b0000001??????????111?????0111011: out_tmp = {i, i, 2'b0x, i, None};
+            32'b00010??00000?????010?????0101111: out_tmp = {i, 2'b0x, 2'b0x, i, None};
+            32'b00011????????????010?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b00001????????????010?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b00000????????????010?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b00100????????????010?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b01000????????????010?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b01100????????????010?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b10000????????????010?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b10100????????????010?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b11000????????????010?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b11100????????????010?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b00010??00000?????011?????0101111: out_tmp = {i, 2'b0x, 2'b0x, i, None};
+            32'b00011????????????011?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b00001????????????011?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b00000????????????011?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b00100????????????011?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b01000????????????011?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b01100????????????011?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b10000????????????011?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b10100????????????011?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b11000????????????011?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b11100????????????011?????0101111: out_tmp = {i, i, 2'b0x, i, None};
+            32'b00000000000000000000000001110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b00000000000100000000000001110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b00000000001000000000000001110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b00010000001000000000000001110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b00100000001000000000000001110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b00110000001000000000000001110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b01111011001000000000000001110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b000100000100?????000000001110011: out_tmp = {i, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b00010000010100000000000001110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, 2'b0x, None};
+            32'b?????????????????001?????1110011: out_tmp = {i, 2'b0x, 2'b0x, i, None};
+            32'b?????????????????010?????1110011: out_tmp = {i, 2'b0x, 2'b0x, i, None};
+            32'b?????????????????011?????1110011: out_tmp = {i, 2'b0x, 2'b0x, i, None};
+            32'b?????????????????101?????1110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, i, Z};
+            32'b?????????????????110?????1110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, i, Z};
+            32'b?????????????????111?????1110011: out_tmp = {2'b0x, 2'b0x, 2'b0x, i, Z};
+            32'b?????????????????010?????0000111: out_tmp = {i, 2'b0x, 2'b0x, f, I};
+            32'b?????????????????010?????0100111: out_tmp = {i, f, 2'b0x, 2'b0x, S};
+            32'b?????00??????????????????1000011: out_tmp = {f, f, f, f, None};
+            32'b?????00??????????????????1000111: out_tmp = {f, f, f, f, None};
+            32'b?????00??????????????????1001011: out_tmp = {f, f, f, f, None};
+            32'b?????00??????????????????1001111: out_tmp = {f, f, f, f, None};
+            32'b0000000??????????????????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0000100??????????????????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0001000??????????????????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0001100??????????????????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0010000??????????000?????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0010000??????????001?????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0010000??????????010?????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0010100??????????000?????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0010100??????????001?????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b010110000000?????????????1010011: out_tmp = {f, 2'b0x, 2'b0x, f, None};
+            32'b1010000??????????000?????1010011: out_tmp = {f, f, 2'b0x, i, None};
+            32'b1010000??????????001?????1010011: out_tmp = {f, f, 2'b0x, i, None};
+            32'b1010000??????????010?????1010011: out_tmp = {f, f, 2'b0x, i, None};
+            32'b110000000000?????????????1010011: out_tmp = {f, 2'b0x, 2'b0x, i, None};
+            32'b110000000001?????????????1010011: out_tmp = {f, 2'b0x, 2'b0x, i, None};
+            32'b110100000000?????????????1010011: out_tmp = {i, 2'b0x, 2'b0x, f, None};
+            32'b110100000001?????????????1010011: out_tmp = {i, 2'b0x, 2'b0x, f, None};
+            32'b111000000000?????000?????1010011: out_tmp = {f, 2'b0x, 2'b0x, i, None};
+            32'b111000000000?????001?????1010011: out_tmp = {f, 2'b0x, 2'b0x, i, None};
+            32'b111100000000?????000?????1010011: out_tmp = {i, 2'b0x, 2'b0x, f, None};
+            32'b110000000010?????????????1010011: out_tmp = {f, 2'b0x, 2'b0x, i, None};
+            32'b110000000011?????????????1010011: out_tmp = {f, 2'b0x, 2'b0x, i, None};
+            32'b110100000010?????????????1010011: out_tmp = {i, 2'b0x, 2'b0x, f, None};
+            32'b110100000011?????????????1010011: out_tmp = {i, 2'b0x, 2'b0x, f, None};
+            32'b?????????????????011?????0000111: out_tmp = {i, 2'b0x, 2'b0x, f, I};
+            32'b?????????????????011?????0100111: out_tmp = {i, f, 2'b0x, 2'b0x, S};
+            32'b?????01??????????????????1000011: out_tmp = {f, f, f, f, None};
+            32'b?????01??????????????????1000111: out_tmp = {f, f, f, f, None};
+            32'b?????01??????????????????1001011: out_tmp = {f, f, f, f, None};
+            32'b?????01??????????????????1001111: out_tmp = {f, f, f, f, None};
+            32'b0000001??????????????????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0000101??????????????????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0001001??????????????????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0001101??????????????????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0010001??????????000?????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0010001??????????001?????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0010001??????????010?????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0010101??????????000?????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b0010101??????????001?????1010011: out_tmp = {f, f, 2'b0x, f, None};
+            32'b010000000001?????????????1010011: out_tmp = {f, 2'b0x, 2'b0x, f, None};
+            32'b010000100000?????????????1010011: out_tmp = {f, 2'b0x, 2'b0x, f, None};
+            32'b010110100000?????????????1010011: out_tmp = {f, 2'b0x, 2'b0x, f, None};
+            32'b1010001??????????000?????1010011: out_tmp = {f, f, 2'b0x, i, None};
+            32'b1010001??????????001?????1010011: out_tmp = {f, f, 2'b0x, i, None};
+            32'b1010001??????????010?????1010011: out_tmp = {f, f, 2'b0x, i, None};
+            32'b110000100000?????????????1010011: out_tmp = {f, 2'b0x, 2'b0x, i, None};
+            32'b110000100001?????????????1010011: out_tmp = {f, 2'b0x, 2'b0x, i, None};
+            32'b110100100000?????????????1010011: out_tmp = {i, 2'b0x, 2'b0x, f, None};
+            32'b110100100001?????????????1010011: out_tmp = {i, 2'b0x, 2'b0x, f, None};
+            32'b111000100000?????001?????1010011: out_tmp = {f, 2'b0x, 2'b0x, i, None};
+            32'b110000100010?????????????1010011: out_tmp = {f, 2'b0x, 2'b0x, i, None};
+            32'b110000100011?????????????1010011: out_tmp = {f, 2'b0x, 2'b0x, i, None};
+            32'b111000100000?????000?????1010011: out_tmp = {f, 2'b0x, 2'b0x, i, None};
+            32'b110100100010?????????????1010011: out_tmp = {i, 2'b0x, 2'b0x, f, None};
+            32'b110100100011?????????????1010011: out_tmp = {i, 2'b0x, 2'b0x, f, None};
+            32'b111100100000?????000?????1010011: out_tmp = {i, 2'b0x, 2'b0x, f, None};
+            default: out_tmp = 11'bxxxxxxxxxxx;
+        endcase
+
+    always @ (in or out_tmp)
+        if ((out_tmp[4:3] == 2'b10) && (in[11:7] == 5'b00000))
+            out = out_tmp & 11'b11111100111;
+        else
+            out = out_tmp;
+
+endmodule
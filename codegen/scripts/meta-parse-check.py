@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2016 Massachusetts Institute of Technology
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, copy,
+# modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# Checks and benchmarks meta-parse.py. Three parts, each of which can be
+# run on its own:
+#
+#   golden: generates every output file for a few ISA configurations (with
+#       the flat, decode tree and parallel case decoders) from a small
+#       subset of riscv-meta kept in golden/meta, and compares them byte for
+#       byte with the copies in golden. --update rewrites the copies
+#       instead, after an intended change to the generated files.
+#   fuzz: builds RiscvOperands from random immediate layouts and checks
+#       their bit maps, the BSV expressions they generate and the immediate
+#       bit sources getImm is built from against a bit-level reference, and
+#       round-trips random patterns through bsv_match_mask_val.
+#   bench: times parsing and each generator on the meta tables with extra
+#       synthetic custom-extension instructions, 1x, 10x and 100x as many
+#       instructions by default.
+
+import argparse
+import contextlib
+import difflib
+import importlib.util
+import io
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+scripts_dir = os.path.dirname(os.path.abspath(__file__))
+
+def load_meta_parse():
+    # meta-parse.py isn't a valid module name, so load it by path
+    spec = importlib.util.spec_from_file_location('meta_parse', os.path.join(scripts_dir, 'meta-parse.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+meta_parse = load_meta_parse()
+
+default_configs = ['rv32:i', 'rv32:im', 'rv64:imafd', 'rv64:imafds', 'rv64:imafdcs']
+
+# generate_files arguments for each decoder variant
+variants = [('flat', (False, False, False)), ('decode-tree', (True, False, False)), ('parallel-case', (False, True, False))]
+
+# the outputs that differ between decoder variants; only these are kept for
+# the decode tree and parallel case variants
+decoder_files = ['Opcodes.bsv', 'toInstType_verilog.v']
+
+golden_dir = os.path.join(scripts_dir, 'golden')
+
+def generate_quietly(rvmeta, base, extension_letters, output_dir, options):
+    # generate_files without the reports meta-parse prints
+    with contextlib.redirect_stdout(io.StringIO()):
+        meta_parse.generate_files(rvmeta.for_extensions(base, extension_letters), output_dir, *options)
+
+def check_golden(meta_dir, configs, golden_dir, update, allow_missing):
+    # Returns the number of generated files that don't match their golden
+    # copies, counting each configuration without golden copies as one
+    # failure unless allow_missing
+    with contextlib.redirect_stdout(io.StringIO()):
+        rvmeta = meta_parse.RiscvMeta(os.path.join(meta_dir, ''), 'rv64', 'i')
+    failures = 0
+    skipped = 0
+    with tempfile.TemporaryDirectory() as work_dir:
+        for config in configs:
+            (base, extension_letters) = config.split(':')
+            for (variant, options) in variants:
+                name = os.path.join('%s_%s' % (base, extension_letters), variant)
+                expected_dir = os.path.join(golden_dir, name)
+                if not update and not os.path.isdir(expected_dir):
+                    if allow_missing:
+                        print('golden: skipped %s, no golden outputs recorded' % name)
+                        skipped += 1
+                    else:
+                        print('FAIL %s: no golden outputs recorded (run with --update to record them)' % name)
+                        failures += 1
+                    continue
+                output_dir = os.path.join(work_dir, name)
+                os.makedirs(output_dir)
+                generate_quietly(rvmeta, base, extension_letters, output_dir, options)
+                if variant != 'flat':
+                    # the other outputs don't depend on the decoder variant
+                    for filename in os.listdir(output_dir):
+                        if filename not in decoder_files:
+                            os.remove(os.path.join(output_dir, filename))
+                if update:
+                    shutil.rmtree(expected_dir, ignore_errors = True)
+                    shutil.copytree(output_dir, expected_dir)
+                    print('updated %s' % expected_dir)
+                    continue
+                for filename in sorted(set(os.listdir(output_dir)) | set(os.listdir(expected_dir))):
+                    (actual, expected) = (read_bytes(os.path.join(output_dir, filename)), read_bytes(os.path.join(expected_dir, filename)))
+                    if actual == expected:
+                        continue
+                    failures += 1
+                    if expected is None:
+                        print('FAIL %s/%s: no golden copy (run with --update to add it)' % (name, filename))
+                    elif actual is None:
+                        print('FAIL %s/%s: no longer generated' % (name, filename))
+                    else:
+                        print('FAIL %s/%s differs:' % (name, filename))
+                        diff = difflib.unified_diff(expected.decode().splitlines(), actual.decode().splitlines(), 'golden', 'generated', lineterm = '')
+                        for line in list(diff)[:40]:
+                            print('    ' + line)
+    if not update:
+        print('golden: %d configurations x %d variants, %d skipped, %d failures' % (len(configs), len(variants), skipped, failures))
+    return failures
+
+def read_bytes(filename):
+    if not os.path.isfile(filename):
+        return None
+    with open(filename, 'rb') as f:
+        return f.read()
+
+def format_bits(bits):
+    # [5, 4, 3, 1] -> '5:3|1'
+    runs = []
+    for bit in bits:
+        if len(runs) > 0 and runs[-1][-1] == bit + 1:
+            runs[-1].append(bit)
+        else:
+            runs.append([bit])
+    return '|'.join('%d:%d' % (run[0], run[-1]) if len(run) > 1 else '%d' % run[0] for run in runs)
+
+def random_layout(rng):
+    # Returns (bit string, {value bit: inst bit}) for a random immediate
+    # layout in the riscv-meta operands syntax, e.g. 31:25[12|10:5],11:7[4:1|11]
+    width = rng.randint(1, 24)
+    value_bits = sorted(rng.sample(range(min(32, width + rng.randint(0, 8))), width))
+    rng.shuffle(value_bits)
+    # split width instruction bits into segments of consecutive bits
+    cuts = sorted(rng.sample(range(1, width), rng.randint(0, min(4, width - 1))))
+    lengths = [b - a for (a, b) in zip([0] + cuts, cuts + [width])]
+    # place the segments one after another at a random offset, in a random
+    # order, so they don't overlap
+    offset = rng.randint(0, 32 - width)
+    order = list(range(len(lengths)))
+    rng.shuffle(order)
+    starts = {}
+    position = offset
+    for i in order:
+        starts[i] = position
+        position += lengths[i]
+    bit_map = {}
+    specs = []
+    next_value = 0
+    for (i, length) in enumerate(lengths):
+        hi = starts[i] + length - 1
+        lo = starts[i]
+        values = value_bits[next_value:next_value + length]
+        next_value += length
+        for (inst_bit, value_bit) in zip(range(hi, lo - 1, -1), values):
+            bit_map[value_bit] = inst_bit
+        specs.append('%s[%s]' % ('%d:%d' % (hi, lo) if hi != lo else '%d' % hi, format_bits(values)))
+    return (','.join(specs), bit_map)
+
+bsv_part_re = re.compile(r"inst\[(\d+)(?::(\d+))?\]|(\d+)'b0")
+
+def eval_bsv_imm(expr, inst):
+    # Evaluates an inst_bit_string like signExtend({inst[31], inst[7], 1'b0})
+    # for inst. Returns (value, width, sign extended).
+    value = 0
+    width = 0
+    for m in bsv_part_re.finditer(expr):
+        if m.group(3) is not None:
+            (hi, lo, bits) = (None, None, int(m.group(3)))
+            value = value << bits
+        else:
+            hi = int(m.group(1))
+            lo = int(m.group(2)) if m.group(2) is not None else hi
+            bits = hi - lo + 1
+            value = (value << bits) | ((inst >> lo) & ((1 << bits) - 1))
+        width += bits
+    return (value, width, expr.startswith('signExtend'))
+
+def fuzz_operands(count, seed):
+    # Returns the number of failures
+    rng = random.Random(seed)
+    failures = 0
+    for i in range(count):
+        (bit_string, bit_map) = random_layout(rng)
+        operand_type = rng.choice(['simm', 'uimm', 'offset'])
+        operand = meta_parse.RiscvOperand(['fuzz', bit_string, operand_type, 'fuzz'])
+        problems = []
+        if operand.bit_map != bit_map:
+            problems.append('bit_map %s, expected %s' % (operand.bit_map, bit_map))
+        top = max(bit_map)
+        signed = operand_type != 'uimm'
+        xlen = rng.choice([32, 64])
+        sources = meta_parse.imm_bit_sources(operand, xlen)
+        for trial in range(4):
+            inst = rng.getrandbits(32)
+            reference = sum(((inst >> inst_bit) & 1) << value_bit for (value_bit, inst_bit) in bit_map.items())
+            if signed and reference >> top:
+                reference -= 1 << (top + 1)
+            (value, width, sign_extended) = eval_bsv_imm(operand.inst_bit_string, inst)
+            if sign_extended and value >> (width - 1):
+                value -= 1 << width
+            if (value, sign_extended) != (reference, signed):
+                problems.append('%s = %d for inst 0x%08x, expected %d' % (operand.inst_bit_string, value, inst, reference))
+            from_sources = sum(((inst >> source) & 1) << bit for (bit, source) in enumerate(sources) if source is not None)
+            if from_sources != reference & ((1 << xlen) - 1):
+                problems.append('imm_bit_sources give 0x%x for inst 0x%08x, expected 0x%x' % (from_sources, inst, reference & ((1 << xlen) - 1)))
+        if len(problems) > 0:
+            failures += 1
+            if failures <= 10:
+                print('FAIL %s %s: %s' % (bit_string, operand_type, problems[0]))
+    for i in range(count):
+        width = rng.choice([16, 32])
+        mask = rng.getrandbits(width)
+        match = rng.getrandbits(width) & mask
+        bsv_val = meta_parse.bsv_match_mask_val(match, mask, width)
+        if meta_parse.bsv_val_to_match_mask(bsv_val) != (match, mask) or len(bsv_val) != len("%d'b" % width) + width:
+            failures += 1
+            if failures <= 10:
+                print('FAIL bsv_match_mask_val(0x%x, 0x%x, %d) = %s' % (match, mask, width, bsv_val))
+    print('fuzz: %d immediate layouts, %d match/mask patterns, %d failures' % (count, count, failures))
+    return failures
+
+# custom-0 to custom-3 major opcodes, free for the synthetic instructions
+custom_opcodes = [0x0b, 0x2b, 0x5b, 0x7b]
+
+def synthetic_meta(meta_dir, out_dir, scale, bases):
+    # Copies meta_dir to out_dir with (scale - 1) times as many extra
+    # R-type instructions in extension x as there are in meta_dir, so the
+    # opcodes table is about scale times as big. Returns the number of
+    # instructions.
+    shutil.copytree(meta_dir, out_dir)
+    opcodes = meta_parse.read_file(os.path.join(meta_dir, 'opcodes'))
+    codec = meta_parse.read_file(os.path.join(meta_dir, 'codecs'))[0][0]
+    extra = (scale - 1) * len(opcodes)
+    assert extra <= len(custom_opcodes) * 8 * 128 * 32, 'scale %d needs more synthetic encodings than there are' % scale
+    with open(os.path.join(out_dir, 'opcodes'), 'a') as f:
+        f.write('\n# synthetic custom extension\n')
+        for i in range(extra):
+            (opcode, funct3, funct7, rs2) = (custom_opcodes[i % 4], (i >> 2) & 7, (i >> 5) & 0x7f, i >> 12)
+            f.write('x.op%d rd rs1 31..25=0x%x 24..20=0x%x 14..12=0x%x 6..0=0x%x %s %s\n' % (i, funct7, rs2, funct3, opcode, codec,
+                    ' '.join(base + 'x' for base in bases)))
+    return len(opcodes) + extra
+
+def time_call(function, *args):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = function(*args)
+    return (time.perf_counter() - start, result)
+
+# the generators, as (name, emitter factory)
+generators = [
+        ('Opcodes.bsv', lambda rvmeta, filename: meta_parse.BsvDecoderEmitter(rvmeta, filename, False)),
+        ('toInstType_verilog.v', lambda rvmeta, filename: meta_parse.VerilogDecoderEmitter(rvmeta, filename, False)),
+        ('Opcodes.defines', meta_parse.MacroDefinitionsEmitter),
+        ('CSRs.stub.bsv', meta_parse.CsrStubEmitter),
+        ('Imm.stub.bsv', meta_parse.ImmStubEmitter),
+        ('Opcodes.hpp', meta_parse.CppDecoderEmitter)]
+
+def benchmark(meta_dir, config, scales, decode_tree, minimize):
+    # Returns a list of {scale, instructions, step, seconds}
+    (base, extension_letters) = config.split(':')
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for scale in scales:
+            scaled_dir = os.path.join(work_dir, 'meta%d' % scale)
+            count = synthetic_meta(meta_dir, scaled_dir, scale, ['rv32', 'rv64', 'rv128'])
+            steps = []
+            (seconds, rvmeta) = time_call(meta_parse.RiscvMeta, scaled_dir, base, extension_letters + 'x')
+            steps.append(('parse', seconds))
+            for (name, factory) in generators:
+                filename = os.path.join(work_dir, 'out')
+                (seconds, result) = time_call(rvmeta.emit, [factory(rvmeta, filename)])
+                steps.append((name, seconds))
+            if decode_tree:
+                (seconds, result) = time_call(rvmeta.emit, [meta_parse.BsvDecoderEmitter(rvmeta, filename, True)])
+                steps.append(('Opcodes.bsv (decode tree)', seconds))
+            if minimize:
+                (seconds, result) = time_call(rvmeta.emit, [meta_parse.BsvDecoderEmitter(rvmeta, filename, False, minimize = True)])
+                steps.append(('Opcodes.bsv (minimized)', seconds))
+            (seconds, decoder) = time_call(rvmeta.get_decoder)
+            steps.append(('InstDecoder', seconds))
+            words = [random.Random(scale).getrandbits(32) for i in range(100000)]
+            (seconds, result) = time_call(lambda: [decoder.decode(word) for word in words])
+            steps.append(('decode 100000 words', seconds))
+            for (step, seconds) in steps:
+                results.append({'scale': scale, 'instructions': count, 'step': step, 'seconds': seconds})
+    return results
+
+def print_benchmark(results):
+    scales = sorted(set(r['scale'] for r in results))
+    counts = dict((r['scale'], r['instructions']) for r in results)
+    print('bench: seconds per step (instructions in the opcodes table)')
+    print('    %-26s' % 'step' + ''.join('%14s' % ('%dx (%d)' % (scale, counts[scale])) for scale in scales))
+    steps = []
+    for r in results:
+        if r['step'] not in steps:
+            steps.append(r['step'])
+    seconds = dict(((r['scale'], r['step']), r['seconds']) for r in results)
+    for step in steps:
+        print('    %-26s' % step + ''.join('%14.3f' % seconds[(scale, step)] for scale in scales))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Check meta-parse.py against golden outputs, fuzz it, and benchmark it.')
+    parser.add_argument('parts', metavar = '{golden,fuzz,bench}', nargs = '*',
+            help = 'what to run (default: all three)')
+    parser.add_argument('--meta', default = os.path.join(scripts_dir, '..', 'riscv-meta', 'meta'),
+            help = 'path to riscv-meta/meta')
+    parser.add_argument('--configs', nargs = '+', default = default_configs,
+            help = 'base:extensions configurations for the golden outputs (default: %s)' % ' '.join(default_configs))
+    parser.add_argument('--golden-meta', default = os.path.join(golden_dir, 'meta'),
+            help = 'meta tables the golden outputs are generated from (default: codegen/scripts/golden/meta)')
+    parser.add_argument('--golden-dir', default = golden_dir,
+            help = 'where the golden outputs are kept (default: codegen/scripts/golden)')
+    parser.add_argument('--update', action = 'store_true',
+            help = 'rewrite the golden outputs instead of comparing against them')
+    parser.add_argument('--allow-missing', action = 'store_true',
+            help = "skip configurations that don't have golden outputs instead of failing")
+    parser.add_argument('--fuzz-count', type = int, default = 5000,
+            help = 'random immediate layouts to check (default: 5000)')
+    parser.add_argument('--seed', type = int, default = 1,
+            help = 'random seed for fuzzing')
+    parser.add_argument('--scales', type = int, nargs = '+', default = [1, 10, 100],
+            help = 'opcodes table sizes to benchmark, as multiples of the real one (default: 1 10 100)')
+    parser.add_argument('--bench-config', default = 'rv64:imafd',
+            help = 'base:extensions to benchmark; the synthetic x extension is added (default: rv64:imafd)')
+    parser.add_argument('--decode-tree', action = 'store_true',
+            help = 'also benchmark the decode tree decoder, which is slow on large tables')
+    parser.add_argument('--minimize', action = 'store_true',
+            help = 'also benchmark the minimized decoder, which is slow on large tables')
+    parser.add_argument('--json', default = None,
+            help = 'append the benchmark results to this file, one JSON record per line')
+    args = parser.parse_args()
+
+    if len(args.parts) == 0:
+        args.parts = ['golden', 'fuzz', 'bench']
+    for part in args.parts:
+        assert part in ['golden', 'fuzz', 'bench'], 'unknown part %s' % part
+    failures = 0
+    if 'bench' in args.parts and not os.path.isfile(os.path.join(args.meta, 'opcodes')):
+        # the riscv-meta submodule isn't checked out
+        print('bench: skipped, no riscv-meta tables in %s' % args.meta)
+        args.parts.remove('bench')
+    if 'golden' in args.parts:
+        failures += check_golden(args.golden_meta, args.configs, args.golden_dir, args.update, args.allow_missing)
+    if 'fuzz' in args.parts:
+        failures += fuzz_operands(args.fuzz_count, args.seed)
+    if 'bench' in args.parts:
+        results = benchmark(args.meta, args.bench_config, args.scales, args.decode_tree, args.minimize)
+        print_benchmark(results)
+        if args.json is not None:
+            now = time.strftime('%Y-%m-%dT%H:%M:%S')
+            with open(args.json, 'a') as f:
+                for r in results:
+                    r['time'] = now
+                    f.write(json.dumps(r, sort_keys = True) + '\n')
+    sys.exit(1 if failures > 0 else 0)
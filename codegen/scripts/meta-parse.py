@@ -23,8 +23,13 @@
 # CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import argparse
 import copy
 import functools
+import hashlib
+import io
+import json
+import multiprocessing
 import os
 import sys
 
@@ -65,6 +70,17 @@ def read_file(filename):
                 results.append(tokens)
     return results
 
+def write_file(filename, contents):
+    # Only write filename if its contents change. Rewriting an identical file
+    # bumps its mtime and makes bsc rebuild everything that includes it.
+    if os.path.isfile(filename):
+        with open(filename, 'r') as f:
+            if f.read() == contents:
+                return False
+    with open(filename, 'w') as f:
+        f.write(contents)
+    return True
+
 def bsv_match_mask_val(match, mask, width):
     assert match & mask == match, "match has bits that aren't set in mask"
     assert mask >> width == 0, 'mask is wider than width'
@@ -80,6 +96,35 @@ def bsv_match_mask_val(match, mask, width):
     bsv_val = str(width) + "'b" + bsv_val
     return bsv_val
 
+def bsv_val_to_match_mask(bsv_val):
+    # inverse of bsv_match_mask_val: 32'b??..01 -> (match, mask)
+    bits = bsv_val.split("'b", 1)[1]
+    match = 0
+    mask = 0
+    for c in bits:
+        match = match << 1
+        mask = mask << 1
+        if c != '?':
+            mask = mask | 1
+            if c == '1':
+                match = match | 1
+    return (match, mask)
+
+# The ImmType in RVTypes.bsv of each immediate operand, in the order they
+# are looked for in an instruction's operands
+imm_mapping = {
+        'imm20'   : 'U',
+        'oimm20'  : 'U',
+        'jimm20'  : 'UJ',
+        'imm12'   : 'I',
+        'oimm12'  : 'I',
+        'simm12'  : 'S',
+        'sbimm12' : 'SB',
+        'zimm'    : 'Z',
+        'shamt5'  : 'I',
+        'shamt6'  : 'I'
+        }
+
 def get_inst_types(args):
     def get_reg_type(reg, args):
         if reg in args:
@@ -89,18 +134,6 @@ def get_inst_types(args):
         else:
             return 'n'
     def get_imm_type(args):
-        imm_mapping = {
-                'imm20'   : 'U',
-                'oimm20'  : 'U',
-                'jimm20'  : 'UJ',
-                'imm12'   : 'I',
-                'oimm12'  : 'I',
-                'simm12'  : 'S',
-                'sbimm12' : 'SB',
-                'zimm'    : 'Z',
-                'shamt5'  : 'I',
-                'shamt6'  : 'I'
-                }
         for imm_name in imm_mapping:
             if imm_name in args:
                 return imm_mapping[imm_name]
@@ -115,6 +148,8 @@ def get_inst_types(args):
     return (rd, rs1, rs2, rs3, imm)
 
 class RiscvOperand:
+    # bit_map maps each bit of the operand value to the instruction bit it
+    # comes from
     def __init__(self, operand_row):
         self.name = operand_row[0]
         self.bit_string = operand_row[1]
@@ -146,6 +181,7 @@ class RiscvOperand:
             bit_map = {}
             for i in range(len(inst_bits)):
                 bit_map[imm_bits[i]] = inst_bits[i]
+            self.bit_map = bit_map
 
             # construct self.inst_bit_string
             first_bit = True
@@ -187,6 +223,12 @@ class RiscvOperand:
                 self.inst_bit_string = 'zeroExtend(%s)' % self.inst_bit_string
         else:
             self.inst_bit_string = 'inst[' + self.bit_string + ']'
+            # a plain field, e.g. 11:7 or 26
+            if ':' in self.bit_string:
+                hi, lo = map(int, self.bit_string.split(':'))
+            else:
+                hi = lo = int(self.bit_string)
+            self.bit_map = dict((i - lo, i) for i in range(lo, hi + 1))
 
     def is_imm(self):
         return self.operand_type == 'simm' or self.operand_type == 'offset' or self.operand_type == 'uimm'
@@ -200,25 +242,780 @@ class RiscvOperand:
     def __repr__(self):
         return "<%s: %s %s>"%(self.name, self.operand_type, self.inst_bit_string)
 
+def bsv_inst_type(inst_types):
+    (rd, rs1, rs2, rs3, imm) = inst_types
+    return 'InstType{rs1: %s, rs2: %s, rs3: %s, dst: %s, imm: %-4s}' % (rs1,rs2,rs3,rd,imm)
+
+def verilog_inst_type(inst_types):
+    (rd, rs1, rs2, rs3, imm) = [x if x != 'n' else "2'b0x" for x in inst_types]
+    return '{%s, %s, %s, %s, %s}' % (rs1,rs2,rs3,rd,imm)
+
+def field_mask(hi, lo):
+    return ((1 << (hi - lo + 1)) - 1) << lo
+
+def highest_bit(x):
+    return x.bit_length() - 1
+
+def casez_lookup(entries, match, mask):
+    # Returns what a casez over entries (in priority order) produces for every
+    # word in the cube described by (match, mask):
+    #   ('value', inst_types) if all the words decode the same way
+    #   ('split', bit) if the cube has to be split on bit to answer
+    #   ('default',) if none of the entries match
+    for (name, entry_match, entry_mask, inst_types) in entries:
+        if (match ^ entry_match) & mask & entry_mask != 0:
+            # disjoint
+            continue
+        if entry_mask & ~mask == 0:
+            return ('value', inst_types)
+        return ('split', highest_bit(entry_mask & ~mask))
+    return ('default',)
+
+# Instruction fields the decode tree splits on, in order of preference:
+# opcode[6:2], funct3, funct7, and rs2
+decode_tree_fields = [(6, 2), (14, 12), (31, 25), (24, 20)]
+
+class DecodeTreeNode:
+    def __init__(self, entries):
+        # entries is a list of (macro_name, match, mask, inst_types) in the
+        # same priority order as the flat casez decoder
+        self.entries = entries
+        self.hi = None
+        self.lo = None
+        self.arms = None
+
+        if self.is_uniform():
+            # only split where it is needed to tell InstTypes apart
+            return
+        field = self.choose_field()
+        if field is None:
+            # leaf with a small casez over the remaining entries
+            return
+
+        (self.hi, self.lo) = field
+        fmask = field_mask(self.hi, self.lo)
+        arm_entries = {}
+        for entry in entries:
+            val = (entry[1] & fmask) >> self.lo
+            if val in arm_entries:
+                arm_entries[val].append(entry)
+            else:
+                arm_entries[val] = [entry]
+        self.arms = {}
+        for val in sorted(arm_entries):
+            self.arms[val] = DecodeTreeNode(arm_entries[val])
+
+    def is_uniform(self):
+        return len(set([entry[3] for entry in self.entries])) <= 1
+
+    def choose_field(self):
+        # a field can be split on if every entry fully constrains it
+        common_mask = functools.reduce(lambda x, y: x & y, [entry[2] for entry in self.entries])
+        for (hi, lo) in decode_tree_fields:
+            fmask = field_mask(hi, lo)
+            if common_mask & fmask == fmask:
+                if len(set([entry[1] & fmask for entry in self.entries])) > 1:
+                    return (hi, lo)
+        # none of the usual fields work (e.g. srli/srai in RV64), so use the
+        # highest run of constrained bits that the entries disagree on
+        diff = 0
+        for entry in self.entries:
+            diff = diff | ((entry[1] ^ self.entries[0][1]) & common_mask)
+        if diff == 0:
+            return None
+        hi = highest_bit(diff)
+        lo = hi
+        while lo > 0 and (diff >> (lo - 1)) & 1 == 1:
+            lo -= 1
+        return (hi, lo)
+
+    def lookup(self, match, mask):
+        # same return values as casez_lookup
+        node = self
+        while node.arms is not None:
+            fmask = field_mask(node.hi, node.lo)
+            if mask & fmask != fmask:
+                return ('split', highest_bit(fmask & ~mask))
+            val = (match & fmask) >> node.lo
+            if val not in node.arms:
+                return ('default',)
+            node = node.arms[val]
+        if node.is_uniform():
+            return ('value', node.entries[0][3])
+        return casez_lookup(node.entries, match, mask)
+
+    def arm_labels(self):
+        width = self.hi - self.lo + 1
+        labels = []
+        for val in self.arms:
+            labels.append(("%d'b" % width) + format(val, '0%db' % width))
+        return labels
+
+    def to_bsv(self, indent):
+        pad = ' ' * indent
+        if self.arms is None:
+            if self.is_uniform():
+                return bsv_inst_type(self.entries[0][3])
+            bsv = '(case (inst) matches\n'
+            for (macro_name, match, mask, inst_types) in self.entries:
+                bsv += pad + '    %-16s%s;\n' % ('`' + macro_name + ':', bsv_inst_type(inst_types))
+            bsv += pad + '    default:        ?;\n'
+            bsv += pad + 'endcase)'
+            return bsv
+        arms = []
+        for (label, val) in zip(self.arm_labels(), self.arms):
+            body = self.arms[val].to_bsv(indent + 4)
+            for arm in arms:
+                if arm[1] == body:
+                    arm[0].append(label)
+                    break
+            else:
+                arms.append(([label], body))
+        bsv = '(case (inst[%d:%d])\n' % (self.hi, self.lo)
+        for (labels, body) in arms:
+            bsv += pad + '    %s: %s;\n' % (', '.join(labels), body)
+        bsv += pad + '    default: ?;\n'
+        bsv += pad + 'endcase)'
+        return bsv
+
+    def to_verilog(self, indent):
+        pad = ' ' * indent
+        if self.arms is None:
+            if self.is_uniform():
+                return pad + 'out_tmp = %s;\n' % verilog_inst_type(self.entries[0][3])
+            verilog = pad + 'casez (in)\n'
+            for (macro_name, match, mask, inst_types) in self.entries:
+                verilog += pad + '    %s: out_tmp = %s;\n' % (bsv_match_mask_val(match, mask, 32), verilog_inst_type(inst_types))
+            verilog += pad + "    default: out_tmp = 11'bxxxxxxxxxxx;\n"
+            verilog += pad + 'endcase\n'
+            return verilog
+        arms = []
+        for (label, val) in zip(self.arm_labels(), self.arms):
+            body = self.arms[val].to_verilog(indent + 8)
+            for arm in arms:
+                if arm[1] == body:
+                    arm[0].append(label)
+                    break
+            else:
+                arms.append(([label], body))
+        verilog = pad + 'case (in[%d:%d])\n' % (self.hi, self.lo)
+        for (labels, body) in arms:
+            verilog += pad + '    %s:\n' % ', '.join(labels)
+            verilog += body
+        verilog += pad + "    default: out_tmp = 11'bxxxxxxxxxxx;\n"
+        verilog += pad + 'endcase\n'
+        return verilog
+
+def check_decode_tree(tree, entries):
+    # Walk the instruction space as cubes, splitting only on bits that one of
+    # the two decoders looks at, and check that the tree agrees with the flat
+    # casez everywhere the casez doesn't fall through to default.
+    cubes = [(0, 0)]
+    while len(cubes) > 0:
+        (match, mask) = cubes.pop()
+        flat = casez_lookup(entries, match, mask)
+        if flat[0] == 'default':
+            continue
+        nested = tree.lookup(match, mask)
+        if flat[0] == 'split':
+            bit = flat[1]
+        elif nested[0] == 'split':
+            bit = nested[1]
+        else:
+            assert nested == flat, 'decode tree disagrees with casez decoder for %s' % bsv_match_mask_val(match, mask, 32)
+            continue
+        cubes.append((match, mask | (1 << bit)))
+        cubes.append((match | (1 << bit), mask | (1 << bit)))
+
+# Numeric encodings of the get_inst_types classes. These match the encodings
+# used by toInstType_verilog (n = 2'b0x, i = 2'b10, f = 2'b11) and the order
+# of ImmType in RVTypes.bsv.
+reg_type_codes = {'n': 0, 'i': 2, 'f': 3}
+imm_type_codes = {'None': 0, 'I': 1, 'S': 2, 'SB': 3, 'U': 4, 'UJ': 5, 'Z': 6}
+
+class InstDecoder:
+    def __init__(self, entries):
+        # entries is a list of (macro_name, match, mask, inst_types) in
+        # priority order (see RiscvMeta.get_decoder_entries). Instruction IDs
+        # are indices into this list.
+        self.names = [entry[0] for entry in entries]
+        self.inst_types = [entry[3] for entry in entries]
+
+        # bucket the entries by inst[6:0] so a lookup only looks at the
+        # handful of instructions that share a major opcode
+        self.buckets = [[] for x in range(128)]
+        for (index, (macro_name, match, mask, inst_types)) in enumerate(entries):
+            for opcode in range(128):
+                if (opcode ^ match) & mask & 0x7f == 0:
+                    self.buckets[opcode].append((index, match, mask))
+
+    def decode(self, inst):
+        # returns the instruction ID of inst, or None if it isn't recognized
+        for (index, match, mask) in self.buckets[inst & 0x7f]:
+            if inst & mask == match:
+                return index
+        return None
+
+    def decode_array(self, insts):
+        # Decodes a NumPy array of 32-bit instructions at once. Returns an
+        # int32 array of instruction IDs with -1 for unrecognized words.
+        import numpy as np
+        insts = np.asarray(insts, dtype=np.uint32)
+        opcodes = insts & 0x7f
+        # group the instructions by major opcode so each bucket only has to
+        # compare against the entries that can possibly match
+        order = np.argsort(opcodes, kind='stable')
+        sorted_insts = insts[order]
+        bounds = np.searchsorted(opcodes[order], np.arange(129))
+        sorted_ids = np.full(len(insts), -1, dtype=np.int32)
+        for opcode in range(128):
+            lo = bounds[opcode]
+            hi = bounds[opcode + 1]
+            if lo == hi:
+                continue
+            bucket_insts = sorted_insts[lo:hi]
+            bucket_ids = sorted_ids[lo:hi]
+            # lowest priority first so higher priority matches overwrite
+            for (index, match, mask) in reversed(self.buckets[opcode]):
+                bucket_ids[(bucket_insts & np.uint32(mask)) == np.uint32(match)] = index
+        ids = np.empty_like(sorted_ids)
+        ids[order] = sorted_ids
+        return ids
+
+    def inst_types_array(self, ids):
+        # Maps an array of instruction IDs from decode_array to a structured
+        # array of register/immediate classes encoded with reg_type_codes and
+        # imm_type_codes. Unrecognized instructions (-1) get all zeros.
+        import numpy as np
+        dtype = np.dtype([('rd', np.uint8), ('rs1', np.uint8), ('rs2', np.uint8), ('rs3', np.uint8), ('imm', np.uint8)])
+        table = np.zeros(len(self.inst_types) + 1, dtype=dtype)
+        for (index, (rd, rs1, rs2, rs3, imm)) in enumerate(self.inst_types):
+            table[index] = (reg_type_codes[rd], reg_type_codes[rs1], reg_type_codes[rs2], reg_type_codes[rs3], imm_type_codes[imm])
+        # index -1 selects the last (all zero) row
+        return table[np.asarray(ids)]
+
+def find_overlaps(entries):
+    # Returns (index_a, index_b) for every pair of entries (a < b) that some
+    # instruction word matches both of. Entries are indexed by the bits of
+    # inst[14:12] and inst[6:0] they are compatible with, so only entries
+    # that share an index bucket are compared.
+    key_mask = field_mask(14, 12) | field_mask(6, 0)
+    buckets = {}
+    for (index, (macro_name, match, mask, inst_types)) in enumerate(entries):
+        # enumerate every value of the key bits this entry doesn't constrain
+        free = key_mask & ~mask
+        sub = free
+        while True:
+            key = (match & key_mask) | sub
+            if key in buckets:
+                buckets[key].append(index)
+            else:
+                buckets[key] = [index]
+            if sub == 0:
+                break
+            sub = (sub - 1) & free
+    overlaps = set()
+    for bucket in buckets.values():
+        for x in range(len(bucket)):
+            (a_name, a_match, a_mask, a_types) = entries[bucket[x]]
+            for b in bucket[x+1:]:
+                (b_name, b_match, b_mask, b_types) = entries[b]
+                if (a_match ^ b_match) & a_mask & b_mask == 0:
+                    overlaps.add((bucket[x], b))
+    return sorted(overlaps)
+
+def print_overlaps(entries, overlaps):
+    for (a, b) in overlaps:
+        (a_name, a_match, a_mask, a_types) = entries[a]
+        (b_name, b_match, b_mask, b_types) = entries[b]
+        if a_mask & ~b_mask == 0 and (a_match ^ b_match) & a_mask == 0:
+            # every word that matches b also matches a
+            note = ' (%s is unreachable)' % b_name
+        else:
+            note = ''
+        print('%-16s overlaps %-16s at %s%s' % (a_name, b_name, bsv_match_mask_val(a_match | b_match, a_mask | b_mask, 32), note))
+
+# Two-level logic minimization of the decoder outputs. Cubes are (match,
+# mask) pairs over the 32 instruction bits, like the decoder patterns: a word
+# is in the cube if it agrees with match on every bit set in mask.
+
+def popcount(x):
+    return bin(x).count('1')
+
+def cube_intersects(a, b):
+    return (a[0] ^ b[0]) & a[1] & b[1] == 0
+
+def cube_contains(a, b):
+    # every word in cube b is also in cube a
+    return a[1] & ~b[1] == 0 and (a[0] ^ b[0]) & a[1] == 0
+
+def cube_sharp(a, b):
+    # Returns a list of disjoint cubes covering the words in a but not in b
+    if not cube_intersects(a, b):
+        return [a]
+    (match, mask) = a
+    pieces = []
+    free = b[1] & ~mask
+    while free != 0:
+        bit = 1 << highest_bit(free)
+        free &= ~bit
+        # words that disagree with b on this bit but agree on the ones before
+        pieces.append((match | (~b[0] & bit), mask | bit))
+        match |= b[0] & bit
+        mask |= bit
+    return pieces
+
+def cover_sharp(pieces, cube):
+    return [piece for a in pieces for piece in cube_sharp(a, cube)]
+
+def cover_contains(cover, pieces):
+    # every word in pieces is also in one of the cubes in cover
+    for cube in cover:
+        pieces = cover_sharp(pieces, cube)
+        if len(pieces) == 0:
+            return True
+    return len(pieces) == 0
+
+def cover_restrict(cover, cube):
+    # the parts of cover that lie in cube
+    return [(a[0] | cube[0], a[1] | cube[1]) for a in cover if cube_intersects(a, cube)]
+
+def supercube(cubes):
+    (match, mask) = cubes[0]
+    for (other_match, other_mask) in cubes[1:]:
+        mask &= other_mask & ~(match ^ other_match)
+    return (match & mask, mask)
+
+def sop_cost(cover):
+    return (len(cover), sum(popcount(mask) for (match, mask) in cover))
+
+def sop_depth(cover):
+    # gate levels with two input AND and OR gates, not counting inverters
+    if len(cover) == 0:
+        return 0
+    and_depth = max(max(popcount(mask) - 1, 0) for (match, mask) in cover).bit_length()
+    return and_depth + (len(cover) - 1).bit_length()
+
+def sop_expand(cover, off_set):
+    # Raises literals of each cube to don't cares for as long as the cube
+    # stays clear of the OFF-set. Cubes with the fewest literals go first so
+    # they can swallow the rest.
+    expanded = []
+    for cube in sorted(cover, key = lambda c: popcount(c[1])):
+        if any(cube_contains(e, cube) for e in expanded):
+            continue
+        (match, mask) = cube
+        # the literals that keep the cube out of each OFF-set cube
+        conflicts = [(match ^ off_match) & mask & off_mask for (off_match, off_mask) in off_set]
+        # try the literals that the fewest OFF-set cubes depend on first
+        bits = [bit for bit in range(32) if (mask >> bit) & 1]
+        bits.sort(key = lambda bit: sum((c >> bit) & 1 for c in conflicts))
+        for bit in bits:
+            if (1 << bit) in conflicts:
+                # this literal alone keeps out some OFF-set cube
+                continue
+            mask &= ~(1 << bit)
+            conflicts = [c & ~(1 << bit) for c in conflicts]
+        expanded.append((match & mask, mask))
+    expanded = list(dict.fromkeys(expanded))
+    return [a for a in expanded if not any(a != b and cube_contains(b, a) for b in expanded)]
+
+def sop_irredundant(cover, on_set):
+    # Drops cubes whose part of the ON-set is covered by the other cubes,
+    # trying the cubes with the most literals first.
+    cover = sorted(cover, key = lambda c: -popcount(c[1]))
+    for cube in list(cover):
+        rest = [c for c in cover if c is not cube]
+        if cover_contains(rest, cover_restrict(on_set, cube)):
+            cover = rest
+    return cover
+
+def sop_reduce(cover, on_set):
+    # Shrinks each cube to the smallest cube containing the part of the
+    # ON-set that no other cube covers, so the next expand can grow it in a
+    # different direction.
+    cover = list(cover)
+    for i in range(len(cover)):
+        pieces = cover_restrict(on_set, cover[i])
+        for other in cover[:i] + cover[i+1:]:
+            if other is not None:
+                pieces = cover_sharp(pieces, other)
+        cover[i] = supercube(pieces) if len(pieces) > 0 else None
+    return [cube for cube in cover if cube is not None]
+
+def minimize_sop(on_set, off_set):
+    # Espresso-style heuristic minimization: expand and irredundant, then
+    # reduce, expand, and irredundant again for as long as that helps.
+    # Words in neither set are don't cares.
+    cover = sop_irredundant(sop_expand(on_set, off_set), on_set)
+    while True:
+        new_cover = sop_irredundant(sop_expand(sop_reduce(cover, on_set), off_set), on_set)
+        if sop_cost(new_cover) >= sop_cost(cover):
+            break
+        cover = new_cover
+    assert cover_contains(cover, on_set), 'minimized cover misses part of the ON-set'
+    assert not any(cube_intersects(a, b) for a in cover for b in off_set), 'minimized cover hits the OFF-set'
+    return sorted(cover, reverse = True)
+
+def sop_expr(cover, var, indent):
+    # The cover as a Verilog / BSV expression of the bits of var
+    terms = []
+    for (match, mask) in cover:
+        literals = [('%s[%d]' if (match >> bit) & 1 else '~%s[%d]') % (var, bit) for bit in reversed(range(32)) if (mask >> bit) & 1]
+        if len(literals) == 0:
+            return "1'b1"
+        terms.append(' & '.join(literals))
+    if len(terms) == 0:
+        return "1'b0"
+    if len(terms) == 1:
+        return terms[0]
+    return (' |\n' + ' ' * indent).join('(' + term + ')' for term in terms)
+
+# The bits of pack(InstType) and of out_tmp in toInstType_verilog, msb first
+inst_type_bit_names = ['rs1[1]', 'rs1[0]', 'rs2[1]', 'rs2[0]', 'rs3[1]', 'rs3[0]',
+        'dst[1]', 'dst[0]', 'imm[2]', 'imm[1]', 'imm[0]']
+
+def inst_type_bits(inst_types):
+    # pack(InstType) as a string of '0', '1', and 'x' (don't care), msb first
+    (rd, rs1, rs2, rs3, imm) = inst_types
+    reg_bits = {'n': '0x', 'i': '10', 'f': '11'}
+    return reg_bits[rs1] + reg_bits[rs2] + reg_bits[rs3] + reg_bits[rd] + format(imm_type_codes[imm], '03b')
+
+def decoder_regions(entries):
+    # Returns, for each entry, disjoint cubes covering the words the flat
+    # casez decodes with that entry, i.e. the words it matches that no
+    # earlier entry does.
+    regions = [[(match, mask)] for (macro_name, match, mask, inst_types) in entries]
+    for (a, b) in find_overlaps(entries):
+        (a_name, a_match, a_mask, a_types) = entries[a]
+        regions[b] = cover_sharp(regions[b], (a_match, a_mask))
+    return regions
+
+def minimize_inst_type(entries):
+    # Returns (cover, casez_literals) for each bit of pack(InstType), msb
+    # first. Words that none of the entries match are don't cares, and so is
+    # the low bit of a Maybe#(RegType) that is Invalid. casez_literals is
+    # the literal count of the unminimized sum of products the casez
+    # describes, for comparison.
+    regions = decoder_regions(entries)
+    bits = [inst_type_bits(inst_types) for (macro_name, match, mask, inst_types) in entries]
+    result = []
+    for i in range(len(inst_type_bit_names)):
+        on_set = [cube for (index, region) in enumerate(regions) if bits[index][i] == '1' for cube in region]
+        off_set = [cube for (index, region) in enumerate(regions) if bits[index][i] == '0' for cube in region]
+        casez_literals = sum(popcount(entries[index][2]) for index in range(len(entries)) if bits[index][i] == '1')
+        result.append((minimize_sop(on_set, off_set), casez_literals))
+    return result
+
+def sop_summary(cover):
+    (terms, literals) = sop_cost(cover)
+    return '%d terms, %d literals, depth %d' % (terms, literals, sop_depth(cover))
+
+def print_sop_report(minimized):
+    print('%-8s %6s %9s %6s %16s' % ('bit', 'terms', 'literals', 'depth', 'casez literals'))
+    for (name, (cover, casez_literals)) in zip(inst_type_bit_names, minimized):
+        (terms, literals) = sop_cost(cover)
+        print('%-8s %6d %9d %6d %16d' % (name, terms, literals, sop_depth(cover), casez_literals))
+
+# Compressed instructions. The compression meta file pairs each compressed
+# instruction with the instruction it expands to, optionally followed by
+# constraints on the compressed operands (e.g. crd!=0) that the encoding
+# needs to be valid. The operands of the expansion come from the
+# compressed operands with these roles, or are implied by the instruction.
+
+# the 32 bit register operands each compressed register operand supplies;
+# the three bit ones (ending in q) name x8-x15 or f8-f15
+compressed_reg_operands = {
+        'crd'     : ['rd'],
+        'crs1'    : ['rs1'],
+        'crs2'    : ['rs2'],
+        'crs1rd'  : ['rd', 'rs1'],
+        'crdq'    : ['rd'],
+        'crs1q'   : ['rs1'],
+        'crs2q'   : ['rs2'],
+        'crs1rdq' : ['rd', 'rs1'],
+        'cfrd'    : ['frd'],
+        'cfrdq'   : ['frd'],
+        'cfrs2'   : ['frs2'],
+        'cfrs2q'  : ['frs2']
+        }
+
+# registers that are implied by the compressed instruction; any other
+# register the expansion needs is x0
+compressed_implied_regs = {
+        'c.addi4spn' : {'rs1': 2},
+        'c.addi16sp' : {'rd': 2, 'rs1': 2},
+        'c.lwsp'     : {'rs1': 2},
+        'c.ldsp'     : {'rs1': 2},
+        'c.lqsp'     : {'rs1': 2},
+        'c.flwsp'    : {'rs1': 2},
+        'c.fldsp'    : {'rs1': 2},
+        'c.swsp'     : {'rs1': 2},
+        'c.sdsp'     : {'rs1': 2},
+        'c.sqsp'     : {'rs1': 2},
+        'c.fswsp'    : {'rs1': 2},
+        'c.fsdsp'    : {'rs1': 2},
+        'c.jal'      : {'rd': 1},
+        'c.jalr'     : {'rd': 1}
+        }
+
+def compressed_value_sources(operand):
+    # Where each bit of a compressed operand's value comes from, from bit 0
+    # up: ('h', n) for bit n of the halfword, or ('c', 0 or 1)
+    bit_map = operand.bit_map
+    width = max(bit_map) + 1
+    sources = [('h', bit_map[i]) if i in bit_map else ('c', 0) for i in range(width)]
+    if operand.name in compressed_reg_operands and width == 3:
+        sources = sources + [('c', 1), ('c', 0)]
+    return sources
+
+def compressed_operand_value(operand, halfword):
+    # The value of a compressed operand in halfword, as an integer
+    value = 0
+    for (i, bit) in operand.bit_map.items():
+        value |= ((halfword >> bit) & 1) << i
+    if operand.is_simm() and (value >> max(operand.bit_map)) & 1:
+        value -= 1 << (max(operand.bit_map) + 1)
+    if operand.name in compressed_reg_operands and max(operand.bit_map) == 2:
+        value += 8
+    return value
+
+def compressed_operand_roles(operands, c_name, c_args):
+    # Maps each operand of an expansion (rd, rs1, ..., or 'imm') to the
+    # compressed operand that supplies it, or to an implied register number
+    roles = dict(compressed_implied_regs.get(c_name, {}))
+    for arg in c_args:
+        if arg in compressed_reg_operands:
+            for role in compressed_reg_operands[arg]:
+                roles[role] = arg
+        elif operands[arg].is_imm():
+            roles['imm'] = arg
+        else:
+            assert False, 'unknown compressed operand %s in %s' % (arg, c_name)
+    return roles
+
+class CompressedExpansion:
+    # How one compressed instruction expands: the halfword pattern, the
+    # conditions the operands have to meet, and where each bit of the 32
+    # bit instruction comes from
+    def __init__(self, operands, c_inst, e_inst, constraints):
+        (c_name, c_bsv_val, c_args, c_extension) = c_inst
+        (e_name, e_bsv_val, e_args, e_extension) = e_inst
+        self.c_name = c_name
+        self.e_name = e_name
+        (match, mask) = bsv_val_to_match_mask(c_bsv_val)
+        assert mask >> 16 == 0, '%s is not a 16 bit instruction' % c_name
+        self.match = match
+        self.mask = mask
+        (e_match, e_mask) = bsv_val_to_match_mask(e_bsv_val)
+        self.sources = [('c', (e_match >> i) & 1) for i in range(32)]
+        # conditions are (value sources from bit 0 up, '!=' or '==', value)
+        self.conditions = []
+        self.roles = compressed_operand_roles(operands, c_name, c_args)
+
+        for constraint in constraints:
+            op = '!=' if '!=' in constraint else '=='
+            (arg, value) = constraint.split(op, 1)
+            assert arg in c_args, 'constraint %s on an operand %s does not have' % (constraint, c_name)
+            self.conditions.append((compressed_value_sources(operands[arg]), op, int(value, 0)))
+
+        for arg in e_args:
+            e_operand = operands[arg]
+            role = 'imm' if e_operand.is_imm() else arg
+            source = self.roles.get(role, 0)
+            if isinstance(source, int):
+                value_sources = [('c', (source >> i) & 1) for i in range(max(e_operand.bit_map) + 1)]
+            else:
+                c_operand = operands[source]
+                value_sources = compressed_value_sources(c_operand)
+                if e_operand.is_imm():
+                    e_top = max(e_operand.bit_map)
+                    if c_operand.is_simm():
+                        assert e_operand.is_simm() and len(value_sources) <= e_top + 1, '%s does not fit in %s' % (source, arg)
+                        value_sources = value_sources + [value_sources[-1]] * (e_top + 1 - len(value_sources))
+                    else:
+                        # the top bit of a signed immediate has to stay 0
+                        limit = e_top if e_operand.is_simm() else e_top + 1
+                        if len(value_sources) > limit:
+                            self.conditions.append((value_sources[limit:], '==', 0))
+                            value_sources = value_sources[:limit]
+                    dropped = [i for (i, x) in enumerate(value_sources) if x[0] == 'h' and i not in e_operand.bit_map]
+                    assert len(dropped) == 0, 'bits %s of %s have no place in %s' % (dropped, source, arg)
+            for (i, bit) in e_operand.bit_map.items():
+                self.sources[bit] = value_sources[i] if i < len(value_sources) else ('c', 0)
+
+    def matches(self, halfword):
+        if halfword & self.mask != self.match:
+            return False
+        for (sources, op, value) in self.conditions:
+            x = gather_sources(sources, halfword)
+            if (x == value) != (op == '=='):
+                return False
+        return True
+
+    def expand(self, halfword):
+        return gather_sources(self.sources, halfword)
+
+def gather_sources(sources, halfword):
+    # The value with bit i taken from sources[i]
+    value = 0
+    for (i, (kind, x)) in enumerate(sources):
+        if kind == 'c':
+            value |= x << i
+        else:
+            value |= ((halfword >> x) & 1) << i
+    return value
+
+def sources_expr(sources, var):
+    # A BSV / Verilog concatenation of sources (given from bit 0 up), msb
+    # first, merging runs of constants and of consecutive halfword bits
+    parts = []
+    for (kind, x) in reversed(sources):
+        if len(parts) > 0 and parts[-1][0] == kind and (kind == 'c' or parts[-1][2] == x + 1):
+            parts[-1] = (kind, parts[-1][1], x, parts[-1][3] + (str(x) if kind == 'c' else ''))
+        else:
+            parts.append((kind, x, x, str(x) if kind == 'c' else ''))
+    terms = []
+    for (kind, hi, lo, bits) in parts:
+        if kind == 'c':
+            terms.append("%d'b%s" % (len(bits), bits))
+        elif hi == lo:
+            terms.append('%s[%d]' % (var, hi))
+        else:
+            terms.append('%s[%d:%d]' % (var, hi, lo))
+    return terms[0] if len(terms) == 1 else '{' + ', '.join(terms) + '}'
+
+def expansion_condition(expansion, var):
+    # The condition for expansion to apply to var, as a BSV / Verilog
+    # expression
+    terms = ["(%s & 16'h%04x) == 16'h%04x" % (var, expansion.mask, expansion.match)]
+    for (sources, op, value) in expansion.conditions:
+        terms.append("%s %s %d'd%d" % (sources_expr(sources, var), op, len(sources), value))
+    return ' && '.join('(' + term + ')' for term in terms)
+
+class CompressedExpander:
+    # Python reference expander, built from the same expansions as the
+    # generated BSV and Verilog
+    def __init__(self, expansions):
+        self.expansions = expansions
+
+    def find(self, halfword):
+        # The expansion that applies to halfword, or None
+        for expansion in self.expansions:
+            if expansion.matches(halfword):
+                return expansion
+        return None
+
+    def expand(self, halfword):
+        # The 32 bit instruction halfword stands for, or None if it is
+        # reserved or not in the ISA
+        expansion = self.find(halfword)
+        return expansion.expand(halfword) if expansion is not None else None
+
+def check_compressed_expander(expander, operands, decoder, e_insts):
+    # Expands every halfword and checks that the 32 bit decoder decodes the
+    # result as the expected instruction, and that every operand of the
+    # result has the value of the compressed operand (or implied register)
+    # it comes from. Returns the number of halfwords that expand.
+    used = set()
+    count = 0
+    for halfword in range(1 << 16):
+        if halfword & 3 == 3:
+            continue
+        expansion = expander.find(halfword)
+        if expansion is None:
+            continue
+        count += 1
+        used.add(expansion.c_name)
+        inst = expansion.expand(halfword)
+        index = decoder.decode(inst)
+        assert index is not None and decoder.names[index] == expansion.e_name.replace('.', '_').upper(), \
+                '%s (%04x) expands to %08x, which does not decode as %s' % (expansion.c_name, halfword, inst, expansion.e_name)
+        for arg in e_insts[expansion.e_name][2]:
+            e_operand = operands[arg]
+            source = expansion.roles.get('imm' if e_operand.is_imm() else arg, 0)
+            expected = source if isinstance(source, int) else compressed_operand_value(operands[source], halfword)
+            actual = 0
+            for (i, bit) in e_operand.bit_map.items():
+                actual |= ((inst >> bit) & 1) << i
+            if e_operand.is_simm() and (actual >> max(e_operand.bit_map)) & 1:
+                actual -= 1 << (max(e_operand.bit_map) + 1)
+            assert actual == expected, '%s (%04x) expands to %08x with %s = %d instead of %d' % (expansion.c_name, halfword, inst, arg, actual, expected)
+    unused = [expansion.c_name for expansion in expander.expansions if expansion.c_name not in used]
+    assert len(unused) == 0, 'compressed instructions shadowed by earlier ones: %s' % ', '.join(unused)
+    return count
+
+# All the files in riscv-meta/meta
+meta_files = ['codecs', 'compression', 'constraints', 'csrs', 'enums',
+        'extensions', 'formats', 'glossary', 'notation',
+        'opcode-descriptions', 'opcode-fullnames',
+        'opcode-pseudocode-alt', 'opcode-pseudocode-c', 'opcodes',
+        'operands', 'pseudos', 'registers', 'types']
+
+# The meta files the parsed model in RiscvMeta depends on
+parsed_meta_files = ['codecs', 'csrs', 'opcodes', 'operands']
+
+class LazyMetaFiles:
+    # Dictionary-like access to the meta files that only reads and tokenizes
+    # a file the first time it is used
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+
+    def __getitem__(self, name):
+        assert name in meta_files, 'unknown meta file %s' % name
+        if name not in self.files:
+            self.files[name] = read_file(os.path.join(self.path, name))
+        return self.files[name]
+
 class RiscvMeta:
-    def __init__(self, path, base, extension_letters):
+    def __init__(self, path, base, extension_letters, cache_dir = None):
         # path should point to something like path/to/riscv-meta/meta
-        meta_files = ['codecs', 'compression', 'constraints', 'csrs', 'enums',
-                'extensions', 'formats', 'glossary', 'notation',
-                'opcode-descriptions', 'opcode-fullnames',
-                'opcode-pseudocode-alt', 'opcode-pseudocode-c', 'opcodes',
-                'operands', 'pseudos', 'registers', 'types']
         self.riscv_meta_dir = path
-        self.meta = {}
-        for f in meta_files:
-            self.meta[f] = read_file(os.path.join(self.riscv_meta_dir, f))
-
-        ## TODO: make these inputs for this script
+        self.meta = LazyMetaFiles(path)
+
+        # the parsed model is cached in cache_dir (if given), keyed by the
+        # contents of the meta files it depends on
+        cache_file = None
+        cached = None
+        if cache_dir is not None:
+            cache_file = os.path.join(cache_dir, self.cache_key() + '.json')
+            if os.path.isfile(cache_file):
+                with open(cache_file, 'r') as f:
+                    cached = json.load(f)
+
+        if cached is not None:
+            self.operands = {}
+            for operand_row in cached['operands']:
+                new_operand = RiscvOperand(operand_row)
+                self.operands[new_operand.name] = new_operand
+            self.insts = [tuple(inst) for inst in cached['insts']]
+            self.csrs = [tuple(csr) for csr in cached['csrs']]
+        else:
+            # must parse operands before parsing instructions
+            self.operands = self.parse_operands()
+            self.insts = self.parse_instructions()
+            self.csrs = self.parse_csrs()
+            if cache_file is not None:
+                self.write_cache(cache_file)
+
+        self.select_extensions(base, extension_letters)
+
+    def select_extensions(self, base, extension_letters):
+        self.base = base
+        self.extension_letters = extension_letters
         self.extensions = [base + ext for ext in extension_letters]
 
-        # must parse operands before parsing instructions
-        self.operands = self.parse_operands()
-        self.insts = self.parse_instructions()
+        # whether each instruction is in one of the selected extensions,
+        # computed once here instead of in every emitter
+        extensions = set(self.extensions)
+        self.selected = [not extensions.isdisjoint(inst[3]) for inst in self.insts]
+        # overlapping decoder patterns, found by check_overlaps
+        self.overlaps = None
+        # minimized decoder outputs, found by minimize_decoder
+        self.minimized = None
+        # compressed instruction expander, built by get_compressed_expander
+        self.compressed_expander = None
 
         # reduce known operands
         self.used_operands = {}
@@ -235,6 +1032,39 @@ class RiscvMeta:
 
         print('extensions = ' + str(self.extensions))
 
+    def for_extensions(self, base, extension_letters):
+        # Returns a copy of this RiscvMeta configured for a different ISA
+        # variant. The parsed tables are shared, not re-parsed.
+        rvmeta = copy.copy(self)
+        rvmeta.select_extensions(base, extension_letters)
+        return rvmeta
+
+    def cache_key(self):
+        # hash of this script and the meta files. The parsed model doesn't
+        # depend on the base or extensions, so one cache entry serves every
+        # configuration.
+        h = hashlib.sha1()
+        with open(os.path.abspath(__file__), 'rb') as f:
+            h.update(f.read())
+        for name in parsed_meta_files:
+            h.update(name.encode())
+            with open(os.path.join(self.riscv_meta_dir, name), 'rb') as f:
+                h.update(f.read())
+        return h.hexdigest()
+
+    def write_cache(self, cache_file):
+        cached = {
+                'operands' : self.meta['operands'],
+                'insts'    : self.insts,
+                'csrs'     : self.csrs
+                }
+        os.makedirs(os.path.dirname(cache_file), exist_ok = True)
+        # write then rename so concurrent runs never see a partial file
+        tmp_file = '%s.%d' % (cache_file, os.getpid())
+        with open(tmp_file, 'w') as f:
+            json.dump(cached, f)
+        os.replace(tmp_file, cache_file)
+
     def parse_operands(self):
         operands = {}
         for operand_row in self.meta['operands']:
@@ -315,13 +1145,132 @@ class RiscvMeta:
             csrvalue = csrline[0].lower()
             assert(csrvalue[0:2] == '0x')
             csrvalue = "12'h" + csrvalue[2:].lower()
-            csrs.append( (csrname, csrvalue) )
+            # access is the lowest privilege level and whether the CSR is
+            # read-only, e.g. urw or mro
+            csraccess = csrline[1].lower()
+            assert csraccess[0] in csr_privileges and csraccess[1:] in ['rw', 'ro'], 'unknown access %s for CSR %s' % (csrline[1], csrname)
+            csrs.append( (csrname, csrvalue, csraccess) )
         return csrs
 
-    def print_bsv_decoder(self, filename):
-        decoder = '/* Automatically generated by meta-parse.py */\n'
-        decoder = decoder + license
-        decoder = decoder + '''
+    def get_decoder_entries(self):
+        # (macro_name, match, mask, inst_types) for each selected instruction
+        # in the order used by the casez decoders
+        entries = []
+        for ((inst_name, bsv_val, inst_args, inst_extension), selected) in zip(self.insts, self.selected):
+            if selected:
+                macro_name = inst_name.replace('.','_').upper()
+                (match, mask) = bsv_val_to_match_mask(bsv_val)
+                entries.append((macro_name, match, mask, get_inst_types(inst_args)))
+        return entries
+
+    def get_decoder(self):
+        # reusable Python decoder for the selected instructions
+        return InstDecoder(self.get_decoder_entries())
+
+    def check_overlaps(self, entries):
+        # Reports any overlapping decoder patterns among entries (the
+        # selected instructions). Returns True if there are none, i.e. the
+        # decoders don't need priority logic.
+        if self.overlaps is None:
+            self.overlaps = find_overlaps(entries)
+            if len(self.overlaps) > 0:
+                print('%d overlapping decoder patterns in %s:' % (len(self.overlaps), str(self.extensions)))
+                print_overlaps(entries, self.overlaps)
+        return len(self.overlaps) == 0
+
+    def minimize_decoder(self, entries):
+        # Returns minimize_inst_type(entries) and reports the size of each
+        # output bit the first time it is called.
+        if self.minimized is None:
+            self.minimized = minimize_inst_type(entries)
+            print('minimized decoder for %s:' % str(self.extensions))
+            print_sop_report(self.minimized)
+        return self.minimized
+
+    def get_compressed_expander(self):
+        # Returns a CompressedExpander for the selected compressed
+        # instructions whose expansions are also selected, and checks it the
+        # first time it is called
+        if self.compressed_expander is None:
+            e_insts = {}
+            for (inst, selected) in zip(self.insts, self.selected):
+                if selected and inst[0] not in e_insts:
+                    e_insts[inst[0]] = inst
+            expansions = []
+            for row in self.meta['compression']:
+                (c_name, e_name, constraints) = (row[0], row[1], row[2:])
+                if c_name in e_insts and e_name in e_insts:
+                    expansions.append(CompressedExpansion(self.operands, e_insts[c_name], e_insts[e_name], constraints))
+            self.compressed_expander = CompressedExpander(expansions)
+            count = check_compressed_expander(self.compressed_expander, self.operands, self.get_decoder(), e_insts)
+            print('compressed expander for %s: %d instructions, %d of %d halfwords expand, checked against the 32 bit decoder' % (str(self.extensions), len(expansions), count, 3 << 14))
+        return self.compressed_expander
+
+    def emit(self, emitters):
+        # Generates every emitter's output from a single pass over the
+        # instructions
+        for emitter in emitters:
+            emitter.begin()
+        for ((inst_name, bsv_val, inst_args, inst_extension), selected) in zip(self.insts, self.selected):
+            macro_name = inst_name.replace('.','_').upper()
+            inst_types = get_inst_types(inst_args)
+            for emitter in emitters:
+                emitter.inst(macro_name, bsv_val, inst_args, inst_types, selected)
+        for emitter in emitters:
+            emitter.end()
+            write_file(emitter.filename, emitter.out.getvalue())
+
+    def print_bsv_decoder(self, filename, decode_tree=False, parallel_case=False, minimize=False):
+        self.emit([BsvDecoderEmitter(self, filename, decode_tree, parallel_case, minimize)])
+
+    def print_verilog_decoder(self, filename, decode_tree=False, parallel_case=False, minimize=False):
+        self.emit([VerilogDecoderEmitter(self, filename, decode_tree, parallel_case, minimize)])
+
+    def print_macro_definitions(self, filename):
+        self.emit([MacroDefinitionsEmitter(self, filename)])
+
+    def print_csr_stub(self, filename):
+        self.emit([CsrStubEmitter(self, filename)])
+
+    def print_imm_stub(self, filename):
+        self.emit([ImmStubEmitter(self, filename)])
+
+    def print_cpp_decoder(self, filename):
+        self.emit([CppDecoderEmitter(self, filename)])
+
+class Emitter:
+    # Base class for the generated outputs. RiscvMeta.emit calls begin(),
+    # then inst() for every parsed instruction (selected or not), then end(),
+    # and finally writes out if the contents changed.
+    def __init__(self, rvmeta, filename):
+        self.rvmeta = rvmeta
+        self.filename = filename
+        self.out = io.StringIO()
+
+    def begin(self):
+        pass
+
+    def inst(self, macro_name, bsv_val, inst_args, inst_types, selected):
+        pass
+
+    def end(self):
+        pass
+
+class BsvDecoderEmitter(Emitter):
+    def __init__(self, rvmeta, filename, decode_tree, parallel_case = False, minimize = False):
+        Emitter.__init__(self, rvmeta, filename)
+        self.decode_tree = decode_tree
+        # parallel_case generates a priority-free flat decoder if none of the
+        # selected instructions overlap
+        self.parallel_case = parallel_case and not decode_tree
+        # minimize generates a two-level sum of products for each output bit
+        self.minimize = minimize and not decode_tree
+        self.entries = []
+
+    def begin(self):
+        self.out.write('/* Automatically generated by meta-parse.py */\n')
+        self.out.write(license)
+        self.out.write('''
 `include "Opcodes.defines"
 import RVTypes::*;
 
@@ -337,33 +1286,61 @@ function InstType toInstType(Instruction inst);
     Maybe#(RegType) i = tagged Valid Gpr;
     Maybe#(RegType) f = tagged Valid Fpu;
     Maybe#(RegType) n = tagged Invalid;
-    InstType ret = (case (inst) matches
-'''
-
-        defined_macros = []
-        skipped_macros = []
-        for (inst_name, bsv_val, inst_args, inst_extension) in self.insts:
-            macro_name = inst_name.replace('.','_').upper()
-            (rd, rs1, rs2, rs3, imm) = get_inst_types(inst_args)
-            if functools.reduce( lambda x, y: x or y, [x == y for x in inst_extension for y in self.extensions] ):
-                decoder = decoder + '            %-16sInstType{rs1: %s, rs2: %s, rs3: %s, dst: %s, imm: %-4s};\n' % ('`' + macro_name + ':',rs1,rs2,rs3,rd,imm)
-            else:
-                skipped_macros.append(macro_name)
-        decoder = decoder + '''            default:        ?;
+''')
+
+    def inst(self, macro_name, bsv_val, inst_args, inst_types, selected):
+        if not selected:
+            return
+        # the decode tree and overlap analysis need every instruction
+        # before anything can be written
+        (match, mask) = bsv_val_to_match_mask(bsv_val)
+        self.entries.append((macro_name, match, mask, inst_types))
+
+    def end(self):
+        if self.decode_tree:
+            tree = DecodeTreeNode(self.entries)
+            check_decode_tree(tree, self.entries)
+            self.out.write('    InstType ret = ' + tree.to_bsv(8) + ';\n')
+        elif self.minimize:
+            self.out.write('    Bit#(SizeOf#(InstType)) ret_bits = 0;\n')
+            minimized = self.rvmeta.minimize_decoder(self.entries)
+            for (bit, (name, (cover, casez_literals))) in enumerate(zip(inst_type_bit_names, minimized)):
+                self.out.write('    // %s: %s\n' % (name, sop_summary(cover)))
+                self.out.write('    ret_bits[%d] = %s;\n' % (len(minimized) - 1 - bit, sop_expr(cover, 'inst', 8)))
+            self.out.write('    InstType ret = unpack(ret_bits);\n')
+        elif self.parallel_case and self.rvmeta.check_overlaps(self.entries):
+            # at most one pattern matches, so OR together one-hot terms
+            # instead of building a priority chain
+            self.out.write('    Bit#(SizeOf#(InstType)) ret_bits = 0;\n')
+            for (macro_name, match, mask, inst_types) in self.entries:
+                self.out.write('    if (inst matches %-16s ret_bits = ret_bits | pack(%s);\n' % ('`' + macro_name + ')', bsv_inst_type(inst_types)))
+            self.out.write('    InstType ret = unpack(ret_bits);\n')
+        else:
+            self.out.write('    InstType ret = (case (inst) matches\n')
+            for (macro_name, match, mask, inst_types) in self.entries:
+                self.out.write('            %-16s%s;\n' % ('`' + macro_name + ':', bsv_inst_type(inst_types)))
+            self.out.write('''            default:        ?;
         endcase);
-    if ((ret.dst == tagged Valid Gpr) && (getInstFields(inst).rd == 0)) begin
+''')
+        self.out.write('''    if ((ret.dst == tagged Valid Gpr) && (getInstFields(inst).rd == 0)) begin
         ret.dst = tagged Invalid;
     end
     return ret;
 endfunction
-'''
-        with open(filename, 'w') as f:
-            f.write(decoder)
-
-    def print_verilog_decoder(self, filename):
-        verilog_decoder = '/* Automatically generated by meta-parse.py */\n'
-        verilog_decoder = verilog_decoder + license
-        verilog_decoder = verilog_decoder + '''
+''')
+
+class VerilogDecoderEmitter(Emitter):
+    def __init__(self, rvmeta, filename, decode_tree, parallel_case = False, minimize = False):
+        Emitter.__init__(self, rvmeta, filename)
+        self.decode_tree = decode_tree
+        self.parallel_case = parallel_case and not decode_tree
+        self.minimize = minimize and not decode_tree
+        self.entries = []
+
+    def begin(self):
+        self.out.write('/* Automatically generated by meta-parse.py */\n')
+        self.out.write(license)
+        self.out.write('''
 module toInstType_verilog (in, out);
     input [31:0] in;
     output [10:0] out;
@@ -396,26 +1373,36 @@ module toInstType_verilog (in, out);
     assign Z    = 3'b110;
 
     always @ (in)
-        casez (in)
-'''
-
-        for (inst_name, bsv_val, inst_args, inst_extension) in self.insts:
-            macro_name = inst_name.replace('.','_').upper()
-            (rd, rs1, rs2, rs3, imm) = get_inst_types(inst_args)
-            if functools.reduce( lambda x, y: x or y, [x == y for x in inst_extension for y in self.extensions] ):
-                # verilog generation
-                if rs1 == 'n':
-                    rs1 = "2'b0x"
-                if rs2 == 'n':
-                    rs2 = "2'b0x"
-                if rs3 == 'n':
-                    rs3 = "2'b0x"
-                if rd == 'n':
-                    rd = "2'b0x"
-                verilog_decoder = verilog_decoder + '            %s: out_tmp = {%s, %s, %s, %s, %s};\n' % (bsv_val,rs1,rs2,rs3,rd,imm)
-        verilog_decoder = verilog_decoder + '''            default: out_tmp = 11'bxxxxxxxxxxx;
+''')
+
+    def inst(self, macro_name, bsv_val, inst_args, inst_types, selected):
+        if not selected:
+            return
+        (match, mask) = bsv_val_to_match_mask(bsv_val)
+        self.entries.append((macro_name, match, mask, inst_types))
+
+    def end(self):
+        if self.decode_tree:
+            tree = DecodeTreeNode(self.entries)
+            check_decode_tree(tree, self.entries)
+            self.out.write(tree.to_verilog(8))
+        elif self.minimize:
+            self.out.write('    begin\n')
+            minimized = self.rvmeta.minimize_decoder(self.entries)
+            for (bit, (name, (cover, casez_literals))) in enumerate(zip(inst_type_bit_names, minimized)):
+                self.out.write('        // %s: %s\n' % (name, sop_summary(cover)))
+                self.out.write('        out_tmp[%d] = %s;\n' % (len(minimized) - 1 - bit, sop_expr(cover, 'in', 12)))
+            self.out.write('    end\n')
+        else:
+            if self.parallel_case and self.rvmeta.check_overlaps(self.entries):
+                self.out.write('        (* parallel_case *)\n')
+            self.out.write('        casez (in)\n')
+            for (macro_name, match, mask, inst_types) in self.entries:
+                self.out.write('            %s: out_tmp = %s;\n' % (bsv_match_mask_val(match, mask, 32), verilog_inst_type(inst_types)))
+            self.out.write('''            default: out_tmp = 11'bxxxxxxxxxxx;
         endcase
-
+''')
+        self.out.write('''
     always @ (in or out_tmp)
         if ((out_tmp[4:3] == 2'b10) && (in[11:7] == 5'b00000))
             out = out_tmp & 11'b11111100111;
@@ -423,113 +1410,567 @@ module toInstType_verilog (in, out);
             out = out_tmp;
 
 endmodule
-'''
-        with open(filename, 'w') as f:
-            f.write(verilog_decoder)
-
-    def print_macro_definitions(self, filename):
-        macro_definitions = '/* Automatically generated by meta-parse.py */\n'
-        macro_definitions = macro_definitions + license + '\n'
-
-        defined_macros = []
-        skipped_macros = []
-        for (inst_name, bsv_val, inst_args, inst_extension) in self.insts:
-            macro_name = inst_name.replace('.','_').upper()
-            (rd, rs1, rs2, rs3, imm) = get_inst_types(inst_args)
-            if functools.reduce( lambda x, y: x or y, [x == y for x in inst_extension for y in self.extensions] ):
-                macro_definitions = macro_definitions + '`define %-18s %s\n' % (macro_name, bsv_val)
-            else:
-                skipped_macros.append(macro_name)
-
-        macro_definitions = macro_definitions + '\n// unused macros\n'
-        # finish up macro definitions
-        for (inst_name, bsv_val, inst_args, inst_extension) in self.insts:
-            macro_name = inst_name.replace('.','_').upper()
-            if (macro_name in skipped_macros) and (macro_name not in defined_macros):
-                macro_definitions = macro_definitions + '`define %-18s %s\n' % (macro_name, bsv_val)
-                defined_macros.append(macro_name)
-
-        with open(filename, 'w') as f:
-            f.write(macro_definitions)
-
-    def print_csr_stub(self, filename):
-        csrs = self.parse_csrs()
-        csrenum = '/* Automatically generated by meta-parse.py */\n'
-        csrenum = csrenum + 'typedef enum {\n'
-        first = True
-        for (csrname, csrvalue) in csrs:
-            if not first:
-                csrenum = csrenum + ',\n'
-            else:
-                first = False
-            csrenum = csrenum + '    CSR%-16s = %s' % (csrname, csrvalue)
-        csrenum = csrenum + '\n} CSR deriving (Bits, Eq, FShow);\n'
-        csrenum = csrenum + '\n'
-        csrenum = csrenum + 'function Bool isValidCSR(CSR csr);\n'
-        csrenum = csrenum + '    return (case (csr)\n'
-        for (csrname, csrvalue) in csrs:
-            csrenum = csrenum + '            CSR%-20s True;\n' % (csrname + ':')
-        csrenum = csrenum + '            default:                False;\n'
-        csrenum = csrenum + '        endcase);\n'
-        csrenum = csrenum + 'endfunction'
-        csrenum = csrenum + '\n'
-        csrenum = csrenum + 'function Reg#(Data) getCSR(CSR csr);\n'
-        csrenum = csrenum + '    return (case (csr)\n'
-        for (csrname, csrvalue) in csrs:
-            csrenum = csrenum + '            CSR%-20s %s;\n' % (csrname + ':', csrname + '_csr')
-        csrenum = csrenum + '            default:                ?;\n'
-        csrenum = csrenum + '        endcase);\n'
-        csrenum = csrenum + 'endfunction'
-        with open(filename, 'w') as f:
-            f.write(csrenum)
-
-    def print_imm_stub(self, filename):
-        # Find unique encodings
-        imm_encodings = {}
-        for operand in self.used_operands:
-            if self.operands[operand].is_imm():
-                if self.operands[operand].inst_bit_string in imm_encodings:
-                    imm_encodings[self.operands[operand].inst_bit_string] += [operand]
+''')
+
+class MacroDefinitionsEmitter(Emitter):
+    def __init__(self, rvmeta, filename):
+        Emitter.__init__(self, rvmeta, filename)
+        # first bsv_val seen for each macro name, in order
+        self.first_bsv_val = {}
+        self.skipped_macros = set()
+
+    def begin(self):
+        self.out.write('/* Automatically generated by meta-parse.py */\n')
+        self.out.write(license + '\n')
+
+    def inst(self, macro_name, bsv_val, inst_args, inst_types, selected):
+        if macro_name not in self.first_bsv_val:
+            self.first_bsv_val[macro_name] = bsv_val
+        if selected:
+            self.out.write('`define %-18s %s\n' % (macro_name, bsv_val))
+        else:
+            self.skipped_macros.add(macro_name)
+
+    def end(self):
+        self.out.write('\n// unused macros\n')
+        for macro_name in self.first_bsv_val:
+            if macro_name in self.skipped_macros:
+                self.out.write('`define %-18s %s\n' % (macro_name, self.first_bsv_val[macro_name]))
+
+# The privilege levels in the access column of riscv-meta/meta/csrs
+csr_privileges = {'u': 0, 's': 1, 'h': 2, 'm': 3}
+
+def csr_address(csrvalue):
+    # 12'h105 -> 0x105
+    return int(csrvalue.split("'h", 1)[1], 16)
+
+def csr_access_allowed(csraccess, prv, write):
+    return prv >= csr_privileges[csraccess[0]] and (not write or csraccess[1:] != 'ro')
+
+def csr_access_check(csrs):
+    # Minimizes whether a CSR access is legal as a single sum of products
+    # over {address, prv, write}: the address has to be one of csrs, prv at
+    # least the CSR's privilege level, and a write needs a read-write CSR.
+    # Returns the cover.
+    full = (1 << 15) - 1
+    on_set = []
+    off_set = [(0, 0)]
+    for (csrname, csrvalue, csraccess) in csrs:
+        address = csr_address(csrvalue)
+        off_set = cover_sharp(off_set, (address << 3, full & ~7))
+        for prv in range(4):
+            for write in [0, 1]:
+                cube = ((address << 3) | (prv << 1) | write, full)
+                if csr_access_allowed(csraccess, prv, write):
+                    on_set.append(cube)
                 else:
-                    imm_encodings[self.operands[operand].inst_bit_string] = [operand]
-
-        keys = list(imm_encodings.keys())
-        keys.sort(key = lambda x: x[::-1])
-        for x in keys:
-            print("%-24s %s" % (str(imm_encodings[x]), x))
+                    off_set.append(cube)
+    return minimize_sop(on_set, off_set)
+
+class CsrStubEmitter(Emitter):
+    def end(self):
+        csrs = self.rvmeta.csrs
+        self.out.write('/* Automatically generated by meta-parse.py */\n')
+        self.out.write('typedef enum {\n')
+        self.out.write(',\n'.join(['    CSR%-16s = %s' % (csrname, csrvalue) for (csrname, csrvalue, csraccess) in csrs]))
+        self.out.write('\n} CSR deriving (Bits, Eq, FShow);\n')
+        self.out.write('\n')
+
+        # the valid addresses, decoded from the address bits
+        valid = [(csr_address(csrvalue), 0xfff) for (csrname, csrvalue, csraccess) in csrs]
+        valid_cover = minimize_sop(valid, functools.reduce(cover_sharp, valid, [(0, 0)]))
+        self.out.write('function Bool isValidCSR(CSR csr);\n')
+        self.out.write('    Bit#(12) csr_index = pack(csr);\n')
+        self.out.write('    // %s\n' % sop_summary(valid_cover))
+        self.out.write('    return unpack(%s);\n' % sop_expr(valid_cover, 'csr_index', 18))
+        self.out.write('endfunction\n')
+        self.out.write('\n')
+
+        # the architectural address bits give the privilege level ([9:8])
+        # and read-only CSRs ([11:10] == 2'b11); only CSRs that riscv-meta
+        # lists with a different access need a case of their own
+        exceptions = []
+        for (csrname, csrvalue, csraccess) in csrs:
+            address = csr_address(csrvalue)
+            if (csr_privileges[csraccess[0]] != (address >> 8) & 3) or ((csraccess[1:] == 'ro') != (address >> 10 == 3)):
+                exceptions.append((csrname, csraccess))
+        self.out.write('function Bool hasCSRPermission(CSR csr, Bit#(2) prv, Bool write);\n')
+        self.out.write('    Bit#(12) csr_index = pack(csr);\n')
+        if len(exceptions) > 0:
+            self.out.write('    return (case (csr)\n')
+            for (csrname, csraccess) in exceptions:
+                self.out.write('            CSR%-20s ((prv >= %d) && %s);\n' % (csrname + ':', csr_privileges[csraccess[0]], '!write' if csraccess[1:] == 'ro' else 'True'))
+            self.out.write("            default:                ((prv >= csr_index[9:8]) && (!write || (csr_index[11:10] != 2'b11)));\n")
+            self.out.write('        endcase);\n')
+        else:
+            self.out.write("    return ((prv >= csr_index[9:8]) && (!write || (csr_index[11:10] != 2'b11)));\n")
+        self.out.write('endfunction\n')
+        self.out.write('\n')
+
+        # isValidCSR and hasCSRPermission in one level of logic, for the
+        # CSR instruction check
+        access_cover = csr_access_check(csrs)
+        self.out.write('function Bool isAccessibleCSR(CSR csr, Bit#(2) prv, Bool write);\n')
+        self.out.write('    Bit#(15) access = {pack(csr), prv, pack(write)};\n')
+        self.out.write('    // %s\n' % sop_summary(access_cover))
+        self.out.write('    return unpack(%s);\n' % sop_expr(access_cover, 'access', 18))
+        self.out.write('endfunction\n')
+        self.out.write('\n')
+        print('CSR checks for %s: valid %s; valid and permitted %s; %d CSRs with non-architectural access' % (str(self.rvmeta.extensions),
+                sop_summary(valid_cover), sop_summary(access_cover), len(exceptions)))
+
+        self.out.write('function Reg#(Data) getCSR(CSR csr);\n')
+        self.out.write('    return (case (csr)\n')
+        for (csrname, csrvalue, csraccess) in csrs:
+            self.out.write('            CSR%-20s %s;\n' % (csrname + ':', csrname + '_csr'))
+        self.out.write('            default:                ?;\n')
+        self.out.write('        endcase);\n')
+        self.out.write('endfunction')
+
+def xlen(base):
+    # Width of Data, which getImm produces, for rv32, rv64 or rv128
+    return int(base[2:])
+
+def imm_bit_sources(operand, width):
+    # The instruction bit each bit of the immediate extended to width bits
+    # comes from, or None for a constant 0
+    bit_map = operand.bit_map
+    top = max(bit_map)
+    sources = []
+    for i in range(width):
+        if i in bit_map:
+            sources.append(bit_map[i])
+        elif i > top and operand.is_simm():
+            sources.append(bit_map[top])
+        else:
+            sources.append(None)
+    return tuple(sources)
+
+def imm_slices(encodings, width):
+    # Splits the width immediate bits into the fewest ranges [lo, hi] where
+    # every encoding is a single extractor: a constant 0, a slice of the
+    # instruction, or one instruction bit repeated (sign extension). Returns
+    # [(hi, lo)] from the top bit down.
+    def kind(sources):
+        if sources[0] is None:
+            return 'zero' if all(x is None for x in sources) else None
+        if len(sources) == 1:
+            return 'bit'
+        if all(x == sources[0] for x in sources):
+            return 'repeat'
+        if all(x == sources[0] + i for (i, x) in enumerate(sources)):
+            return 'slice'
+        return None
+    ranges = []
+    lo = 0
+    for hi in range(1, width + 1):
+        if hi == width or any(kind(sources[lo:hi + 1]) is None for sources in encodings):
+            ranges.append((hi - 1, lo))
+            lo = hi
+    return ranges[::-1]
+
+def imm_extractor(sources, hi, lo):
+    # BSV for bits [hi:lo] of an immediate, or None for a constant 0
+    first = sources[lo]
+    last = sources[hi]
+    if first is None:
+        return None
+    elif hi != lo and first == last:
+        return 'signExtend(inst[%d])' % first
+    elif first == last:
+        return 'inst[%d]' % first
+    return 'inst[%d:%d]' % (last, first)
+
+class ImmStubEmitter(Emitter):
+    # getImm has one case per distinct immediate encoding rather than one
+    # per operand, and builds the immediate from shared slice muxes: the
+    # bits that several encodings take from the same instruction bits (e.g.
+    # inst[30:25] for I, S and SB) only go through the mux once. The
+    # encoding of each instruction comes from its own toImmType rather than
+    # the imm field of toInstType, since that is RVTypes' ImmType, packed
+    # with imm_type_codes by every decoder generator and the Verilog one.
+    def __init__(self, rvmeta, filename):
+        Emitter.__init__(self, rvmeta, filename)
+        # (macro_name, immediate operand) of each selected instruction
+        self.inst_imms = []
+
+    def inst(self, macro_name, bsv_val, inst_args, inst_types, selected):
+        if not selected:
+            return
+        operands = self.rvmeta.operands
+        imm_args = [arg for arg in inst_args if operands[arg].is_imm()]
+        # same priority as get_inst_types, for instructions with several
+        imm_args.sort(key = lambda arg: list(imm_mapping).index(arg) if arg in imm_mapping else len(imm_mapping))
+        if len(imm_args) > 0:
+            self.inst_imms.append((macro_name, imm_args[0]))
+
+    def end(self):
+        operands = self.rvmeta.operands
+        imm_operands = [operand for operand in self.rvmeta.used_operands if operands[operand].is_imm()]
+        width = xlen(self.rvmeta.base)
+
+        # Find unique encodings, in the order of their first operand
+        imm_encodings = {}
+        for operand in imm_operands:
+            sources = imm_bit_sources(operands[operand], width)
+            if sources in imm_encodings:
+                imm_encodings[sources].append(operand)
+            else:
+                imm_encodings[sources] = [operand]
+        encoding_names = dict((sources, 'IMM_' + '_'.join(group).upper()) for (sources, group) in imm_encodings.items())
+        operand_encodings = dict((operand, encoding_names[sources]) for (sources, group) in imm_encodings.items() for operand in group)
+        slices = imm_slices(list(imm_encodings), width)
+
+        # mux inputs: immediate bits that aren't constant 0, counted once per
+        # case arm that can select them
+        inputs_before = sum(len([x for x in imm_bit_sources(operands[operand], width) if x is not None]) for operand in imm_operands)
+        inputs_after = 0
+        for (hi, lo) in slices:
+            extractors = set(imm_extractor(sources, hi, lo) for sources in imm_encodings)
+            inputs_after += (hi - lo + 1) * len(extractors - {None})
+        print('immediate encodings for %s:' % str(self.rvmeta.extensions))
+        for (sources, group) in imm_encodings.items():
+            print('    %-24s %s' % (encoding_names[sources], ', '.join(group)))
+        print('getImm: %d operands -> %d encodings, %d -> %d mux bit inputs in %d slices' % (len(imm_operands), len(imm_encodings), inputs_before, inputs_after, len(slices)))
 
         # Immediate type enumeration
-        imm_stub = 'typedef enum {\n'
-        imm_stub += '    IMM_NONE'
-        for operand in self.used_operands:
-            if self.operands[operand].is_imm():
-                imm_stub += ',\n    IMM_%s' % operand.upper()
-        imm_stub += '\n} ImmType deriving (Bits, Eq, FShow);\n\n'
+        self.out.write('typedef enum {\n')
+        self.out.write('    IMM_NONE,\n')
+        for (i, (sources, group)) in enumerate(imm_encodings.items()):
+            separator = ',' if i < len(imm_encodings) - 1 else ''
+            self.out.write('    %-24s// %s\n' % (encoding_names[sources] + separator, ', '.join(group)))
+        self.out.write('} ImmType deriving (Bits, Eq, FShow);\n\n')
+
+        # Immediate encoding of each instruction
+        self.out.write('function ImmType toImmType(Instruction inst);\n')
+        self.out.write('    return (case (inst) matches\n')
+        for (macro_name, operand) in self.inst_imms:
+            self.out.write('            %-16s%s;\n' % ('`' + macro_name + ':', operand_encodings[operand]))
+        self.out.write('            default:        IMM_NONE;\n')
+        self.out.write('        endcase);\n')
+        self.out.write('endfunction\n\n')
 
         # Immediate decoding function
-        imm_stub += 'function Maybe#(Data) getImm(Bit#(32) inst, ImmType immType);\n'
-        imm_stub += '    return (case (immType)\n'
-        for operand in self.used_operands:
-            if self.operands[operand].is_imm():
-                imm_stub += '            IMM_%s: tagged Valid %s;\n' % (operand.upper(), self.operands[operand].inst_bit_string)
-        imm_stub += '            default: tagged Invalid;\n'
-        imm_stub += '        endcase);\n'
-        imm_stub += 'endfunction\n'
-        with open(filename, 'w') as f:
-            f.write(imm_stub)
-
+        self.out.write('function Maybe#(Data) getImm(Bit#(32) inst, ImmType immType);\n')
+        for (hi, lo) in slices:
+            # encodings that use the same extractor share a case arm
+            arms = {}
+            for (sources, name) in encoding_names.items():
+                extractor = imm_extractor(sources, hi, lo)
+                if extractor is not None:
+                    arms.setdefault(extractor, []).append(name)
+            self.out.write('    Bit#(%d) imm_%d_%d = (case (immType)\n' % (hi - lo + 1, hi, lo))
+            for (extractor, names) in arms.items():
+                self.out.write('            %s: %s;\n' % (', '.join(names), extractor))
+            self.out.write('            default: 0;\n')
+            self.out.write('        endcase);\n')
+        self.out.write('    return (immType == IMM_NONE) ? tagged Invalid : tagged Valid {%s};\n' % ', '.join('imm_%d_%d' % (hi, lo) for (hi, lo) in slices))
+        self.out.write('endfunction\n')
+
+class CompressedBsvEmitter(Emitter):
+    def end(self):
+        expander = self.rvmeta.get_compressed_expander()
+        self.out.write('/* Automatically generated by meta-parse.py */\n')
+        self.out.write(license)
+        self.out.write('''
+import RVTypes::*;
 
-if __name__ == '__main__':
-    riscv_meta_dir = '../riscv-meta/meta/'
-    ## TODO: make these inputs for this script
-    base = 'rv64'
-    extension_letters = 'imafds'
+// Returns the 32 bit instruction a compressed instruction stands for, or
+// Invalid if it is reserved or not in the ISA
+function Maybe#(Instruction) expandCompressed(Bit#(16) inst);
+    Maybe#(Instruction) ret = tagged Invalid;
+''')
+        for (i, expansion) in enumerate(expander.expansions):
+            self.out.write('    %sif (%s) begin\n' % ('' if i == 0 else 'end else ', expansion_condition(expansion, 'inst')))
+            self.out.write('        // %s -> %s\n' % (expansion.c_name, expansion.e_name))
+            self.out.write('        ret = tagged Valid %s;\n' % sources_expr(expansion.sources, 'inst'))
+        if len(expander.expansions) > 0:
+            self.out.write('    end\n')
+        self.out.write('''    return ret;
+endfunction
+''')
+
+class CompressedVerilogEmitter(Emitter):
+    def end(self):
+        expander = self.rvmeta.get_compressed_expander()
+        self.out.write('/* Automatically generated by meta-parse.py */\n')
+        self.out.write(license)
+        self.out.write('''
+module expandCompressed_verilog (in, out, valid);
+    input [15:0] in;
+    output [31:0] out;
+    output valid;
+
+    reg [31:0] out;
+    reg valid;
 
-    rvmeta = RiscvMeta(riscv_meta_dir, base, extension_letters)
+    always @ (in)
+''')
+        for (i, expansion) in enumerate(expander.expansions):
+            self.out.write('        %sif (%s) begin\n' % ('' if i == 0 else 'else ', expansion_condition(expansion, 'in')))
+            self.out.write('            // %s -> %s\n' % (expansion.c_name, expansion.e_name))
+            self.out.write("            out = %s;\n" % sources_expr(expansion.sources, 'in'))
+            self.out.write("            valid = 1'b1;\n")
+            self.out.write('        end\n')
+        self.out.write('''        %sbegin
+            out = 32'b0;
+            valid = 1'b0;
+        end
 
-    rvmeta.print_bsv_decoder('Opcodes.bsv')
-    rvmeta.print_verilog_decoder('toInstType_verilog.v')
-    rvmeta.print_macro_definitions('Opcodes.defines')
-    rvmeta.print_csr_stub('CSRs.stub.bsv')
-    rvmeta.print_imm_stub('Imm.stub.bsv')
+endmodule
+''' % ('else ' if len(expander.expansions) > 0 else ''))
+
+# Register names for the C++ disassembler, as Spike prints them
+xpr_abi_names = ['zero', 'ra', 'sp', 'gp', 'tp', 't0', 't1', 't2',
+        's0', 's1', 'a0', 'a1', 'a2', 'a3', 'a4', 'a5',
+        'a6', 'a7', 's2', 's3', 's4', 's5', 's6', 's7',
+        's8', 's9', 's10', 's11', 't3', 't4', 't5', 't6']
+fpr_abi_names = ['ft0', 'ft1', 'ft2', 'ft3', 'ft4', 'ft5', 'ft6', 'ft7',
+        'fs0', 'fs1', 'fa0', 'fa1', 'fa2', 'fa3', 'fa4', 'fa5',
+        'fa6', 'fa7', 'fs2', 'fs3', 'fs4', 'fs5', 'fs6', 'fs7',
+        'fs8', 'fs9', 'fs10', 'fs11', 'ft8', 'ft9', 'ft10', 'ft11']
+
+def cpp_operand_kind(operand):
+    # How format_inst prints an operand: an integer or FP register (the
+    # compressed x8-x15 forms end in q), or a number
+    name = operand.name
+    if name in ['rd', 'rs1', 'rs2', 'rs3'] or operand.operand_type == 'ireg':
+        return 'KIND_XREG'
+    if name in ['frd', 'frs1', 'frs2', 'frs3'] or operand.operand_type == 'freg':
+        return 'KIND_FREG'
+    if operand.operand_type == 'creg':
+        fp = name.startswith('cf')
+        if name.endswith('q'):
+            return 'KIND_FREG_C' if fp else 'KIND_XREG_C'
+        return 'KIND_FREG' if fp else 'KIND_XREG'
+    if operand.is_simm():
+        return 'KIND_SIMM'
+    return 'KIND_UIMM'
+
+def cpp_extractor(operand):
+    # A single C++ expression for the value of operand in uint32_t inst,
+    # built from runs of value bits that come from consecutive inst bits
+    terms = []
+    bits = sorted(operand.bit_map)
+    i = 0
+    while i < len(bits):
+        lo = bits[i]
+        j = i
+        while j + 1 < len(bits) and bits[j + 1] == bits[j] + 1 and operand.bit_map[bits[j + 1]] == operand.bit_map[bits[j]] + 1:
+            j += 1
+        width = bits[j] - lo + 1
+        term = '(uint64_t) ((inst >> %d) & 0x%x)' % (operand.bit_map[lo], (1 << width) - 1)
+        terms.append('(%s << %d)' % (term, lo) if lo > 0 else term)
+        i = j + 1
+    expr = ' | '.join(terms)
+    if operand.is_simm():
+        return 'sign_extend(%s, %d)' % (expr, max(bits) + 1)
+    return '(int64_t) (%s)' % expr
+
+class CppDecoderEmitter(Emitter):
+    # A C++ header with a constexpr mask/match table of the selected
+    # instructions bucketed by inst[6:0] (the same priority as InstDecoder),
+    # their names and operands, and an extractor for each operand, so host
+    # code can classify and format instructions without Spike's
+    # disassembler
+    def __init__(self, rvmeta, filename):
+        Emitter.__init__(self, rvmeta, filename)
+        # (name, match, mask, operands) of each selected instruction
+        self.entries = []
+
+    def inst(self, macro_name, bsv_val, inst_args, inst_types, selected):
+        if not selected:
+            return
+        (match, mask) = bsv_val_to_match_mask(bsv_val)
+        self.entries.append((macro_name.lower().replace('_', '.'), match, mask, inst_args))
+
+    def end(self):
+        operands = self.rvmeta.operands
+        operand_names = list(self.rvmeta.used_operands)
+        max_operands = max([len(args) for (name, match, mask, args) in self.entries] + [1])
+        buckets = [[index for (index, (name, match, mask, args)) in enumerate(self.entries) if (opcode ^ match) & mask & 0x7f == 0] for opcode in range(128)]
+        print('C++ decode table for %s: %d instructions, %d operands, %d bucket entries, at most %d per bucket' % (str(self.rvmeta.extensions),
+                len(self.entries), len(operand_names), sum(len(bucket) for bucket in buckets), max(len(bucket) for bucket in buckets)))
+
+        self.out.write('/* Automatically generated by meta-parse.py */\n')
+        self.out.write(license)
+        self.out.write('''
+#ifndef OPCODES_HPP
+#define OPCODES_HPP
+
+#include <stddef.h>
+#include <stdint.h>
+#include <stdio.h>
+
+namespace opcodes {
+
+constexpr int64_t sign_extend(uint64_t value, int width) {
+    return (int64_t) (value ^ (UINT64_C(1) << (width - 1))) - (int64_t) (UINT64_C(1) << (width - 1));
+}
+
+enum Operand : uint8_t {
+    OPERAND_NONE''')
+        for name in operand_names:
+            self.out.write(',\n    OPERAND_%s' % name.upper())
+        self.out.write('''
+};
+
+enum OperandKind : uint8_t { KIND_XREG, KIND_FREG, KIND_XREG_C, KIND_FREG_C, KIND_SIMM, KIND_UIMM };
+
+struct OperandInfo {
+    const char *name;
+    OperandKind kind;
+};
+
+constexpr OperandInfo operand_info[] = {
+    {"none", KIND_UIMM}''')
+        for name in operand_names:
+            self.out.write(',\n    {"%s", %s}' % (name, cpp_operand_kind(operands[name])))
+        self.out.write('\n};\n\n')
+        for name in operand_names:
+            self.out.write('constexpr int64_t extract_%s(uint32_t inst) { return %s; }\n' % (name, cpp_extractor(operands[name])))
+        self.out.write('''
+inline int64_t operand_value(Operand operand, uint32_t inst) {
+    switch (operand) {
+''')
+        for name in operand_names:
+            self.out.write('        case OPERAND_%s: return extract_%s(inst);\n' % (name.upper(), name))
+        self.out.write('''        default: return 0;
+    }
+}
+
+constexpr int max_operands = %d;
+
+struct InstEntry {
+    uint32_t match;
+    uint32_t mask;
+    const char *name;
+    Operand operands[max_operands];
+};
+
+// in decode priority order
+constexpr InstEntry inst_table[] = {
+''' % max_operands)
+        for (i, (name, match, mask, args)) in enumerate(self.entries):
+            self.out.write('    {0x%08x, 0x%08x, %-16s {%s}}%s\n' % (match, mask, '"%s",' % name,
+                    ', '.join('OPERAND_' + arg.upper() for arg in args) if len(args) > 0 else 'OPERAND_NONE',
+                    ',' if i < len(self.entries) - 1 else ''))
+        self.out.write('};\n\nconstexpr int num_insts = %d;\n\n' % len(self.entries))
+
+        # bucket_insts lists the entries that can match each inst[6:0], in
+        # priority order
+        starts = [0]
+        for bucket in buckets:
+            starts.append(starts[-1] + len(bucket))
+        flat = [index for bucket in buckets for index in bucket] or [0]
+        self.out.write('// the entries of inst_table that can match an instruction are\n')
+        self.out.write('// bucket_insts[bucket_start[inst & 0x7f]] up to bucket_insts[bucket_start[(inst & 0x7f) + 1]]\n')
+        for (array, values) in [('bucket_start[129]', starts), ('bucket_insts[]', flat)]:
+            self.out.write('constexpr uint16_t %s = {\n' % array)
+            for i in range(0, len(values), 16):
+                self.out.write('    %s%s\n' % (', '.join('%d' % value for value in values[i:i + 16]), ',' if i + 16 < len(values) else ''))
+            self.out.write('};\n\n')
+
+        for (array, names) in [('xpr_names', xpr_abi_names), ('fpr_names', fpr_abi_names)]:
+            self.out.write('constexpr const char *%s[32] = {\n' % array)
+            for i in range(0, 32, 8):
+                self.out.write('    %s%s\n' % (', '.join('"%s"' % name for name in names[i:i + 8]), ',' if i + 8 < 32 else ''))
+            self.out.write('};\n\n')
+
+        self.out.write('''// Returns the index of inst in inst_table, or -1 if it isn't recognized
+inline int decode(uint32_t inst) {
+    for (int i = bucket_start[inst & 0x7f]; i < bucket_start[(inst & 0x7f) + 1]; i++) {
+        const InstEntry &entry = inst_table[bucket_insts[i]];
+        if ((inst & entry.mask) == entry.match) {
+            return bucket_insts[i];
+        }
+    }
+    return -1;
+}
+
+// Writes the name and operands of inst, in riscv-meta order (e.g.
+// "sd sp, ra, 8"), to buf like snprintf, and returns the length it needed
+inline int format_inst(char *buf, size_t size, uint32_t inst) {
+    int index = decode(inst);
+    if (index < 0) {
+        return snprintf(buf, size, "unknown");
+    }
+    const InstEntry &entry = inst_table[index];
+    int length = snprintf(buf, size, "%s", entry.name);
+    for (int i = 0; i < max_operands && entry.operands[i] != OPERAND_NONE; i++) {
+        int64_t value = operand_value(entry.operands[i], inst);
+        size_t used = ((size_t) length < size) ? length : size;
+        const char *separator = (i == 0) ? " " : ", ";
+        switch (operand_info[entry.operands[i]].kind) {
+            case KIND_XREG: length += snprintf(buf + used, size - used, "%s%s", separator, xpr_names[value]); break;
+            case KIND_FREG: length += snprintf(buf + used, size - used, "%s%s", separator, fpr_names[value]); break;
+            case KIND_XREG_C: length += snprintf(buf + used, size - used, "%s%s", separator, xpr_names[value + 8]); break;
+            case KIND_FREG_C: length += snprintf(buf + used, size - used, "%s%s", separator, fpr_names[value + 8]); break;
+            case KIND_SIMM: length += snprintf(buf + used, size - used, "%s%lld", separator, (long long) value); break;
+            default: length += snprintf(buf + used, size - used, "%s0x%llx", separator, (unsigned long long) value); break;
+        }
+    }
+    return length;
+}
+
+} // namespace opcodes
+
+#endif
+''')
+
+def generate_files(rvmeta, output_dir, decode_tree, parallel_case = False, minimize = False):
+    rvmeta.emit([
+            BsvDecoderEmitter(rvmeta, os.path.join(output_dir, 'Opcodes.bsv'), decode_tree, parallel_case, minimize),
+            VerilogDecoderEmitter(rvmeta, os.path.join(output_dir, 'toInstType_verilog.v'), decode_tree, parallel_case, minimize),
+            MacroDefinitionsEmitter(rvmeta, os.path.join(output_dir, 'Opcodes.defines')),
+            CsrStubEmitter(rvmeta, os.path.join(output_dir, 'CSRs.stub.bsv')),
+            ImmStubEmitter(rvmeta, os.path.join(output_dir, 'Imm.stub.bsv')),
+            CppDecoderEmitter(rvmeta, os.path.join(output_dir, 'Opcodes.hpp'))
+            ] + ([
+            CompressedBsvEmitter(rvmeta, os.path.join(output_dir, 'ExpandCompressed.bsv')),
+            CompressedVerilogEmitter(rvmeta, os.path.join(output_dir, 'expandCompressed_verilog.v'))
+            ] if 'c' in rvmeta.extension_letters else []))
+    return output_dir
+
+def parse_config(config):
+    # base:extension_letters[:output_dir], e.g. rv32:im:../../procs/RV32IM_3stage
+    fields = config.split(':', 2)
+    if len(fields) < 2 or fields[0] not in ['rv32', 'rv64', 'rv128']:
+        raise argparse.ArgumentTypeError("expected base:extensions[:output_dir], got '%s'" % config)
+    if len(fields) == 2:
+        fields.append('.')
+    return tuple(fields)
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Generate decoders and stubs from riscv-meta.')
+    parser.add_argument('configs', metavar = 'base:extensions[:output_dir]', nargs = '*',
+            type = parse_config, default = [('rv64', 'imafds', '.')],
+            help = 'ISA variants to generate (default: rv64:imafds:.)')
+    parser.add_argument('--meta', default = '../riscv-meta/meta/',
+            help = 'path to riscv-meta/meta')
+    parser.add_argument('--cache-dir', default = '.meta-parse-cache',
+            help = 'where to cache the parsed riscv-meta model')
+    parser.add_argument('--decode-tree', action = 'store_true',
+            help = 'generate nested case decoders instead of one flat casez')
+    parser.add_argument('--parallel-case', action = 'store_true',
+            help = 'generate priority-free flat decoders if no instruction patterns overlap')
+    parser.add_argument('--minimize', action = 'store_true',
+            help = 'generate a minimized sum of products for each decoder output bit')
+    parser.add_argument('-j', '--jobs', type = int, default = None,
+            help = 'number of configurations to generate in parallel')
+    args = parser.parse_args()
+
+    # parse riscv-meta once and share it between all the configurations
+    (base, extension_letters, output_dir) = args.configs[0]
+    rvmeta = RiscvMeta(args.meta, base, extension_letters, args.cache_dir)
+    jobs = []
+    for (base, extension_letters, output_dir) in args.configs:
+        os.makedirs(output_dir, exist_ok = True)
+        jobs.append((rvmeta.for_extensions(base, extension_letters), output_dir, args.decode_tree, args.parallel_case, args.minimize))
+
+    if len(jobs) == 1 or args.jobs == 1:
+        for job in jobs:
+            generate_files(*job)
+    else:
+        with multiprocessing.Pool(args.jobs) as pool:
+            pool.starmap(generate_files, jobs)
@@ -43,51 +43,24 @@ fi
 
 RUNEXE="./verilator/bin/ubuntu.exe --just-trace"
 
-rm -rf out/
-mkdir -p out
-
 case "$OPTION" in
-    0) files=`find isa/rv64ui-p-* -type f ! -name "*.*"`
-       files="$files "`find isa/rv64um-p-* -type f ! -name "*.*"`
-       files="$files "`find isa/rv64mi-p-* -type f ! -name "*.*"`
-       files="$files "`find isa/rv64si-p-* -type f ! -name "*.*"`
+    0) SUITES="rv64ui rv64um rv64mi rv64si"
        ;;
     1) $RUNEXE isa/rv64ui-p-add
-       files=
+       rm -f SOCK.*
+       exit
        ;;
-    2) files=`find isa/rv64ui-p-* -type f ! -name "*.*"`
+    2) SUITES="rv64ui"
        ;;
-    3) files=`find isa/rv64um-p-* -type f ! -name "*.*"`
+    3) SUITES="rv64um"
        ;;
-    4) files=`find isa/rv64mi-p-* -type f ! -name "*.*"`
+    4) SUITES="rv64mi"
        ;;
-    5) files=`find isa/rv64si-p-* -type f ! -name "*.*"`
+    5) SUITES="rv64si"
        ;;
     *) echo "Invalid Test Code"
        exit
        ;;
 esac
 
-for hexfile in $files ; do
-    basehexfile=$(basename "$hexfile")
-    $RUNEXE $hexfile &> out/${basehexfile}.out
-    # check return value
-    errorcode=$?
-    if [ $errorcode -ne 0 ] ; then
-        grep ERROR out/${basehexfile}.out > /dev/null
-        if [ $? -eq 0 ] ; then
-            echo "$basehexfile FAILED $errorcode" # with divergence
-        else
-            echo "$basehexfile FAILED $errorcode (without divergence)"
-        fi
-        # exit 1
-    else
-        grep ERROR out/${basehexfile}.out > /dev/null
-        if [ $? -eq 0 ] ; then
-            echo "$basehexfile PASSED (with divergence)"
-        else
-            echo "$basehexfile OK"
-        fi
-    fi
-done
-rm SOCK.*
+$RISCY_HOME/procs/scripts/isatest.py ./verilator/bin/ubuntu.exe --exe-args=--just-trace --isa-dir isa --suites $SUITES
@@ -46,48 +46,22 @@ else
     RUNEXE="./verilator/bin/ubuntu.exe"
 fi
 
-rm -rf out/
-mkdir -p out
-
 case "$OPTION" in
-    0) files=`find $RISCY_TOOLS/riscv64-unknown-elf/share/riscv-tests/isa/rv32ui-p-* -type f ! -name "*.*"`
-       files="$files "`find $RISCY_TOOLS/riscv64-unknown-elf/share/riscv-tests/isa/rv32mi-p-* -type f ! -name "*.*"`
-       files="$files "`find $RISCY_TOOLS/riscv64-unknown-elf/share/riscv-tests/isa/rv32si-p-* -type f ! -name "*.*"`
+    0) SUITES="rv32ui rv32mi rv32si"
        ;;
     1) $RUNEXE $RISCY_TOOLS/riscv64-unknown-elf/share/riscv-tests/isa/rv32ui-p-add
-       files=
+       rm -f SOCK.*
+       exit
        ;;
-    2) files=`find $RISCY_TOOLS/riscv64-unknown-elf/share/riscv-tests/isa/rv32ui-p-* -type f ! -name "*.*"`
+    2) SUITES="rv32ui"
        ;;
-    3) files=`find $RISCY_TOOLS/riscv64-unknown-elf/share/riscv-tests/isa/rv32mi-p-* -type f ! -name "*.*"`
+    3) SUITES="rv32mi"
        ;;
-    4) files=`find $RISCY_TOOLS/riscv64-unknown-elf/share/riscv-tests/isa/rv32si-p-* -type f ! -name "*.*"`
+    4) SUITES="rv32si"
        ;;
     *) echo "Invalid Test Code"
        exit
        ;;
 esac
 
-for hexfile in $files ; do
-    basehexfile=$(basename "$hexfile")
-    $RUNEXE $hexfile &> out/${basehexfile}.out
-    # check return value
-    errorcode=$?
-    if [ $errorcode -ne 0 ] ; then
-        grep ERROR out/${basehexfile}.out > /dev/null
-        if [ $? -eq 0 ] ; then
-            echo "$basehexfile FAILED $errorcode" # with divergence
-        else
-            echo "$basehexfile FAILED $errorcode (without divergence)"
-        fi
-        # exit 1
-    else
-        grep ERROR out/${basehexfile}.out > /dev/null
-        if [ $? -eq 0 ] ; then
-            echo "$basehexfile PASSED (with divergence)"
-        else
-            echo "$basehexfile OK"
-        fi
-    fi
-done
-rm SOCK.*
+$RISCY_HOME/procs/scripts/isatest.py $RUNEXE --suites $SUITES
@@ -0,0 +1,90 @@
+
+// Copyright (c) 2016 Massachusetts Institute of Technology
+
+// Permission is hereby granted, free of charge, to any person
+// obtaining a copy of this software and associated documentation
+// files (the "Software"), to deal in the Software without
+// restriction, including without limitation the rights to use, copy,
+// modify, merge, publish, distribute, sublicense, and/or sell copies
+// of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+
+// The above copyright notice and this permission notice shall be
+// included in all copies or substantial portions of the Software.
+
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+// MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+// BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+// ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+// CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+#include <stdlib.h>
+#include <string.h>
+#include "BinaryTrace.hpp"
+
+BinaryTrace::BinaryTrace(const char *filename)
+        : TandemVerifier(),
+          packets(0),
+          buffered(0) {
+    pthread_mutex_init(&mutex, 0);
+    file = fopen(filename, "wb");
+    if (file == NULL) {
+        fprintf(stderr, "[ERROR] BinaryTrace: can't open %s for writing\n", filename);
+        exit(1);
+    }
+    BinaryTraceHeader header;
+    memcpy(header.magic, binaryTraceMagic, sizeof(header.magic));
+    header.version = binaryTraceVersion;
+    header.recordSize = sizeof(BinaryTraceRecord);
+    fwrite(&header, sizeof(header), 1, file);
+}
+
+BinaryTrace::~BinaryTrace() {
+    pthread_mutex_lock(&mutex);
+    flush();
+    fclose(file);
+    pthread_mutex_destroy(&mutex);
+}
+
+bool BinaryTrace::checkVerificationPacket(VerificationPacket p) {
+    pthread_mutex_lock(&mutex);
+
+    BinaryTraceRecord &record = buffer[buffered];
+    record.skippedPackets = p.skippedPackets;
+    record.pc = p.pc;
+    record.data = p.data;
+    record.addr = p.addr;
+    record.instruction = p.instruction;
+    record.dst = p.dst;
+    record.exception = p.exception ? 1 : 0;
+    record.interrupt = p.interrupt ? 1 : 0;
+    record.cause = p.cause;
+    buffered++;
+    packets++;
+    if (buffered == bufferSize) {
+        flush();
+    }
+
+    pthread_mutex_unlock(&mutex);
+
+    return true;
+}
+
+void BinaryTrace::flush() {
+    if (buffered > 0) {
+        fwrite(buffer, sizeof(BinaryTraceRecord), buffered, file);
+        buffered = 0;
+    }
+    fflush(file);
+}
+
+void BinaryTrace::printStatus() {
+    pthread_mutex_lock(&mutex);
+    // make sure everything so far is on disk, in case we are about to exit
+    flush();
+    fprintf(stderr, "BinaryTrace::printStatus() - %llu packets seen\n", (long long unsigned) packets);
+    pthread_mutex_unlock(&mutex);
+}
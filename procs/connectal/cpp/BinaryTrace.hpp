@@ -0,0 +1,84 @@
+
+// Copyright (c) 2016 Massachusetts Institute of Technology
+
+// Permission is hereby granted, free of charge, to any person
+// obtaining a copy of this software and associated documentation
+// files (the "Software"), to deal in the Software without
+// restriction, including without limitation the rights to use, copy,
+// modify, merge, publish, distribute, sublicense, and/or sell copies
+// of the Software, and to permit persons to whom the Software is
+// furnished to do so, subject to the following conditions:
+
+// The above copyright notice and this permission notice shall be
+// included in all copies or substantial portions of the Software.
+
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+// EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+// MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+// NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+// BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+// ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+// CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+// SOFTWARE.
+
+#ifndef BINARY_TRACE_HPP
+#define BINARY_TRACE_HPP
+
+#include <stdint.h>
+#include <stdio.h>
+#include <pthread.h>
+#include "TandemVerifier.hpp"
+
+// Fixed-width binary record for one VerificationPacket. Records are little
+// endian and follow a BinaryTraceHeader at the start of the file. The Python
+// reader (procs/scripts/tracelib.py) has a matching NumPy dtype, so keep the
+// two in sync and bump binaryTraceVersion if this layout changes.
+struct __attribute__((packed)) BinaryTraceRecord {
+    uint64_t skippedPackets;
+    uint64_t pc;
+    uint64_t data;
+    uint64_t addr;
+    uint32_t instruction;
+    uint8_t dst;
+    uint8_t exception;
+    uint8_t interrupt;
+    uint8_t cause;
+};
+
+struct __attribute__((packed)) BinaryTraceHeader {
+    char magic[8];
+    uint32_t version;
+    uint32_t recordSize;
+};
+
+static const char binaryTraceMagic[8] = {'R', 'I', 'S', 'C', 'Y', 'T', 'R', 'C'};
+static const uint32_t binaryTraceVersion = 1;
+
+// Writes every verification packet to a file as a BinaryTraceRecord
+class BinaryTrace : public TandemVerifier {
+    public:
+        BinaryTrace(const char *filename);
+        ~BinaryTrace();
+
+        // called by VerificationIndication
+        bool checkVerificationPacket(VerificationPacket p);
+
+        void printStatus();
+
+    private:
+        // records are collected here and written out bufferSize at a time
+        static const size_t bufferSize = 4096;
+
+        void flush();
+
+        FILE *file;
+        pthread_mutex_t mutex;
+
+        // number of packets seen
+        uint64_t packets;
+
+        BinaryTraceRecord buffer[bufferSize];
+        size_t buffered;
+};
+
+#endif
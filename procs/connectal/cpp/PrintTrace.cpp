@@ -55,6 +55,7 @@ bool PrintTrace::checkVerificationPacket(VerificationPacket packet) {
     pthread_mutex_lock(&mutex);
 
     bool match = true;
+    packets++;
     
     outBuffer.addLine(verificationPacketToString(packet));
 
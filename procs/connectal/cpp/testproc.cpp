@@ -49,6 +49,7 @@
 #include "NullTandemVerifier.hpp"
 #include "SpikeTandemVerifier.hpp"
 #include "PrintTrace.hpp"
+#include "BinaryTrace.hpp"
 
 #include "GeneratedTypes.h"
 
@@ -85,7 +86,7 @@ static void handle_signal(int sig) {
 
 void printHelp(const char *prog)
 {
-    fprintf(stderr, "Usage: %s [--just-run] HTIF_ARGS\n", prog);
+    fprintf(stderr, "Usage: %s [--just-run | --just-trace | --binary-trace FILE] HTIF_ARGS\n", prog);
 }
 
 int main(int argc, char * const *argv) {
@@ -112,6 +113,14 @@ int main(int argc, char * const *argv) {
         argc--;
         argv++;
     }
+    // if the next argument is "--binary-trace" remove it and the file name
+    // after it, and write verification packets to that file
+    const char *binary_trace = NULL;
+    if (argc > 1 && strcmp(argv[0], "--binary-trace") == 0) {
+        binary_trace = argv[1];
+        argc -= 2;
+        argv += 2;
+    }
 
     signal(SIGINT, &handle_signal);
 
@@ -147,6 +156,8 @@ int main(int argc, char * const *argv) {
         verification = new Verification(IfcNames_VerificationIndicationH2S, new NullTandemVerifier());
     } else if (just_trace) {
         verification = new Verification(IfcNames_VerificationIndicationH2S, new PrintTrace());
+    } else if (binary_trace != NULL) {
+        verification = new Verification(IfcNames_VerificationIndicationH2S, new BinaryTrace(binary_trace));
     } else {
         // ERROR
         fprintf(stderr, "WARNING: Spike-based tandem verification is not fully tested for priv spec v1.9 yet\n");
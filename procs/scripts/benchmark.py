@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2016 Massachusetts Institute of Technology
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, copy,
+# modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Runs a fixed set of riscv-tests benchmarks on the Verilator build of each
+# processor and records wall time, instructions retired, and CPI in a
+# history file. Results that got worse than the recent history by more than
+# a threshold are flagged, and make the script exit with an error.
+
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+import isatest
+
+procs_dir = os.path.dirname(isatest.scripts_dir)
+
+default_procs = ['RV32I_multicycle', 'RV32IM_3stage', 'RV64G_multicycle', 'RV64G_multicycle_split']
+default_workloads = ['median', 'multiply', 'qsort', 'rsort', 'towers', 'vvadd', 'dhrystone']
+
+# extra simulator arguments for processors that the runtest.sh scripts run
+# in a different verification mode
+proc_exe_args = {'RV32IM_3stage': ['--just-trace']}
+
+def proc_xlen(proc):
+    return 32 if proc.startswith('RV32') else 64
+
+def default_bench_dir(xlen):
+    return os.path.join(os.environ.get('RISCY_TOOLS', ''), 'riscv%d-unknown-elf' % xlen, 'share', 'riscv-tests', 'benchmarks')
+
+# Lines the simulator and the benchmarks print that the harness reads:
+# printStatus from the tandem verifiers, and the counters the riscv-tests
+# benchmarks print when they finish
+packets_re = re.compile(rb'printStatus\(\) - (\d+) packets seen')
+counter_re = re.compile(rb'^(mcycle|minstret) = (\d+)', re.MULTILINE)
+
+def parse_output(output):
+    # Returns (packets, cycles, instret) from simulator output; each is None
+    # if the output doesn't say
+    m = packets_re.search(output)
+    packets = int(m.group(1)) if m is not None else None
+    counters = dict((name.decode(), int(value)) for (name, value) in counter_re.findall(output))
+    return (packets, counters.get('mcycle'), counters.get('minstret'))
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd = procs_dir, stderr = subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(proc, workload, elf, out_dir, timeout):
+    # Runs one workload on one processor and returns its history record
+    command = [os.path.join(procs_dir, proc, 'verilator', 'bin', 'ubuntu.exe')] + proc_exe_args.get(proc, [])
+    result = isatest.run_test(command, elf, os.path.join(out_dir, proc), timeout)
+    with open(result.output_file, 'rb') as f:
+        (packets, cycles, instret) = parse_output(f.read())
+    # prefer the retired instruction count the workload measured itself,
+    # since verification packets can be skipped
+    instructions = instret if instret is not None else packets
+    record = {'proc': proc, 'workload': workload, 'status': result.status,
+            'seconds': result.seconds, 'instructions': instructions,
+            'cycles': cycles, 'cpi': None, 'ips': None}
+    if cycles is not None and instret:
+        record['cpi'] = cycles / instret
+    if instructions and result.seconds > 0:
+        record['ips'] = instructions / result.seconds
+    return record
+
+def read_history(filename):
+    history = []
+    if os.path.isfile(filename):
+        with open(filename, 'r') as f:
+            for line in f:
+                if line.strip() != '':
+                    history.append(json.loads(line))
+    return history
+
+def append_history(filename, records):
+    with open(filename, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record, sort_keys = True) + '\n')
+
+def find_regressions(record, history, window, threshold):
+    # Compares record against the median of the last window passing results
+    # for the same processor and workload. Returns a list of descriptions
+    # of the metrics that got worse by more than threshold (a fraction).
+    previous = [h for h in history if h['proc'] == record['proc'] and h['workload'] == record['workload'] and h['status'] == 'OK'][-window:]
+    regressions = []
+    if record['status'] != 'OK':
+        if len(previous) > 0:
+            regressions.append('status %s' % record['status'])
+        return regressions
+    # higher cpi is worse, lower ips (host speed) is worse
+    for (metric, higher_is_worse) in [('cpi', True), ('ips', False)]:
+        values = [h[metric] for h in previous if h[metric] is not None]
+        if record[metric] is None or len(values) == 0:
+            continue
+        baseline = statistics.median(values)
+        change = (record[metric] - baseline) / baseline
+        if (change if higher_is_worse else -change) > threshold:
+            regressions.append('%s %.4g -> %.4g (%+.1f%%)' % (metric, baseline, record[metric], 100.0 * change))
+    return regressions
+
+def format_value(value, fmt):
+    return fmt % value if value is not None else '-'
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Benchmark the processors and track the results.')
+    parser.add_argument('--procs', nargs = '+', default = default_procs,
+            help = 'processors to benchmark (default: %s)' % ' '.join(default_procs))
+    parser.add_argument('--workloads', nargs = '+', default = default_workloads,
+            help = 'riscv-tests benchmarks to run (default: %s)' % ' '.join(default_workloads))
+    parser.add_argument('--bench-dir32', default = default_bench_dir(32),
+            help = 'riscv-tests benchmarks for RV32 processors')
+    parser.add_argument('--bench-dir64', default = default_bench_dir(64),
+            help = 'riscv-tests benchmarks for RV64 processors')
+    parser.add_argument('--history', default = os.path.join(procs_dir, 'benchmark-history.jsonl'),
+            help = 'history file (default: procs/benchmark-history.jsonl)')
+    parser.add_argument('--window', type = int, default = 5,
+            help = 'number of previous results to compare against (default: 5)')
+    parser.add_argument('--threshold', type = float, default = 5.0,
+            help = 'percent change that counts as a regression (default: 5)')
+    parser.add_argument('--out', default = 'benchmark-out',
+            help = 'directory for simulator output (default: benchmark-out)')
+    parser.add_argument('--timeout', type = float, default = 3600,
+            help = 'seconds before a benchmark is killed (default: 3600)')
+    parser.add_argument('--no-record', action = 'store_true',
+            help = "compare against the history but don't add to it")
+    args = parser.parse_args()
+
+    out_dir = os.path.abspath(args.out)
+    shutil.rmtree(out_dir, ignore_errors = True)
+    history = read_history(args.history)
+    revision = git_revision()
+    now = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+    # benchmarks run one at a time so they don't skew each other's timing
+    records = []
+    regressed = False
+    print('%-24s %-10s %-32s %10s %14s %8s %12s' % ('proc', 'workload', 'status', 'seconds', 'instructions', 'cpi', 'inst/s'))
+    for proc in args.procs:
+        bench_dir = args.bench_dir32 if proc_xlen(proc) == 32 else args.bench_dir64
+        for workload in args.workloads:
+            elf = os.path.join(bench_dir, workload + '.riscv')
+            if not os.path.isfile(elf):
+                print('%-24s %-10s skipped, %s not found' % (proc, workload, elf))
+                continue
+            record = run_benchmark(proc, workload, elf, out_dir, args.timeout)
+            record['time'] = now
+            record['revision'] = revision
+            print('%-24s %-10s %-32s %10.2f %14s %8s %12s' % (proc, workload, record['status'], record['seconds'],
+                    format_value(record['instructions'], '%d'), format_value(record['cpi'], '%.3f'), format_value(record['ips'], '%.0f')))
+            for regression in find_regressions(record, history, args.window, args.threshold / 100.0):
+                print('    REGRESSION: %s' % regression)
+                regressed = True
+            records.append(record)
+
+    if not args.no_record:
+        append_history(args.history, records)
+    sys.exit(1 if regressed else 0)
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2016 Massachusetts Institute of Technology
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, copy,
+# modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# Simulates branch predictors on a PrintTrace text trace or a BinaryTrace
+# dump. The outcome and target of every branch and jump come from the pc of
+# the packet after it. The predictors in riscy-lib are modelled bit for
+# bit: mkBht (Bht.bsv), mkBtb (Btb.bsv) and mkRas (Ras.bsv), with their
+# sizes as parameters, next to gshare and tournament direction predictors
+# with the same interface (predict and update).
+#
+# Nothing in the processors uses these predictors yet, so the front end
+# they are simulated in is an assumption: the BTB is looked up for every
+# control instruction and updated with its outcome, conditional branches
+# take their direction from the direction predictor (with the target
+# computed at decode), returns pop the RAS, other indirect jumps use the
+# BTB's target, and calls push their return address. A mispredict is a
+# wrong branch direction or a wrong return or indirect jump target; a BTB
+# miss, where the fetched next pc was wrong but decode can fix it, is
+# counted separately.
+#
+# Each configuration is a direction predictor, a BTB size and a RAS size.
+# Configurations are split over worker processes, and each worker streams
+# the trace once for all of its configurations.
+
+import argparse
+import itertools
+import multiprocessing
+
+import numpy as np
+
+import tracelib
+
+class Bht:
+    # mkBht: 2 bit saturating counters indexed by pc[log2(entries)+1:2].
+    # The counters aren't reset, and the Verilog RegFile starts out holding
+    # 2'b10 (weakly taken).
+    def __init__(self, entries, initial = 2):
+        self.mask = entries - 1
+        self.counters = [initial] * entries
+
+    def predict(self, pc):
+        return self.counters[(pc >> 2) & self.mask] >= 2
+
+    def update(self, pc, taken):
+        index = (pc >> 2) & self.mask
+        counter = self.counters[index]
+        if taken:
+            self.counters[index] = counter + 1 if counter < 3 else 3
+        else:
+            self.counters[index] = counter - 1 if counter > 0 else 0
+
+class Gshare(Bht):
+    # 2 bit counters indexed by pc[log2(entries)+1:2] xor the outcomes of
+    # the last history_bits branches
+    def __init__(self, entries, history_bits, initial = 2):
+        Bht.__init__(self, entries, initial)
+        self.history = 0
+        self.history_mask = (1 << history_bits) - 1
+
+    def predict(self, pc):
+        return Bht.predict(self, pc ^ (self.history << 2))
+
+    def update(self, pc, taken):
+        Bht.update(self, pc ^ (self.history << 2), taken)
+        self.history = ((self.history << 1) | taken) & self.history_mask
+
+class Tournament:
+    # A bimodal (mkBht) and a gshare predictor, with a table of 2 bit
+    # counters indexed by pc choosing between them (3 and 2 pick gshare),
+    # trained when the two disagree
+    def __init__(self, bimodal_entries, gshare_entries, history_bits, chooser_entries):
+        self.bimodal = Bht(bimodal_entries)
+        self.gshare = Gshare(gshare_entries, history_bits)
+        self.chooser = Bht(chooser_entries, initial = 1)
+
+    def predict(self, pc):
+        if self.chooser.predict(pc):
+            return self.gshare.predict(pc)
+        return self.bimodal.predict(pc)
+
+    def update(self, pc, taken):
+        bimodal = self.bimodal.predict(pc)
+        gshare = self.gshare.predict(pc)
+        if bimodal != gshare:
+            self.chooser.update(pc, gshare == taken)
+        self.bimodal.update(pc, taken)
+        self.gshare.update(pc, taken)
+
+class Btb:
+    # mkBtb: direct mapped, indexed by pc[log2(entries)+1:2] and tagged with
+    # the rest of pc above that. A taken instruction writes its entry; a
+    # not taken one whose tag matches the entry's (valid or not) clears it.
+    def __init__(self, entries, xlen):
+        self.index_bits = entries.bit_length() - 1
+        self.mask = entries - 1
+        self.tag_mask = (1 << (xlen - self.index_bits - 2)) - 1
+        self.valid = [False] * entries
+        # the Verilog RegFile starts out holding 0xaa...
+        self.tags = [self.tag_mask & 0xaaaaaaaaaaaaaaaa] * entries
+        self.targets = [0] * entries
+
+    def predict(self, pc):
+        # Returns the predicted next pc, or None for a miss (mkBtb predicts
+        # pc + 4)
+        index = (pc >> 2) & self.mask
+        if self.valid[index] and self.tags[index] == (pc >> (self.index_bits + 2)) & self.tag_mask:
+            return self.targets[index]
+        return None
+
+    def update(self, pc, next_pc, taken):
+        index = (pc >> 2) & self.mask
+        tag = (pc >> (self.index_bits + 2)) & self.tag_mask
+        if taken:
+            self.valid[index] = True
+            self.tags[index] = tag
+            self.targets[index] = next_pc
+        elif self.tags[index] == tag:
+            self.valid[index] = False
+
+class Ras:
+    # mkRas: a circular stack that overwrites its oldest entry when full,
+    # and pops whatever is below the head when empty
+    def __init__(self, entries):
+        self.stack = [0] * entries
+        self.head = 0
+
+    def push(self, addr):
+        self.stack[self.head] = addr
+        self.head = (self.head + 1) % len(self.stack)
+
+    def pop(self):
+        self.head = (self.head - 1) % len(self.stack)
+        return self.stack[self.head]
+
+def power_of_2(n, what):
+    assert n > 0 and n & (n - 1) == 0, '%s must be a power of 2, not %d' % (what, n)
+    return n
+
+def direction_predictor(spec):
+    # bht:ENTRIES, gshare:ENTRIES:HISTORY or
+    # tournament:BIMODAL:GSHARE:HISTORY:CHOOSER
+    fields = spec.split(':')
+    params = [int(field) for field in fields[1:]]
+    if fields[0] == 'bht' and len(params) == 1:
+        return Bht(power_of_2(params[0], 'BHT entries'))
+    if fields[0] == 'gshare' and len(params) == 2:
+        return Gshare(power_of_2(params[0], 'gshare entries'), params[1])
+    if fields[0] == 'tournament' and len(params) == 4:
+        return Tournament(power_of_2(params[0], 'bimodal entries'), power_of_2(params[1], 'gshare entries'), params[2], power_of_2(params[3], 'chooser entries'))
+    assert False, 'bad direction predictor %s; expected bht:ENTRIES, gshare:ENTRIES:HISTORY or tournament:BIMODAL:GSHARE:HISTORY:CHOOSER' % spec
+
+# kinds of control instruction
+BRANCH = 1
+JAL = 2
+JALR = 3
+
+def control_instructions(instructions, xlen):
+    # Returns (kind, rd, rs1) arrays for an array of instructions, with kind
+    # 0 for instructions that aren't branches or jumps
+    inst = instructions.astype(np.int64)
+    opcode = inst & 0x7f
+    rd = (inst >> 7) & 0x1f
+    rs1 = (inst >> 15) & 0x1f
+    kind = np.select([opcode == 0x63, opcode == 0x6f, opcode == 0x67], [BRANCH, JAL, JALR], 0)
+    # compressed: c.beqz, c.bnez, c.j, c.jal (RV32 only), c.jr and c.jalr
+    quadrant = inst & 0x3
+    funct3 = (inst >> 13) & 0x7
+    c_rs1 = (inst >> 7) & 0x1f
+    c_jr = (quadrant == 2) & (funct3 == 4) & (c_rs1 != 0) & ((inst >> 2) & 0x1f == 0)
+    c_link = (inst >> 12) & 1
+    c_jal = (quadrant == 1) & (funct3 == 1) & (xlen == 32)
+    c_j = (quadrant == 1) & (funct3 == 5)
+    c_branch = (quadrant == 1) & (funct3 >= 6)
+    kind = np.select([c_branch, c_j | c_jal, c_jr], [BRANCH, JAL, JALR], kind)
+    rd = np.select([c_jal, c_j | c_branch, c_jr], [1, 0, c_link], rd)
+    rs1 = np.where(c_jr, c_rs1, rs1)
+    return (kind, rd, rs1)
+
+def is_link(reg):
+    return reg == 1 or reg == 5
+
+class Frontend:
+    # One predictor configuration and its counts
+    def __init__(self, direction, btb_entries, ras_entries, xlen):
+        self.name = (direction, btb_entries, ras_entries)
+        self.direction = direction_predictor(direction)
+        self.btb = Btb(power_of_2(btb_entries, 'BTB entries'), xlen)
+        self.ras = Ras(power_of_2(ras_entries, 'RAS entries'))
+        self.counts = dict((name, 0) for name in count_names)
+
+    def simulate(self, pc, kind, rd, rs1, next_pc, fallthrough):
+        counts = self.counts
+        taken = next_pc != fallthrough
+        btb_pc = self.btb.predict(pc)
+        if btb_pc is None:
+            btb_pc = fallthrough
+            if taken:
+                counts['btb_misses'] += 1
+        elif btb_pc != next_pc:
+            counts['btb_wrong'] += 1
+        self.btb.update(pc, next_pc, taken)
+        if kind == BRANCH:
+            counts['branches'] += 1
+            if self.direction.predict(pc) != taken:
+                counts['direction_mispredicts'] += 1
+            self.direction.update(pc, taken)
+            return
+        counts['jumps'] += 1
+        # RAS hints from the RISC-V spec: pop if rs1 is a link register other
+        # than rd, push if rd is one
+        if kind == JALR:
+            if is_link(rs1) and rs1 != rd:
+                counts['returns'] += 1
+                if self.ras.pop() != next_pc:
+                    counts['return_mispredicts'] += 1
+            else:
+                counts['indirect'] += 1
+                if btb_pc != next_pc:
+                    counts['indirect_mispredicts'] += 1
+        if is_link(rd):
+            self.ras.push(fallthrough)
+
+count_names = ['branches', 'direction_mispredicts', 'jumps', 'returns', 'return_mispredicts',
+        'indirect', 'indirect_mispredicts', 'btb_misses', 'btb_wrong']
+
+def trace_chunks(filename, chunk_packets):
+    # Yields the packets of a trace as arrays of binary trace records
+    if tracelib.is_binary_trace(filename):
+        records = tracelib.open_binary_trace(filename)
+        for start in range(0, len(records), chunk_packets):
+            yield records[start:start + chunk_packets]
+    else:
+        packets = tracelib.parse_trace(tracelib.read_lines(filename))
+        while True:
+            chunk = [(p.skipped_packets, p.pc, p.data, p.addr, p.instruction, p.dst, p.exception, p.interrupt, p.cause)
+                    for (p, disasm) in itertools.islice(packets, chunk_packets)]
+            if len(chunk) == 0:
+                return
+            yield np.array(chunk, tracelib.binary_trace_fields)
+
+def simulate_group(group):
+    (filename, configs, xlen, chunk_packets) = group
+    frontends = [Frontend(direction, btb, ras, xlen) for (direction, btb, ras) in configs]
+    instructions = 0
+    # the last packet of the previous chunk, whose outcome is in this one
+    carry = None
+    for chunk in trace_chunks(filename, chunk_packets):
+        instructions = instructions + int(np.count_nonzero(~(chunk['exception'] | chunk['interrupt'])))
+        if carry is not None:
+            chunk = np.concatenate((carry, chunk))
+        carry = chunk[-1:]
+        (kind, rd, rs1) = control_instructions(chunk['instruction'], xlen)
+        fallthrough = chunk['pc'].astype(np.int64) + np.where(chunk['instruction'] & 0x3 == 0x3, 4, 2)
+        # control instructions that didn't trap and whose next packet shows
+        # where they went: it isn't an interrupt (an exception is reported
+        # at the pc that took it) and no packets were skipped in between
+        follows = ~chunk['interrupt'][1:] & (chunk['skipped_packets'][1:] == 0)
+        events = np.flatnonzero((kind[:-1] != 0) & ~chunk['exception'][:-1] & ~chunk['interrupt'][:-1] & follows)
+        event_pc = chunk['pc'][events].tolist()
+        event_next = chunk['pc'][events + 1].tolist()
+        event_fallthrough = fallthrough[events].tolist()
+        for (pc, k, d, s, next_pc, fall) in zip(event_pc, kind[events].tolist(), rd[events].tolist(), rs1[events].tolist(), event_next, event_fallthrough):
+            for frontend in frontends:
+                frontend.simulate(pc, k, d, s, next_pc, fall)
+    return (instructions, [(frontend.name, frontend.counts) for frontend in frontends])
+
+# the riscy-lib predictors: BhtEntries, BtbEntries and RasEntries
+baseline = ('bht:64', 16, 8)
+
+def per_kilo(n, instructions):
+    return 1000.0 * n / instructions if instructions > 0 else 0.0
+
+def percent(n, d):
+    return 100.0 * n / d if d > 0 else 0.0
+
+def print_results(instructions, results):
+    print('%d instructions' % instructions)
+    print('%-28s %5s %4s %10s %7s %9s %7s %9s %7s %9s %9s %8s %8s' % ('direction', 'btb', 'ras', 'branches', 'dir %',
+            'returns', 'ras %', 'indirect', 'ind %', 'btb miss', 'btb wrong', 'MPKI', 'btb PKI'))
+    for ((direction, btb, ras), c) in results:
+        mispredicts = c['direction_mispredicts'] + c['return_mispredicts'] + c['indirect_mispredicts']
+        print('%-28s %5d %4d %10d %7.2f %9d %7.2f %9d %7.2f %9d %9d %8.3f %8.3f%s' % (direction, btb, ras,
+                c['branches'], percent(c['direction_mispredicts'], c['branches']),
+                c['returns'], percent(c['return_mispredicts'], c['returns']),
+                c['indirect'], percent(c['indirect_mispredicts'], c['indirect']),
+                c['btb_misses'], c['btb_wrong'], per_kilo(mispredicts, instructions),
+                per_kilo(c['btb_misses'] + c['btb_wrong'], instructions),
+                '  (riscy-lib)' if (direction, btb, ras) == baseline else ''))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Simulate branch predictors on a PrintTrace text trace or a binary trace.')
+    parser.add_argument('trace', help = 'trace file')
+    parser.add_argument('--direction', nargs = '+', default = ['bht:64', 'bht:1024', 'gshare:1024:10', 'tournament:1024:1024:10:1024'],
+            help = 'direction predictors: bht:ENTRIES, gshare:ENTRIES:HISTORY or tournament:BIMODAL:GSHARE:HISTORY:CHOOSER')
+    parser.add_argument('--btb', type = int, nargs = '+', default = [16, 256],
+            help = 'BTB entries (default: 16 256)')
+    parser.add_argument('--ras', type = int, nargs = '+', default = [8],
+            help = 'RAS entries (default: 8)')
+    parser.add_argument('--xlen', type = int, default = 64, choices = [32, 64],
+            help = 'address size, for BTB tags and compressed jumps (default: 64)')
+    parser.add_argument('-j', '--jobs', type = int, default = None,
+            help = 'number of worker processes')
+    parser.add_argument('--chunk-packets', type = int, default = 1 << 20,
+            help = 'packets read at a time')
+    args = parser.parse_args()
+
+    configs = [(direction, btb, ras) for direction in args.direction for btb in args.btb for ras in args.ras]
+    # check the configurations before starting the workers
+    for (direction, btb, ras) in configs:
+        Frontend(direction, btb, ras, args.xlen)
+    jobs = min(args.jobs if args.jobs is not None else multiprocessing.cpu_count(), len(configs))
+    groups = [(args.trace, configs[i::jobs], args.xlen, args.chunk_packets) for i in range(jobs)]
+    if jobs == 1:
+        outputs = [simulate_group(groups[0])]
+    else:
+        with multiprocessing.Pool(jobs) as pool:
+            outputs = pool.map(simulate_group, groups)
+    counts = dict(config for (instructions, group_counts) in outputs for config in group_counts)
+    print_results(outputs[0][0], [(config, counts[config]) for config in configs])
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2016 Massachusetts Institute of Technology
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, copy,
+# modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# Sweeps data cache and prefetcher configurations over the loads and stores
+# of a PrintTrace text trace or a BinaryTrace dump, so cache parameters can
+# be chosen without rebuilding the processors. Caches are set associative,
+# write-back and write-allocate like mkDCache (riscy-lib/DCache.bsv), with
+# LRU, FIFO or random replacement (mkDCache's, which fills an invalid way
+# first). Prefetchers sit between the cache and main memory like
+# mkBlockingPrefetcher (riscy-lib/Prefetcher.bsv): every line fill is
+# looked up in a buffer of the last few prefetched lines and then triggers
+# a prefetch, of the next line (next-line, mkBlockingPrefetcher's policy)
+# or of the line the missing instruction's stride leads to (stride).
+#
+# The simulation is vectorized with NumPy. Accesses are grouped by set and
+# repeated accesses to the same line collapsed, since they hit under any
+# replacement policy; then the k-th remaining access of every set is
+# simulated at once. Timing isn't modelled: prefetches always arrive in
+# time, and a prefetch is never dropped because another one is in flight.
+
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+import tracelib
+
+# major opcodes (inst[6:0]) of loads and stores; AMOs read and write
+load_opcodes = (0x03, 0x07)
+store_opcodes = (0x23, 0x27, 0x2f)
+
+# mkDCache: DCacheWayNum ways, DCacheSetNum sets, CacheLineSz bits per
+# line, random replacement, behind mkBlockingPrefetcher
+baseline = (32 * 1024, 4, 64, 'random', 'next-line', 1)
+
+def memory_accesses(records):
+    # Returns (pc, addr, write) arrays for the loads and stores in an array
+    # of binary trace records. Instructions that trapped didn't access
+    # memory.
+    opcode = records['instruction'] & 0x7f
+    load = np.isin(opcode, load_opcodes)
+    store = np.isin(opcode, store_opcodes)
+    mask = (load | store) & ~records['exception'] & ~records['interrupt']
+    return (records['pc'][mask], records['addr'][mask], store[mask])
+
+def records_from_packets(packets):
+    return np.array([(p.skipped_packets, p.pc, p.data, p.addr, p.instruction, p.dst, p.exception, p.interrupt, p.cause)
+            for (p, disasm) in packets], tracelib.binary_trace_fields)
+
+def text_segment_accesses(segment):
+    (filename, start, end, chunk_size) = segment
+    return memory_accesses(records_from_packets(tracelib.parse_trace(tracelib.read_lines(filename, start, end, chunk_size))))
+
+def read_accesses(filename, jobs, chunk_size):
+    # Returns (pc, addr, write) for the whole trace
+    if tracelib.is_binary_trace(filename):
+        records = tracelib.open_binary_trace(filename)
+        step = chunk_size // records.dtype.itemsize
+        parts = [memory_accesses(records[start:start + step]) for start in range(0, len(records), step)]
+    else:
+        segments = [(filename, start, end, chunk_size) for (start, end) in tracelib.split_segments(filename, 4 * jobs)]
+        with multiprocessing.Pool(jobs) as pool:
+            parts = pool.map(text_segment_accesses, segments)
+    if len(parts) == 0:
+        return (np.zeros(0, np.uint64), np.zeros(0, np.uint64), np.zeros(0, bool))
+    return tuple(np.concatenate([part[i] for part in parts]) for i in range(3))
+
+def log2(n, what):
+    assert n > 0 and n & (n - 1) == 0, '%s must be a power of 2, not %d' % (what, n)
+    return n.bit_length() - 1
+
+def simulate_cache(lines, writes, sets, ways, replacement, seed = 0):
+    # Simulates a cache on the line numbers in lines. Returns (hits, the
+    # indices of the misses in trace order, number of write-backs).
+    set_bits = log2(sets, 'the number of sets')
+    set_index = (lines & np.uint64(sets - 1)).astype(np.int64)
+    tags = (lines >> np.uint64(set_bits)).astype(np.int64)
+    # group by set, keeping trace order within each set (NumPy's stable
+    # sort is a radix sort for 16 bit keys), and collapse runs of accesses
+    # to the same line into their first access
+    order = np.argsort(set_index.astype(np.uint16) if sets <= 1 << 16 else set_index, kind = 'stable')
+    grouped = lines[order]
+    run_starts = np.flatnonzero(np.concatenate(([True], grouped[1:] != grouped[:-1])))
+    run_index = order[run_starts]
+    run_set = set_index[run_index]
+    run_tag = tags[run_index]
+    run_write = np.logical_or.reduceat(writes[order], run_starts) if len(order) > 0 else writes
+    # round k simulates the k-th run of every set that has one. Numbering
+    # the sets busiest first, the sets in round k are those numbered below
+    # the round's size, so each run's place in the rounds needs no sort.
+    set_runs = np.bincount(run_set, minlength = sets)
+    busiest = np.empty(sets, np.int64)
+    busiest[np.argsort(-set_runs, kind = 'stable')] = np.arange(sets)
+    rank = np.arange(len(run_set)) - (np.cumsum(set_runs) - set_runs)[run_set]
+    round_sizes = np.bincount(rank)
+    round_ends = np.cumsum(round_sizes)
+    rounds = np.empty(len(run_set), np.int64)
+    rounds[round_ends[rank] - round_sizes[rank] + busiest[run_set]] = np.arange(len(run_set))
+    # the state of (set, way) is at set * ways + way, and is the tag and
+    # the dirty bit as tag * 2 + dirty, or -2 if the way is invalid
+    round_base = run_set[rounds] * ways
+    round_state = run_tag[rounds] * 2 + run_write[rounds]
+    if replacement == 'random':
+        round_random = np.random.default_rng(seed).integers(0, ways, len(rounds))
+    else:
+        assert replacement in ('lru', 'fifo'), 'unknown replacement policy %s' % replacement
+    state = np.full(sets * ways, -2, np.int64)
+    # the round each way was last used (lru) or filled (fifo); -1 if invalid
+    stamp = np.full(sets * ways, -1, np.int64)
+    way_offsets = np.arange(ways)
+    round_hit = np.zeros(len(rounds), bool)
+    round_old = np.zeros(len(rounds), np.int64)
+    start = 0
+    for (r, end) in enumerate(round_ends.tolist()):
+        base = round_base[start:end]
+        new = round_state[start:end]
+        ways_index = base[:, None] + way_offsets
+        current = state[ways_index]
+        match = (current >> 1) == (new >> 1)[:, None]
+        hit = match.any(1)
+        if replacement == 'random':
+            invalid = current < 0
+            victim = np.where(invalid.any(1), invalid.argmax(1), round_random[start:end])
+        else:
+            victim = stamp[ways_index].argmin(1)
+        index = base + np.where(hit, match.argmax(1), victim)
+        old = state[index]
+        round_hit[start:end] = hit
+        round_old[start:end] = old
+        # a hit keeps the line's dirty bit
+        state[index] = new | (old & hit)
+        if replacement == 'lru':
+            stamp[index] = r
+        elif replacement == 'fifo':
+            stamp[index[~hit]] = r
+        start = end
+    # misses that evicted a dirty line
+    writebacks = int(np.count_nonzero(~round_hit & (round_old >= 0) & (round_old & 1 == 1)))
+
+    hits = np.ones(len(lines), bool)
+    hits[run_index[rounds]] = round_hit
+    return (hits, np.flatnonzero(~hits), writebacks)
+
+def stride_targets(pcs, addrs, line_bits, entries):
+    # The line the stride prefetcher would fetch on a miss by each access,
+    # or -1 for none. The prefetcher has a table of entries strides indexed
+    # by pc (without tags, so instructions can alias). Once an entry has
+    # seen the same nonzero stride twice in a row, it predicts the line of
+    # addr + stride, or the neighbouring line in the direction of the
+    # stride if that is the same line.
+    entry = ((pcs >> np.uint64(2)) & np.uint64(entries - 1)).astype(np.uint16)
+    order = np.argsort(entry, kind = 'stable')
+    grouped = entry[order]
+    addr = addrs[order].astype(np.int64)
+    same_entry = np.concatenate(([False], grouped[1:] == grouped[:-1]))
+    stride = np.where(same_entry, addr - np.roll(addr, 1), 0)
+    confident = same_entry & np.roll(same_entry, 1) & (stride != 0) & (stride == np.roll(stride, 1))
+    line = addr >> line_bits
+    target = (addr + stride) >> line_bits
+    target = np.where(target == line, line + np.sign(stride), target)
+    targets = np.empty(len(pcs), np.int64)
+    targets[order] = np.where(confident, target, -1)
+    return targets
+
+def simulate_prefetcher(miss_lines, targets, depth):
+    # Each miss (in trace order) is looked up in a buffer of the last depth
+    # prefetched lines, then prefetches its target (-1 for none). Returns
+    # (misses served by the buffer, prefetches issued).
+    issued = targets >= 0
+    # index into the issued prefetches of the first one after each miss
+    issued_before = np.cumsum(issued) - issued
+    issued_lines = targets[issued]
+    served = np.zeros(len(miss_lines), bool)
+    for d in range(1, depth + 1):
+        index = issued_before - d
+        valid = index >= 0
+        served[valid] |= issued_lines[index[valid]] == miss_lines[valid]
+    return (int(np.count_nonzero(served)), len(issued_lines))
+
+# the trace's accesses in each worker process, set up by init_worker
+accesses = None
+
+def init_worker(directory):
+    global accesses
+    accesses = tuple(np.load(os.path.join(directory, name + '.npy'), mmap_mode = 'r') for name in ['pc', 'addr', 'write'])
+
+def simulate(point):
+    # Simulates one cache with each of the prefetchers. Returns a result
+    # dict per prefetcher.
+    ((size, ways, line_size, replacement), prefetchers, stride_entries) = point
+    (pcs, addrs, writes) = accesses
+    line_bits = log2(line_size, 'the line size')
+    sets = size // (ways * line_size)
+    assert sets * ways * line_size == size, '%d bytes is not a multiple of %d ways of %d byte lines' % (size, ways, line_size)
+    lines = np.asarray(addrs) >> np.uint64(line_bits)
+    (hits, misses, writebacks) = simulate_cache(lines, np.asarray(writes), sets, ways, replacement)
+    miss_lines = lines[misses].astype(np.int64)
+    results = []
+    for (prefetch, depth) in prefetchers:
+        if prefetch == 'none':
+            (served, issued) = (0, 0)
+        elif prefetch == 'next-line':
+            (served, issued) = simulate_prefetcher(miss_lines, miss_lines + 1, depth)
+        elif prefetch == 'stride':
+            (served, issued) = simulate_prefetcher(miss_lines, stride_targets(np.asarray(pcs), np.asarray(addrs), line_bits, stride_entries)[misses], depth)
+        else:
+            assert False, 'unknown prefetcher %s' % prefetch
+        results.append({'size': size, 'ways': ways, 'line': line_size, 'replacement': replacement,
+                'prefetch': prefetch, 'depth': depth, 'accesses': len(lines),
+                'misses': len(misses), 'prefetch_hits': served, 'prefetches': issued,
+                'writebacks': writebacks,
+                'traffic': line_size * (len(misses) - served + issued + writebacks)})
+    return results
+
+def percent(n, d):
+    return 100.0 * n / d if d > 0 else 0.0
+
+def print_results(results):
+    print('%8s %4s %5s %-7s %-9s %5s %8s %12s %8s %8s %14s %8s' % ('size', 'ways', 'line', 'repl', 'prefetch', 'depth',
+            'hit%', 'misses', 'pf cov%', 'pf acc%', 'traffic', 'B/access'))
+    for r in results:
+        point = (r['size'], r['ways'], r['line'], r['replacement'], r['prefetch'], r['depth'])
+        print('%7dK %4d %5d %-7s %-9s %5d %8.3f %12d %8.2f %8.2f %14d %8.3f%s' % (r['size'] // 1024, r['ways'], r['line'],
+                r['replacement'], r['prefetch'], r['depth'], percent(r['accesses'] - r['misses'], r['accesses']), r['misses'],
+                percent(r['prefetch_hits'], r['misses']), percent(r['prefetch_hits'], r['prefetches']),
+                r['traffic'], r['traffic'] / r['accesses'] if r['accesses'] > 0 else 0.0,
+                '  (mkDCache)' if point == baseline else ''))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Simulate data cache and prefetcher configurations on the loads and stores of a trace.')
+    parser.add_argument('trace', help = 'PrintTrace text trace or BinaryTrace file')
+    parser.add_argument('--sizes', type = int, nargs = '+', default = [16, 32, 64],
+            help = 'cache sizes in KiB (default: 16 32 64)')
+    parser.add_argument('--ways', type = int, nargs = '+', default = [2, 4, 8],
+            help = 'associativities (default: 2 4 8)')
+    parser.add_argument('--lines', type = int, nargs = '+', default = [64],
+            help = 'line sizes in bytes (default: 64)')
+    parser.add_argument('--replacement', nargs = '+', default = ['random', 'lru'], choices = ['lru', 'fifo', 'random'],
+            help = 'replacement policies (default: random lru)')
+    parser.add_argument('--prefetch', nargs = '+', default = ['none', 'next-line', 'stride'], choices = ['none', 'next-line', 'stride'],
+            help = 'prefetchers (default: none next-line stride)')
+    parser.add_argument('--prefetch-depth', type = int, nargs = '+', default = [1],
+            help = 'prefetched lines buffered (default: 1, like mkBlockingPrefetcher)')
+    parser.add_argument('--stride-entries', type = int, default = 256,
+            help = 'entries in the stride prefetcher table (default: 256)')
+    parser.add_argument('-j', '--jobs', type = int, default = None,
+            help = 'number of worker processes')
+    parser.add_argument('--chunk-size', type = int, default = 1 << 24,
+            help = 'bytes read at a time')
+    parser.add_argument('--csv', default = None,
+            help = 'also write the results to this CSV file')
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs is not None else multiprocessing.cpu_count()
+    (pcs, addrs, writes) = read_accesses(args.trace, jobs, args.chunk_size)
+    print('%d loads and stores, %d stores' % (len(addrs), np.count_nonzero(writes)))
+    if len(addrs) == 0:
+        sys.exit(0)
+
+    prefetchers = [(prefetch, depth) for prefetch in args.prefetch for depth in ([0] if prefetch == 'none' else args.prefetch_depth)]
+    log2(args.stride_entries, 'the number of stride table entries')
+    assert args.stride_entries <= 1 << 16, 'at most %d stride table entries' % (1 << 16)
+    points = [((size * 1024, ways, line_size, replacement), prefetchers, args.stride_entries)
+            for size in args.sizes for ways in args.ways for line_size in args.lines for replacement in args.replacement]
+    # the workers map the accesses from temporary files rather than each
+    # getting a copy
+    with tempfile.TemporaryDirectory() as directory:
+        for (name, array) in [('pc', pcs), ('addr', addrs), ('write', writes)]:
+            np.save(os.path.join(directory, name + '.npy'), array)
+        del pcs, addrs, writes
+        with multiprocessing.Pool(min(jobs, len(points)), init_worker, (directory,)) as pool:
+            results = [r for point_results in pool.map(simulate, points) for r in point_results]
+    print_results(results)
+
+    if args.csv is not None:
+        with open(args.csv, 'w', newline = '') as f:
+            writer = csv.DictWriter(f, fieldnames = list(results[0].keys()))
+            writer.writeheader()
+            writer.writerows(results)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2016 Massachusetts Institute of Technology
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, copy,
+# modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# Replays a PrintTrace text trace or a BinaryTrace dump through a timing
+# model of the RV32IM_3stage pipeline (mkThreeStageCore in Core.bsv) and
+# attributes every cycle beyond one per instruction to a cause, overall and
+# per pc.
+#
+# In Core.bsv an instruction is fetched (F), executed (E) and written back
+# (W) by three rules that can all fire in the same cycle, writeback first:
+#
+#   - fetch only starts once execute has worked out the next pc, so
+#     F[i+1] = E[i] (there is no next pc prediction), or W[i] when the
+#     writeback of i redirects fetch (a trap or an xRET)
+#   - execute waits for the instruction, E[i+1] >= F[i+1] + imem latency,
+#     and for the writeback stage to be empty, E[i+1] >= W[i]
+#   - writeback waits for the load data (dmem, or the RTC and MMIO above
+#     0x20000000) or for mkBoothRoughMulDivExec: W[i] = E[i] + latency
+#
+# The register file bypasses the writeback into execute (mkBypassArchRFile,
+# the same ordering as mkBypassingScoreboard), so RAW dependences never
+# stall the core as built. --no-bypass models a register file read before
+# the write, where a dependent instruction executes the cycle after its
+# producer writes back (mkScoreboard), and --predictor models a next-line
+# or perfect next pc predictor with a fetch queue that lets fetch run ahead
+# of execute, F[i+1] = F[i] + 1, until a mispredicted next pc is fixed in
+# execute, F[i+1] = E[i]. With these options
+# E[i+1] - E[i] only depends on instructions i and i+1, so the model is
+# exact per instruction and a trace can be split into segments modelled in
+# parallel.
+#
+# The lost cycles after each instruction are attributed in layers: the
+# wait for its writeback (memory or muldiv), then the wait for the next
+# instruction to be fetched (mispredict, or every instruction with
+# --predictor none and an imem latency above 1), then a RAW stall (data),
+# then the refetch after a trap or xRET (trap). Pipeline fill, WFI and
+# skipped packets aren't modelled.
+
+import argparse
+import multiprocessing
+import sys
+
+import numpy as np
+
+import tracelib
+
+causes = ['memory', 'muldiv', 'mispredict', 'data', 'trap']
+
+# mkBoothMultiplier takes (XLEN + 2) / 2 steps and mkRoughDivider XLEN + 1,
+# after the cycle that starts them
+default_mul_latency = 18
+default_div_latency = 34
+
+mmio_base = 0x20000000
+
+predictors = ['none', 'next-line', 'perfect']
+
+# mret and sret redirect fetch from writeback (RedirectPC in RVCsrFile.bsv)
+xret_instructions = (0x30200073, 0x10200073)
+
+class Model:
+    def __init__(self, decoder, imem_latency, dmem_latency, mmio_latency, mul_latency, div_latency, predictor, bypass):
+        assert predictor in predictors, 'unknown predictor %s' % predictor
+        self.decoder = decoder
+        self.imem_latency = imem_latency
+        self.dmem_latency = dmem_latency
+        self.mmio_latency = mmio_latency
+        self.mul_latency = mul_latency
+        self.div_latency = div_latency
+        self.predictor = predictor
+        self.bypass = bypass
+
+    def registers(self, inst, types, field, shift):
+        # Register numbers (0-31 for x, 32-63 for f) read from a field of
+        # inst, -1 where the instruction doesn't have that register or it is
+        # x0
+        reg = (inst >> shift) & 0x1f
+        kind = types[field]
+        reg = np.where(kind == 3, reg + 32, reg)
+        return np.where((kind == 0) | ((kind == 2) & (reg == 0)), -1, reg)
+
+    def lost_cycles(self, records, last):
+        # Returns a (len(causes), n) array of the cycles lost after each of
+        # the n packets in records, not counting the last one unless last
+        # is True (the end of the trace), since that depends on the packet
+        # after it
+        inst = records['instruction'].astype(np.int64)
+        pc = records['pc'].astype(np.int64)
+        trap = records['exception'] | records['interrupt']
+        types = self.decoder.inst_types_array(self.decoder.decode_array(inst))
+        opcode = inst & 0x7f
+        funct3 = (inst >> 12) & 0x7
+        muldiv = ((opcode == 0x33) | (opcode == 0x3b)) & ((inst >> 25) == 1) & ~trap
+        # loads and AMOs wait for a response; stores don't
+        load = ((opcode == 0x03) | (opcode == 0x07) | (opcode == 0x2f)) & ~trap
+        latency = np.ones(len(inst), np.int64)
+        latency = np.where(load, np.where(records['addr'] >= mmio_base, self.mmio_latency, self.dmem_latency), latency)
+        latency = np.where(muldiv, np.where(funct3 < 4, self.mul_latency, self.div_latency), latency)
+
+        n = len(inst) if last else len(inst) - 1
+        lost = np.zeros((len(causes), n), np.int64)
+        if n == 0:
+            return lost
+        # writeback
+        level = latency[:n]
+        lost[causes.index('memory')] = np.where(load[:n], level - 1, 0)
+        lost[causes.index('muldiv')] = np.where(muldiv[:n], level - 1, 0)
+        if last:
+            n = n - 1
+            level = level[:n]
+        # fetch of the next instruction
+        redirect = trap[:n] | np.isin(inst[:n], xret_instructions)
+        if self.predictor == 'none':
+            predicted = np.zeros(n, bool)
+        elif self.predictor == 'next-line':
+            predicted = pc[1:n + 1] == pc[:n] + np.where(inst[:n] & 0x3 == 0x3, 4, 2)
+        else:
+            predicted = np.ones(n, bool)
+        fetch = np.where(predicted, 1, self.imem_latency)
+        lost[causes.index('mispredict'), :n] = np.maximum(fetch - level, 0)
+        level = np.maximum(level, fetch)
+        # RAW dependence of the next instruction on this one
+        if not self.bypass:
+            rd = np.where(trap, -1, self.registers(inst, types, 'rd', 7))[:n]
+            depends = np.zeros(n, bool)
+            for (field, shift) in [('rs1', 15), ('rs2', 20), ('rs3', 27)]:
+                depends |= (self.registers(inst, types, field, shift)[1:n + 1] == rd) & (rd >= 0)
+            hazard = np.where(depends, latency[:n] + 1, 0)
+            lost[causes.index('data'), :n] = np.maximum(hazard - level, 0)
+            level = np.maximum(level, hazard)
+        # refetch after a redirect from writeback
+        refetch = np.where(redirect, latency[:n] + self.imem_latency, 0)
+        lost[causes.index('trap'), :n] = np.maximum(refetch - level, 0)
+        return lost
+
+class SegmentStats:
+    # Cycle counts for a contiguous piece of a trace. The cycles after the
+    # last packet depend on the packet after it, so it is kept (tail) to be
+    # modelled with the next segment's first packet (head); see
+    # TraceStats.add.
+    def __init__(self):
+        self.packets = 0
+        self.retired = 0
+        self.lost = np.zeros(len(causes), np.int64)
+        # pc -> [executions, lost cycles by cause...]
+        self.pcs = {}
+        self.insts = {}
+        self.head = None
+        self.tail = None
+
+    def add_lost(self, records, lost):
+        self.lost += lost.sum(axis = 1)
+        (pcs, first, index) = np.unique(records['pc'][:lost.shape[1]], return_index = True, return_inverse = True)
+        counts = np.bincount(index, minlength = len(pcs))
+        by_cause = [np.bincount(index, weights = row, minlength = len(pcs)).astype(np.int64) for row in lost]
+        rows = np.stack([counts] + by_cause, axis = 1).tolist()
+        insts = records['instruction'][first].tolist()
+        for (pc, row, inst) in zip(pcs.tolist(), rows, insts):
+            if pc in self.pcs:
+                total = self.pcs[pc]
+                for i in range(len(row)):
+                    total[i] += row[i]
+            else:
+                self.pcs[pc] = row
+                self.insts[pc] = inst
+
+    def model(self, model, chunks):
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            self.packets += len(chunk)
+            self.retired += int(np.count_nonzero(~(chunk['exception'] | chunk['interrupt'])))
+            if self.head is None:
+                self.head = chunk[:1].copy()
+            if self.tail is not None:
+                chunk = np.concatenate((self.tail, chunk))
+            self.add_lost(chunk, model.lost_cycles(chunk, False))
+            self.tail = chunk[-1:].copy()
+        return self
+
+def trace_chunks(packets, chunk_packets):
+    # Groups (VerificationPacket, disassembly) pairs into arrays of binary
+    # trace records
+    chunk = []
+    for (p, disasm) in packets:
+        chunk.append((p.skipped_packets, p.pc, p.data, p.addr, p.instruction, p.dst, p.exception, p.interrupt, p.cause))
+        if len(chunk) == chunk_packets:
+            yield np.array(chunk, tracelib.binary_trace_fields)
+            chunk = []
+    if len(chunk) > 0:
+        yield np.array(chunk, tracelib.binary_trace_fields)
+
+def segment_chunks(filename, start, end, chunk_packets, chunk_size):
+    if tracelib.is_binary_trace(filename):
+        records = tracelib.open_binary_trace(filename)
+        for i in range(start, end, chunk_packets):
+            yield records[i:min(i + chunk_packets, end)]
+    else:
+        yield from trace_chunks(tracelib.parse_trace(tracelib.read_lines(filename, start, end, chunk_size)), chunk_packets)
+
+def init_worker(meta, isa, model_args):
+    global worker_model
+    worker_model = Model(tracelib.load_rvmeta(meta, isa).get_decoder(), *model_args)
+
+def model_segment(segment):
+    (filename, start, end, chunk_packets, chunk_size) = segment
+    return SegmentStats().model(worker_model, segment_chunks(filename, start, end, chunk_packets, chunk_size))
+
+class TraceStats(SegmentStats):
+    # The counts for a whole trace, built by adding SegmentStats in trace
+    # order
+    def add(self, model, segment):
+        if segment.head is None:
+            # no packets
+            return
+        self.packets += segment.packets
+        self.retired += segment.retired
+        self.lost += segment.lost
+        for (pc, row) in segment.pcs.items():
+            if pc in self.pcs:
+                total = self.pcs[pc]
+                for i in range(len(row)):
+                    total[i] += row[i]
+            else:
+                self.pcs[pc] = list(row)
+                self.insts[pc] = segment.insts[pc]
+        if self.tail is not None:
+            boundary = np.concatenate((self.tail, segment.head))
+            self.add_lost(boundary, model.lost_cycles(boundary, False))
+        self.tail = segment.tail
+
+    def finish(self, model):
+        # the last packet of the trace
+        if self.tail is not None:
+            self.add_lost(self.tail, model.lost_cycles(self.tail, True))
+            self.tail = None
+
+    def report(self, decoder, top):
+        lost = int(self.lost.sum())
+        cycles = self.packets + lost
+        print('%d packets, %d instructions retired, %d cycles, CPI %.4f' % (self.packets, self.retired, cycles, cycles / self.retired if self.retired > 0 else 0.0))
+        if self.packets == 0:
+            return
+
+        print('')
+        print('Cycles by cause:')
+        print('    %-12s %14s %7s %8s' % ('cause', 'cycles', '%', 'CPI'))
+        rows = [('base', self.packets)] + list(zip(causes, self.lost.tolist()))
+        for (cause, count) in rows:
+            print('    %-12s %14d %6.2f%% %8.4f' % (cause, count, 100.0 * count / cycles, count / max(self.retired, 1)))
+
+        print('')
+        print('Stall hotspots (cycles lost after the instruction at each pc):')
+        print('    %-10s %12s %12s %6s %7s  %s  %s' % ('pc', 'executions', 'lost', '%', 'avg', ' '.join('%10s' % cause for cause in causes), 'instruction'))
+        hot = sorted(((sum(row[1:]), pc) for (pc, row) in self.pcs.items() if sum(row[1:]) > 0), reverse = True)[:top]
+        for (pc_lost, pc) in hot:
+            row = self.pcs[pc]
+            print('    0x%08x %12d %12d %5.2f%% %7.2f  %s  %s' % (pc, row[0], pc_lost, 100.0 * pc_lost / max(lost, 1), pc_lost / row[0],
+                    ' '.join('%10d' % count for count in row[1:]), tracelib.disassemble(decoder, self.insts[pc])))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Model the CPI of RV32IM_3stage on a PrintTrace text trace or a binary trace.')
+    parser.add_argument('trace', help = "trace file, or '-' for stdin")
+    parser.add_argument('--isa', default = 'rv32:im',
+            help = 'base:extensions used to decode instructions (default: rv32:im)')
+    parser.add_argument('--meta', default = tracelib.default_meta_dir,
+            help = 'path to riscv-meta/meta')
+    parser.add_argument('--imem-latency', type = int, default = 1,
+            help = 'cycles from an instruction fetch to its execute (default: 1, the BRAM)')
+    parser.add_argument('--dmem-latency', type = int, default = 1,
+            help = 'cycles from a load executing to its writeback (default: 1, the BRAM)')
+    parser.add_argument('--mmio-latency', type = int, default = 2,
+            help = 'the same for loads from the RTC and MMIO, at 0x%x and up (default: 2)' % mmio_base)
+    parser.add_argument('--mul-latency', type = int, default = default_mul_latency,
+            help = 'cycles from a multiply executing to its writeback (default: %d, mkBoothMultiplier)' % default_mul_latency)
+    parser.add_argument('--div-latency', type = int, default = default_div_latency,
+            help = 'the same for divides and remainders (default: %d, mkRoughDivider)' % default_div_latency)
+    parser.add_argument('--predictor', default = 'none', choices = predictors,
+            help = "next pc prediction in fetch (default: none, as in Core.bsv)")
+    parser.add_argument('--no-bypass', action = 'store_true',
+            help = "don't bypass writeback results into execute")
+    parser.add_argument('-n', '--top', type = int, default = 20,
+            help = 'number of stall hotspots to list')
+    parser.add_argument('-j', '--jobs', type = int, default = None,
+            help = 'number of worker processes')
+    parser.add_argument('--chunk-packets', type = int, default = 1 << 20,
+            help = 'packets modelled at a time')
+    parser.add_argument('--chunk-size', type = int, default = 1 << 24,
+            help = 'bytes read at a time from a text trace')
+    args = parser.parse_args()
+
+    for latency in [args.imem_latency, args.dmem_latency, args.mmio_latency, args.mul_latency, args.div_latency]:
+        assert latency >= 1, 'latencies are at least 1 cycle'
+    model_args = (args.imem_latency, args.dmem_latency, args.mmio_latency, args.mul_latency, args.div_latency, args.predictor, not args.no_bypass)
+    decoder = tracelib.load_rvmeta(args.meta, args.isa).get_decoder()
+    model = Model(decoder, *model_args)
+    stats = TraceStats()
+    if args.trace == '-':
+        packets = tracelib.parse_trace(line.rstrip(b'\n') for line in sys.stdin.buffer)
+        stats.add(model, SegmentStats().model(model, trace_chunks(packets, args.chunk_packets)))
+    else:
+        jobs = args.jobs if args.jobs is not None else multiprocessing.cpu_count()
+        segments = [(args.trace, start, end, args.chunk_packets, args.chunk_size) for (start, end) in tracelib.split_segments(args.trace, 4 * jobs)]
+        if jobs == 1:
+            worker_model = model
+            for segment in segments:
+                stats.add(model, model_segment(segment))
+        else:
+            with multiprocessing.Pool(jobs, init_worker, (args.meta, args.isa, model_args)) as pool:
+                for segment in pool.imap(model_segment, segments):
+                    stats.add(model, segment)
+    stats.finish(model)
+    stats.report(decoder, args.top)
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2016 Massachusetts Institute of Technology
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, copy,
+# modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# Mines retired-instruction traces (PrintTrace text or BinaryTrace) for
+# macro-op fusion candidates: adjacent instructions where the second reads
+# the first one's result, and adjacent loads or stores to neighbouring
+# addresses off the same base register. Pairs and triples are counted by
+# their decoded instructions and register-dependence pattern with a bounded
+# heavy-hitter summary, so traces of any length fit in memory, and ranked
+# by dynamic frequency. Instructions that match a single-instruction pseudo
+# in riscv-meta's pseudos table are named by the pseudo (e.g. li, mv), and
+# candidates that spell out a multi-instruction pseudo are marked with it.
+
+import argparse
+import collections
+import multiprocessing
+import sys
+
+import goldenmodel
+import tracelib
+
+class HeavyHitters:
+    # Misra-Gries frequent items summary that keeps between capacity and
+    # 2 * capacity counters. Counts are never overestimated, and are
+    # underestimated by at most error. Summaries of different parts of a
+    # stream can be merged.
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = collections.Counter()
+        self.error = 0
+
+    def add(self, key, count = 1):
+        self.counts[key] += count
+        if len(self.counts) > 2 * self.capacity:
+            self.prune()
+
+    def prune(self):
+        # subtract the count of the (capacity + 1)th largest key from every
+        # key and forget the ones that drop to 0
+        cut = sorted(self.counts.values(), reverse = True)[self.capacity]
+        self.counts = collections.Counter(dict((key, count - cut) for (key, count) in self.counts.items() if count > cut))
+        self.error = self.error + cut
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.error = self.error + other.error
+        if len(self.counts) > 2 * self.capacity:
+            self.prune()
+
+    def most_common(self, n):
+        return self.counts.most_common(n)
+
+def parse_pseudos(rows):
+    # riscv-meta/meta/pseudos rows are: pseudo, the base instruction (or
+    # instructions, separated by commas), then operand=value constraints;
+    # other columns (such as the ISAs it belongs to) are ignored.
+    # Returns ({base: [(pseudo, constraints)]}, {(bases): pseudo}).
+    aliases = collections.defaultdict(list)
+    sequences = {}
+    for row in rows:
+        if len(row) < 2:
+            continue
+        bases = tuple(row[1].split(','))
+        constraints = []
+        for constraint in ','.join(row[2:]).split(','):
+            if '=' in constraint:
+                (operand, value) = constraint.split('=', 1)
+                try:
+                    constraints.append((operand, int(value, 0)))
+                except ValueError:
+                    constraints = None
+                    break
+        if constraints is None:
+            continue
+        if len(bases) == 1:
+            aliases[bases[0]].append((row[0], constraints))
+        else:
+            sequences[bases] = row[0]
+    return (aliases, sequences)
+
+# major opcodes (inst[6:0]) of loads and stores; the access size is
+# 1 << (funct3 & 3)
+load_opcodes = (0x03, 0x07)
+store_opcodes = (0x23, 0x27)
+
+class Decoder:
+    # Decodes instruction words into (name, rd, sources, imm, memory), with
+    # registers numbered 0-31 for x and 32-63 for f, rd None for x0 or no
+    # destination, and memory ('load' or 'store', base, size) or None
+    def __init__(self, rvmeta, pseudos):
+        self.decoder = rvmeta.get_decoder()
+        (self.aliases, self.sequences) = pseudos
+        extractors = dict((name, goldenmodel.operand_extractor(operand)) for (name, operand) in rvmeta.operands.items())
+        self.inst_info = []
+        for ((inst_name, bsv_val, inst_args, inst_extension), selected) in zip(rvmeta.insts, rvmeta.selected):
+            if selected:
+                fields = [(arg, extractors[arg], rvmeta.operands[arg].is_imm()) for arg in inst_args]
+                self.inst_info.append((inst_name, fields))
+        self.cache = {}
+
+    def decode(self, inst):
+        if inst in self.cache:
+            return self.cache[inst]
+        index = self.decoder.decode(inst)
+        if index is None:
+            decoded = ('unknown', None, (), 0, None)
+        else:
+            (name, fields) = self.inst_info[index]
+            values = {}
+            imm = 0
+            for (arg, extract, is_imm) in fields:
+                value = extract(inst)
+                if is_imm:
+                    value = goldenmodel.signed(value)
+                    imm = value
+                values[arg] = value
+            regs = {}
+            for reg in ['rd', 'rs1', 'rs2', 'rs3']:
+                if reg in values:
+                    regs[reg] = values[reg]
+                elif 'f' + reg in values:
+                    regs[reg] = 32 + values['f' + reg]
+            rd = regs.get('rd')
+            if rd == 0:
+                rd = None
+            sources = tuple(regs.get(reg) for reg in ['rs1', 'rs2', 'rs3'])
+            memory = None
+            opcode = inst & 0x7f
+            if opcode in load_opcodes or opcode in store_opcodes:
+                memory = ('load' if opcode in load_opcodes else 'store', regs.get('rs1'), 1 << ((inst >> 12) & 3))
+            for (pseudo, constraints) in self.aliases.get(name, []):
+                if all(values.get(operand, imm if operand == 'imm' else None) == value for (operand, value) in constraints):
+                    name = pseudo
+                    break
+            decoded = (name, rd, sources, imm, memory)
+        self.cache[inst] = decoded
+        return decoded
+
+def dependence(a, b):
+    # The register-dependence pattern of b on a, or None if b doesn't depend
+    # on a and they aren't a load or store pair, e.g. 'rd>rs1,rd=rd': b
+    # reads a's rd as rs1 and overwrites it
+    (a_name, a_rd, a_sources, a_imm, a_memory) = a
+    (b_name, b_rd, b_sources, b_imm, b_memory) = b
+    reads = [name for (name, source) in zip(['rs1', 'rs2', 'rs3'], b_sources) if a_rd is not None and source == a_rd]
+    if len(reads) > 0:
+        pattern = 'rd>' + '+'.join(reads)
+        if b_rd == a_rd:
+            pattern = pattern + ',rd=rd'
+        return pattern
+    if a_memory is not None and b_memory is not None and a_memory == b_memory:
+        # same kind, base and size; the base mustn't be overwritten by a
+        (kind, base, size) = a_memory
+        if a_rd != base and abs(b_imm - a_imm) == size:
+            return '%s pair %+d' % (kind, b_imm - a_imm)
+    return None
+
+class SegmentMiner:
+    # Candidate counts for a contiguous piece of a trace. Pairs and triples
+    # are only formed from packets that follow on from each other (next pc,
+    # no trap, no skipped packets), so the one or two candidates that span
+    # the boundary between two segments are not counted.
+    def __init__(self, capacity):
+        self.instructions = 0
+        self.pairs = HeavyHitters(capacity)
+        self.triples = HeavyHitters(capacity)
+        self.pair_patterns = collections.Counter()
+        self.pair_count = 0
+        self.triple_count = 0
+
+    def mine(self, packets, decoder):
+        pairs = self.pairs
+        triples = self.triples
+        pair_patterns = self.pair_patterns
+        # the previous two instructions, and b's pattern on a
+        a = None
+        b = None
+        ab = None
+        next_pc = None
+        for (packet, disasm) in packets:
+            if packet.exception or packet.interrupt or packet.skipped_packets != 0 or packet.pc != next_pc:
+                a = None
+                b = None
+            if packet.exception or packet.interrupt:
+                next_pc = None
+                continue
+            self.instructions = self.instructions + 1
+            c = decoder.decode(packet.instruction)
+            next_pc = packet.pc + tracelib.inst_length(packet.instruction)
+            bc = dependence(b, c) if b is not None else None
+            if bc is not None:
+                self.pair_count = self.pair_count + 1
+                pairs.add((b[0], c[0], bc))
+                pair_patterns[bc] += 1
+                if ab is not None and a is not None:
+                    self.triple_count = self.triple_count + 1
+                    triples.add((a[0], b[0], c[0], ab + ' | ' + bc))
+            a = b
+            b = c
+            ab = bc
+        return self
+
+    def merge(self, other):
+        self.instructions = self.instructions + other.instructions
+        self.pairs.merge(other.pairs)
+        self.triples.merge(other.triples)
+        self.pair_patterns.update(other.pair_patterns)
+        self.pair_count = self.pair_count + other.pair_count
+        self.triple_count = self.triple_count + other.triple_count
+
+    def report(self, sequences, top):
+        total = self.instructions
+        print('%d instructions, %d dependent or paired adjacent pairs, %d chained triples' % (total, self.pair_count, self.triple_count))
+        if total == 0:
+            return
+        for (title, summary, count) in [('pairs', self.pairs, self.pair_count), ('triples', self.triples, self.triple_count)]:
+            print('')
+            print('Top %s by dynamic frequency (counts may be low by up to %d):' % (title, summary.error))
+            for (key, n) in summary.most_common(top):
+                names = key[:-1]
+                pseudo = sequences.get(tuple(names))
+                print(('    %12d %6.2f%%  %-32s %-28s %s' % (n, 100.0 * n / total, ' + '.join(names), key[-1], pseudo if pseudo is not None else '')).rstrip())
+        print('')
+        print('Pairs by register-dependence pattern:')
+        for (pattern, n) in self.pair_patterns.most_common(top):
+            print('    %12d %6.2f%%  %s' % (n, 100.0 * n / total, pattern))
+
+# the decoder of each worker process, set up by init_worker
+worker_decoder = None
+
+def load_decoder(meta, isa):
+    rvmeta = tracelib.load_rvmeta(meta, isa)
+    return Decoder(rvmeta, parse_pseudos(rvmeta.meta['pseudos']))
+
+def init_worker(meta, isa):
+    global worker_decoder
+    worker_decoder = load_decoder(meta, isa)
+
+def mine_segment(segment):
+    (filename, start, end, chunk_size, capacity) = segment
+    if tracelib.is_binary_trace(filename):
+        packets = tracelib.binary_trace_packets(tracelib.open_binary_trace(filename)[start:end])
+    else:
+        packets = tracelib.parse_trace(tracelib.read_lines(filename, start, end, chunk_size))
+    return SegmentMiner(capacity).mine(packets, worker_decoder)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Find macro-op fusion candidates in a PrintTrace text trace or a binary trace.')
+    parser.add_argument('trace', help = "trace file, or '-' for stdin")
+    parser.add_argument('--isa', default = 'rv64:imafds',
+            help = 'base:extensions used to decode instructions (default: rv64:imafds)')
+    parser.add_argument('--meta', default = tracelib.default_meta_dir,
+            help = 'path to riscv-meta/meta')
+    parser.add_argument('-n', '--top', type = int, default = 30,
+            help = 'number of entries in each table')
+    parser.add_argument('--capacity', type = int, default = 4096,
+            help = 'counters kept for pairs and for triples (default: 4096)')
+    parser.add_argument('-j', '--jobs', type = int, default = None,
+            help = 'number of worker processes')
+    parser.add_argument('--chunk-size', type = int, default = 1 << 24,
+            help = 'bytes read at a time')
+    args = parser.parse_args()
+
+    decoder = load_decoder(args.meta, args.isa)
+    miner = SegmentMiner(args.capacity)
+    if args.trace == '-':
+        miner.mine(tracelib.parse_trace(line.rstrip(b'\n') for line in sys.stdin.buffer), decoder)
+    else:
+        jobs = args.jobs if args.jobs is not None else multiprocessing.cpu_count()
+        segments = [(args.trace, start, end, args.chunk_size, args.capacity) for (start, end) in tracelib.split_segments(args.trace, 4 * jobs)]
+        if jobs == 1:
+            worker_decoder = decoder
+            for segment in segments:
+                miner.merge(mine_segment(segment))
+        else:
+            with multiprocessing.Pool(jobs, init_worker, (args.meta, args.isa)) as pool:
+                for segment in pool.imap(mine_segment, segments):
+                    miner.merge(segment)
+    miner.report(decoder.sequences, args.top)
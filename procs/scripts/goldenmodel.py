@@ -0,0 +1,1393 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2016 Massachusetts Institute of Technology
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, copy,
+# modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# A table-driven RV64IMAFD instruction set model, for checking the
+# processors without a Spike build. Instructions are decoded with the
+# InstDecoder built from riscv-meta by codegen/scripts/meta-parse.py, and
+# their operands are pulled out with the bit maps of meta-parse's
+# RiscvOperands. Each instruction is predecoded once into a closure from a
+# per-instruction dispatch table, and straight-line runs of closures are
+# cached as basic blocks keyed by their start pc.
+#
+# The model follows the processors where the ISA leaves a choice:
+# the machine state and trap handling of procs/riscy-lib/RVCsrFile.bsv
+# (privileged spec 1.9), single precision results zero-extended as in
+# RVFpu.bsv, and the ROM, RAM and RTC layout of
+# procs/connectal/cpp/Platform.cpp. Only bare (untranslated) addressing and
+# uncompressed instructions are supported.
+#
+# It either runs an ELF on its own, with HTIF tohost/fromhost handling for
+# riscv-tests, or replays a trace from PrintTrace or BinaryTrace against the
+# same ELF the way SpikeTandemVerifier would, and reports the first packet
+# that doesn't match.
+
+import argparse
+import collections
+import operator
+import struct
+import sys
+
+import softfloat
+import tracelib
+
+M64 = (1 << 64) - 1
+
+# Platform.cpp memory map
+rom_base = 0x0
+rom_size = 0x10000
+reset_vector = 0x1000
+ram_base = 0x80000000
+default_ram_size = 64 << 20
+rtc_base = 0x40000000
+rtc_size = 0x10000
+# cycles per RTC tick in MemoryMappedCSRs.bsv; the model counts
+# instructions instead of cycles
+rtc_period = 1000
+
+# privilege levels
+prv_u = 0
+prv_s = 1
+prv_m = 3
+
+# exception causes, as in tracelib.exception_causes
+cause_misaligned_fetch = 0
+cause_fetch_fault = 1
+cause_illegal = 2
+cause_breakpoint = 3
+cause_misaligned_load = 4
+cause_load_fault = 5
+cause_misaligned_store = 6
+cause_store_fault = 7
+cause_ecall = 8
+# causes that set mbadaddr or sbadaddr
+badaddr_causes = (0, 1, 4, 5, 6, 7)
+
+# fesvr syscalls used by the riscv-tests benchmarks
+sys_write = 64
+sys_exit = 93
+enosys = 38
+
+class Trap(Exception):
+    # a synchronous exception raised while executing an instruction
+    def __init__(self, cause, badaddr = 0):
+        Exception.__init__(self, cause, badaddr)
+        self.cause = cause
+        self.badaddr = badaddr
+
+class ModelError(Exception):
+    # something the program does that the model doesn't implement
+    pass
+
+def sext32(value):
+    return (((value & 0xffffffff) ^ 0x80000000) - 0x80000000) & M64
+
+def signed(value):
+    return value - (1 << 64) if value >> 63 else value
+
+def signed32(value):
+    return ((value & 0xffffffff) ^ 0x80000000) - 0x80000000
+
+def read_elf(filename):
+    # Returns ([(paddr, data, memsz)] for the PT_LOAD segments,
+    # {name: value} for the symbols) of a little endian ELF64 file
+    with open(filename, 'rb') as f:
+        elf = f.read()
+    assert elf[0:4] == b'\x7fELF', '%s is not an ELF file' % filename
+    assert elf[4] == 2 and elf[5] == 1, '%s is not a little endian ELF64 file' % filename
+    (e_phoff, e_shoff) = struct.unpack_from('<QQ', elf, 0x20)
+    (e_phentsize, e_phnum, e_shentsize, e_shnum) = struct.unpack_from('<HHHH', elf, 0x36)
+    segments = []
+    for i in range(e_phnum):
+        (p_type, p_flags, p_offset, p_vaddr, p_paddr, p_filesz, p_memsz) = struct.unpack_from('<IIQQQQQ', elf, e_phoff + i * e_phentsize)
+        if p_type == 1:
+            segments.append((p_paddr, elf[p_offset:p_offset + p_filesz], p_memsz))
+    symbols = {}
+    sections = [struct.unpack_from('<IIQQQQIIQQ', elf, e_shoff + i * e_shentsize) for i in range(e_shnum)]
+    for (sh_name, sh_type, sh_flags, sh_addr, sh_offset, sh_size, sh_link, sh_info, sh_addralign, sh_entsize) in sections:
+        if sh_type != 2:
+            # not SHT_SYMTAB
+            continue
+        strtab_offset = sections[sh_link][4]
+        for offset in range(sh_offset, sh_offset + sh_size, 24):
+            (st_name, st_info, st_other, st_shndx, st_value, st_size) = struct.unpack_from('<IBBHQQ', elf, offset)
+            name_end = elf.index(b'\0', strtab_offset + st_name)
+            symbols[elf[strtab_offset + st_name:name_end].decode()] = st_value
+    return (segments, symbols)
+
+class Memory:
+    # Physical memory: the boot ROM, RAM and the memory mapped RTC, plus the
+    # HTIF tohost word
+    def __init__(self, ram_size, clock):
+        self.ram = bytearray(ram_size)
+        self.ram_end = ram_base + ram_size
+        self.rom = bytearray(rom_size)
+        # reset vector and config string from Platform::init
+        reset_vec = [0x297 + (ram_base - reset_vector), 0x00028067, 0, reset_vector + 0x20, 0, 0, 0, 0]
+        self.rom[reset_vector:reset_vector + 32] = struct.pack('<8I', *reset_vec)
+        config = ('platform {\n  vendor ucb;\n  arch spike;\n};\n'
+                'rtc {\n  addr 0x%x;\n};\n'
+                'ram {\n  0 {\n    addr 0x%x;\n    size 0x%x;\n  };\n};\n'
+                'core {\n  0 {\n    0 {\n      isa rv64imafd;\n      timecmp 0x%x;\n      ipi 0x%x;\n    };\n  };\n};\n'
+                % (rtc_base, ram_base, ram_size, rtc_base + 8, rtc_base + 0x1000))
+        self.rom[reset_vector + 0x20:reset_vector + 0x20 + len(config)] = config.encode()
+        # RTC state; clock returns the instruction count the timer runs off
+        self.clock = clock
+        self.time_offset = 0
+        self.timecmp = M64
+        self.ipi = 0
+        self.tohost = None
+        self.fromhost = None
+        self.tohost_written = False
+        # set by loads that read a value the model can't predict
+        self.unpredictable = False
+
+    def load_elf(self, filename):
+        (segments, symbols) = read_elf(filename)
+        for (paddr, data, memsz) in segments:
+            self.write_bytes(paddr, data + bytes(memsz - len(data)))
+        self.tohost = symbols.get('tohost')
+        self.fromhost = symbols.get('fromhost')
+
+    def buffer(self, addr, size):
+        # (bytearray, offset) holding size bytes at addr, or None
+        if ram_base <= addr and addr + size <= self.ram_end:
+            return (self.ram, addr - ram_base)
+        if rom_base <= addr and addr + size <= rom_base + rom_size:
+            return (self.rom, addr - rom_base)
+        return None
+
+    def read_bytes(self, addr, size):
+        location = self.buffer(addr, size)
+        assert location is not None, 'host access to unmapped address 0x%x' % addr
+        (buf, offset) = location
+        return bytes(buf[offset:offset + size])
+
+    def write_bytes(self, addr, data):
+        location = self.buffer(addr, len(data))
+        assert location is not None, 'host access to unmapped address 0x%x' % addr
+        (buf, offset) = location
+        buf[offset:offset + len(data)] = data
+
+    def time(self):
+        return (self.clock() // rtc_period + self.time_offset) & M64
+
+    def fetch(self, addr):
+        if addr & 3:
+            raise Trap(cause_misaligned_fetch, addr)
+        offset = addr - ram_base
+        if 0 <= offset and addr + 4 <= self.ram_end:
+            return int.from_bytes(self.ram[offset:offset + 4], 'little')
+        if rom_base <= addr and addr + 4 <= rom_base + rom_size:
+            return int.from_bytes(self.rom[addr - rom_base:addr - rom_base + 4], 'little')
+        raise Trap(cause_fetch_fault, addr)
+
+    def load(self, addr, size, misaligned = cause_misaligned_load, fault = cause_load_fault):
+        if addr & (size - 1):
+            raise Trap(misaligned, addr)
+        offset = addr - ram_base
+        if 0 <= offset and addr + size <= self.ram_end:
+            return int.from_bytes(self.ram[offset:offset + size], 'little')
+        if rom_base <= addr and addr + size <= rom_base + rom_size:
+            return int.from_bytes(self.rom[addr - rom_base:addr - rom_base + size], 'little')
+        if rtc_base <= addr < rtc_base + rtc_size and size == 8:
+            # mtime and the IPI register change under the program's feet
+            offset = addr - rtc_base
+            if offset == 0:
+                self.unpredictable = True
+                return self.time()
+            if offset == 8:
+                return self.timecmp
+            if offset == 0x1000:
+                self.unpredictable = True
+                return self.ipi
+        raise Trap(fault, addr)
+
+    def store(self, addr, size, value, misaligned = cause_misaligned_store, fault = cause_store_fault):
+        if addr & (size - 1):
+            raise Trap(misaligned, addr)
+        offset = addr - ram_base
+        if 0 <= offset and addr + size <= self.ram_end:
+            self.ram[offset:offset + size] = (value & ((1 << (8 * size)) - 1)).to_bytes(size, 'little')
+            if addr & ~7 == self.tohost:
+                self.tohost_written = True
+            return
+        if rtc_base <= addr < rtc_base + rtc_size and size == 8:
+            offset = addr - rtc_base
+            if offset == 0:
+                self.time_offset = (value - self.clock() // rtc_period) & M64
+                return
+            if offset == 8:
+                self.timecmp = value
+                return
+            if offset == 0x1000:
+                self.ipi = value & 1
+                return
+        # the boot ROM is read only
+        raise Trap(fault, addr)
+
+# Immediate and register operands of RiscvOperand, as functions of the
+# instruction bits
+def operand_extractor(operand):
+    # groups the bit map into runs of consecutive bits:
+    # (instruction bit, value bit, width)
+    runs = []
+    for value_bit in sorted(operand.bit_map):
+        inst_bit = operand.bit_map[value_bit]
+        if runs and runs[-1][0] + runs[-1][2] == inst_bit and runs[-1][1] + runs[-1][2] == value_bit:
+            runs[-1][2] = runs[-1][2] + 1
+        else:
+            runs.append([inst_bit, value_bit, 1])
+    runs = [(inst_bit, value_bit, (1 << width) - 1) for (inst_bit, value_bit, width) in runs]
+    sign = 1 << max(operand.bit_map) if operand.is_simm() else 0
+    def extract(inst):
+        value = 0
+        for (inst_bit, value_bit, mask) in runs:
+            value = value | (((inst >> inst_bit) & mask) << value_bit)
+        # immediates are kept as unsigned XLEN values
+        return ((value ^ sign) - sign) & M64
+    return extract
+
+# Integer operations on unsigned XLEN values. Results are masked to XLEN
+# (or sign extended from 32 bits for the W instructions) by the caller.
+def div(a, b):
+    (a, b) = (signed(a), signed(b))
+    if b == 0:
+        return -1
+    q = abs(a) // abs(b)
+    return -q if (a < 0) != (b < 0) else q
+
+def rem(a, b):
+    (sa, sb) = (signed(a), signed(b))
+    if sb == 0:
+        return a
+    r = abs(sa) % abs(sb)
+    return -r if sa < 0 else r
+
+def divu(a, b):
+    return a // b if b != 0 else M64
+
+def remu(a, b):
+    return a % b if b != 0 else a
+
+def divw(a, b):
+    return div(sext32(a), sext32(b))
+
+def remw(a, b):
+    return rem(sext32(a), sext32(b))
+
+def divuw(a, b):
+    return divu(a & 0xffffffff, b & 0xffffffff) if b & 0xffffffff else M64
+
+def remuw(a, b):
+    return remu(a & 0xffffffff, b & 0xffffffff)
+
+alu_ops = {
+    'add': operator.add,
+    'sub': operator.sub,
+    'sll': lambda a, b: a << (b & 63),
+    'slt': lambda a, b: int(signed(a) < signed(b)),
+    'sltu': lambda a, b: int(a < b),
+    'xor': operator.xor,
+    'srl': lambda a, b: a >> (b & 63),
+    'sra': lambda a, b: signed(a) >> (b & 63),
+    'or': operator.or_,
+    'and': operator.and_,
+    'mul': operator.mul,
+    'mulh': lambda a, b: (signed(a) * signed(b)) >> 64,
+    'mulhsu': lambda a, b: (signed(a) * b) >> 64,
+    'mulhu': lambda a, b: (a * b) >> 64,
+    'div': div,
+    'divu': divu,
+    'rem': rem,
+    'remu': remu,
+}
+alu_imm_ops = {
+    'addi': 'add', 'slti': 'slt', 'sltiu': 'sltu', 'xori': 'xor', 'ori': 'or',
+    'andi': 'and', 'slli': 'sll', 'srli': 'srl', 'srai': 'sra',
+}
+alu_word_ops = {
+    'addw': operator.add,
+    'subw': operator.sub,
+    'sllw': lambda a, b: a << (b & 31),
+    'srlw': lambda a, b: (a & 0xffffffff) >> (b & 31),
+    'sraw': lambda a, b: signed32(a) >> (b & 31),
+    'mulw': operator.mul,
+    'divw': divw,
+    'divuw': divuw,
+    'remw': remw,
+    'remuw': remuw,
+}
+alu_word_imm_ops = {'addiw': 'addw', 'slliw': 'sllw', 'srliw': 'srlw', 'sraiw': 'sraw'}
+
+branch_ops = {
+    'beq': operator.eq,
+    'bne': operator.ne,
+    'blt': lambda a, b: signed(a) < signed(b),
+    'bge': lambda a, b: signed(a) >= signed(b),
+    'bltu': operator.lt,
+    'bgeu': operator.ge,
+}
+
+# size in bytes and sign bit of the loaded value (0 for zero extension)
+load_ops = {
+    'lb': (1, 1 << 7), 'lh': (2, 1 << 15), 'lw': (4, 1 << 31), 'ld': (8, 0),
+    'lbu': (1, 0), 'lhu': (2, 0), 'lwu': (4, 0),
+}
+store_ops = {'sb': 1, 'sh': 2, 'sw': 4, 'sd': 8}
+
+# AMO operations on (memory value, register value, mask, sign bit) where
+# both values are zero extended to the access size
+def amo_signed(value, mask, sign):
+    return ((value & mask) ^ sign) - sign
+
+amo_ops = {
+    'amoswap': lambda a, b, mask, sign: b,
+    'amoadd': lambda a, b, mask, sign: a + b,
+    'amoxor': lambda a, b, mask, sign: a ^ b,
+    'amoand': lambda a, b, mask, sign: a & b,
+    'amoor': lambda a, b, mask, sign: a | b,
+    'amomin': lambda a, b, mask, sign: a if amo_signed(a, mask, sign) < amo_signed(b, mask, sign) else b,
+    'amomax': lambda a, b, mask, sign: a if amo_signed(a, mask, sign) > amo_signed(b, mask, sign) else b,
+    'amominu': lambda a, b, mask, sign: a if (a & mask) < (b & mask) else b,
+    'amomaxu': lambda a, b, mask, sign: a if (a & mask) > (b & mask) else b,
+}
+amo_sizes = {'w': 4, 'd': 8}
+
+fp_formats = {'s': softfloat.f32, 'd': softfloat.f64}
+fp_masks = {'s': 0xffffffff, 'd': M64}
+fp_sign_bits = {'s': 1 << 31, 'd': 1 << 63}
+
+# softfloat operations on (a, b, format, rounding mode)
+fp_arith_ops = {
+    'fadd': softfloat.add,
+    'fsub': lambda a, b, fmt, rm: softfloat.add(a, b, fmt, rm, True),
+    'fmul': softfloat.mul,
+    'fdiv': softfloat.div,
+}
+# fused multiply-add: (negate product, negate addend)
+fp_fma_ops = {
+    'fmadd': (False, False),
+    'fmsub': (False, True),
+    'fnmsub': (True, False),
+    'fnmadd': (True, True),
+}
+fp_compare_ops = {'feq': softfloat.eq, 'flt': softfloat.lt, 'fle': softfloat.le}
+# (width, signed) of the integer side of fcvt
+fp_int_types = {'w': (32, True), 'wu': (32, False), 'l': (64, True), 'lu': (64, False)}
+
+# CSRs that exist in RVCsrFile.bsv (isLegalCSR) on RV64, other than the
+# ones with extra conditions in GoldenModel.csr_legal
+plain_csrs = {
+    # name: writable bits
+    'sedeleg': 0xfff, 'sideleg': 0xfff, 'stvec': M64 & ~3, 'sscratch': M64,
+    'sepc': M64, 'scause': M64, 'sbadaddr': M64, 'sptbr': M64,
+    'medeleg': 0xfff, 'mideleg': 0xfff, 'mie': 0xbbb, 'mtvec': M64 & ~3,
+    'mscratch': M64, 'mepc': M64, 'mcause': M64, 'mbadaddr': M64,
+    'mbase': M64, 'mbound': M64, 'mibase': M64, 'mibound': M64,
+    'mdbase': M64, 'mdbound': M64, 'mucounteren': 7, 'mscounteren': 7,
+    'mucycle_delta': M64, 'mutime_delta': M64, 'muinstret_delta': M64,
+    'mscycle_delta': M64, 'mstime_delta': M64, 'msinstret_delta': M64,
+}
+read_only_csrs = ['misa', 'mvendorid', 'marchid', 'mimpid', 'mhartid', 'mcycle', 'mtime', 'minstret']
+# user and supervisor counters: (counter, delta CSR, counteren CSR,
+# counteren bit)
+counter_csrs = {
+    'cycle': ('cycle', 'mucycle_delta', 'mucounteren', 0),
+    'time': ('time', 'mutime_delta', 'mucounteren', 1),
+    'instret': ('instret', 'muinstret_delta', 'mucounteren', 2),
+    'scycle': ('cycle', 'mscycle_delta', 'mscounteren', 0),
+    'stime': ('time', 'mstime_delta', 'mscounteren', 1),
+    'sinstret': ('instret', 'msinstret_delta', 'mscounteren', 2),
+}
+# CSRs whose value the processor and the model can't agree on
+unpredictable_csrs = set(['cycle', 'time', 'instret', 'scycle', 'stime', 'sinstret',
+        'mcycle', 'mtime', 'minstret', 'mip', 'sip'])
+
+mstatus_mask = 0x1f0ffbbb   # everything but the hypervisor fields and sd
+sstatus_mask = 0x1f05e133   # the fields sstatus shows
+mstatus_fs = 0x6000
+mstatus_xs = 0x18000
+mstatus_sd = 1 << 63
+mstatus_vm_shift = 24
+mstatus_mprv = 1 << 17
+mip_mask = 0x33             # ssip, usip, stip and utip
+sip_mask = 0x3
+sie_mask = 0x333
+
+class GoldenModel:
+    def __init__(self, rvmeta, memory):
+        self.memory = memory
+        # x[32] takes the writes to x0, so x[0] always reads as zero
+        self.x = [0] * 33
+        self.f = [0] * 32
+        self.pc = reset_vector
+        self.prv = prv_m
+        self.instret = 0
+        self.reservation = None
+        self.exit_code = None
+        self.console = None
+
+        # CSR state
+        self.csrs = dict((name, 0) for name in plain_csrs)
+        self.csrs['mtvec'] = 0x1000
+        self.csrs['stvec'] = 0x8000
+        self.mstatus = 0
+        self.mip = 0
+        self.fflags = 0
+        self.frm = 0
+        misa = 1 << 63
+        for letter in 'i' + rvmeta.extension_letters + 'su':
+            if letter in 'imafdsu':
+                misa = misa | (1 << (ord(letter) - ord('a')))
+        self.misa = misa
+        # read CSR values that the model can't predict
+        self.unpredictable = False
+
+        # CSR address -> name, from riscv-meta
+        self.csr_names = dict((int(value[4:], 16), name) for (name, value, access) in rvmeta.csrs)
+
+        # instruction decoding: decoder ID -> (meta name, [(operand, extractor)])
+        self.decoder = rvmeta.get_decoder()
+        extractors = dict((name, operand_extractor(operand)) for (name, operand) in rvmeta.operands.items())
+        self.inst_info = []
+        for ((inst_name, bsv_val, inst_args, inst_extension), selected) in zip(rvmeta.insts, rvmeta.selected):
+            if not selected:
+                continue
+            fields = []
+            for arg in inst_args:
+                operand = rvmeta.operands[arg]
+                fields.append((arg, extractors[arg]))
+                # imm and csr name the immediate and the CSR number whatever
+                # riscv-meta calls them
+                if arg.startswith('csr'):
+                    fields.append(('csr', extractors[arg]))
+                elif operand.is_imm():
+                    fields.append(('imm', extractors[arg]))
+            is_fp = any(ext[-1] in 'fd' for ext in inst_extension)
+            self.inst_info.append((inst_name, fields, is_fp))
+        self.dispatch = [self.factory(inst_name, is_fp) for (inst_name, fields, is_fp) in self.inst_info]
+        # instruction -> (factory, operands)
+        self.decoded = {}
+        # start pc -> (closures, instructions)
+        self.blocks = {}
+        # the block being stepped through by step: (block, index, pc)
+        self.cursor = None
+
+    # Dispatch
+
+    def factory(self, inst_name, is_fp):
+        # The function that builds the closure executing an instruction.
+        # Factories take (pc, inst, operands) and return a function that
+        # executes the instruction and returns the next pc. is_fp is True
+        # for the F and D extensions.
+        (op, _, suffix) = inst_name.partition('.')
+        if inst_name in alu_ops:
+            return self.alu_factory(alu_ops[inst_name], 'rs2', M64)
+        if inst_name in alu_imm_ops:
+            return self.alu_factory(alu_ops[alu_imm_ops[inst_name]], 'imm', M64)
+        if inst_name in alu_word_ops:
+            return self.alu_factory(alu_word_ops[inst_name], 'rs2', None)
+        if inst_name in alu_word_imm_ops:
+            return self.alu_factory(alu_word_ops[alu_word_imm_ops[inst_name]], 'imm', None)
+        if inst_name in branch_ops:
+            return self.branch_factory(branch_ops[inst_name])
+        if inst_name in load_ops:
+            return self.load_factory(*load_ops[inst_name])
+        if inst_name in store_ops:
+            return self.store_factory(store_ops[inst_name])
+        if op in amo_ops and suffix in amo_sizes:
+            return self.amo_factory(amo_ops[op], amo_sizes[suffix])
+        if op in ('lr', 'sc') and suffix in amo_sizes:
+            return getattr(self, op + '_factory')(amo_sizes[suffix])
+        if op in ('csrrw', 'csrrs', 'csrrc', 'csrrwi', 'csrrsi', 'csrrci'):
+            return self.csr_factory(op[4], op.endswith('i'))
+        if op in ('flw', 'fld', 'fsw', 'fsd'):
+            return self.fp_factory(self.fp_memory_factory(op[1] == 'l', {'w': 4, 'd': 8}[op[2]]))
+        if is_fp:
+            return self.fp_factory(self.fp_op_factory(op, suffix))
+        return getattr(self, 'exec_' + inst_name.replace('.', '_'), None)
+
+    def predecode(self, pc, inst):
+        # Returns (closure, ends block) for the instruction inst at pc
+        decoded = self.decoded.get(inst)
+        if decoded is None:
+            index = self.decoder.decode(inst)
+            factory = None
+            operands = {}
+            if index is not None:
+                (inst_name, fields, is_fp) = self.inst_info[index]
+                factory = self.dispatch[index]
+                operands = dict((name, extract(inst)) for (name, extract) in fields)
+                operands['name'] = inst_name
+            decoded = (factory, operands)
+            self.decoded[inst] = decoded
+        (factory, operands) = decoded
+        if factory is None:
+            return (self.illegal(), True)
+        execute = factory(pc, inst, operands)
+        # control flow and system instructions end blocks
+        ends = inst & 0x7f in (0x63, 0x67, 0x6f, 0x73) or operands['name'] == 'fence.i'
+        return (execute, ends)
+
+    def illegal(self):
+        def execute():
+            raise Trap(cause_illegal)
+        return execute
+
+    def get_block(self, pc):
+        block = self.blocks.get(pc)
+        if block is not None:
+            return block
+        closures = []
+        insts = []
+        fetch = self.memory.fetch
+        block_pc = pc
+        while True:
+            try:
+                inst = fetch(block_pc)
+            except Trap:
+                if not closures:
+                    raise
+                break
+            # system instructions get a block to themselves so they see
+            # an up to date instret
+            if inst & 0x7f == 0x73 and closures:
+                break
+            (execute, ends) = self.predecode(block_pc, inst)
+            closures.append(execute)
+            insts.append(inst)
+            if ends or len(closures) == 64:
+                break
+            block_pc = block_pc + 4
+        block = (closures, insts)
+        self.blocks[pc] = block
+        return block
+
+    def flush_blocks(self):
+        # fence.i, sfence.vm, and turning the FPU on or off
+        self.blocks = {}
+        self.cursor = None
+
+    # Instruction factories
+
+    def alu_factory(self, op, source, mask):
+        # register-register and register-immediate integer instructions;
+        # mask None means sign extend a 32 bit result
+        def factory(pc, inst, operands):
+            x = self.x
+            rd = operands['rd'] or 32
+            rs1 = operands['rs1']
+            next_pc = pc + 4
+            if source == 'imm':
+                imm = operands['imm']
+                if mask is None:
+                    def execute():
+                        x[rd] = sext32(op(x[rs1], imm))
+                        return next_pc
+                else:
+                    def execute():
+                        x[rd] = op(x[rs1], imm) & M64
+                        return next_pc
+            else:
+                rs2 = operands['rs2']
+                if mask is None:
+                    def execute():
+                        x[rd] = sext32(op(x[rs1], x[rs2]))
+                        return next_pc
+                else:
+                    def execute():
+                        x[rd] = op(x[rs1], x[rs2]) & M64
+                        return next_pc
+            return execute
+        return factory
+
+    def exec_lui(self, pc, inst, operands):
+        x = self.x
+        rd = operands['rd'] or 32
+        imm = operands['imm']
+        next_pc = pc + 4
+        def execute():
+            x[rd] = imm
+            return next_pc
+        return execute
+
+    def exec_auipc(self, pc, inst, operands):
+        x = self.x
+        rd = operands['rd'] or 32
+        value = (pc + operands['imm']) & M64
+        next_pc = pc + 4
+        def execute():
+            x[rd] = value
+            return next_pc
+        return execute
+
+    def exec_jal(self, pc, inst, operands):
+        x = self.x
+        rd = operands['rd'] or 32
+        target = (pc + operands['imm']) & M64
+        link = pc + 4
+        if target & 3:
+            def execute():
+                raise Trap(cause_misaligned_fetch, target)
+        else:
+            def execute():
+                x[rd] = link
+                return target
+        return execute
+
+    def exec_jalr(self, pc, inst, operands):
+        x = self.x
+        rd = operands['rd'] or 32
+        rs1 = operands['rs1']
+        imm = operands['imm']
+        link = pc + 4
+        def execute():
+            target = (x[rs1] + imm) & (M64 - 1)
+            if target & 3:
+                raise Trap(cause_misaligned_fetch, target)
+            x[rd] = link
+            return target
+        return execute
+
+    def branch_factory(self, op):
+        def factory(pc, inst, operands):
+            x = self.x
+            rs1 = operands['rs1']
+            rs2 = operands['rs2']
+            target = (pc + operands['imm']) & M64
+            next_pc = pc + 4
+            if target & 3:
+                def execute():
+                    if op(x[rs1], x[rs2]):
+                        raise Trap(cause_misaligned_fetch, target)
+                    return next_pc
+            else:
+                def execute():
+                    return target if op(x[rs1], x[rs2]) else next_pc
+            return execute
+        return factory
+
+    def load_factory(self, size, sign):
+        def factory(pc, inst, operands):
+            x = self.x
+            load = self.memory.load
+            rd = operands['rd'] or 32
+            rs1 = operands['rs1']
+            imm = operands['imm']
+            next_pc = pc + 4
+            def execute():
+                x[rd] = ((load((x[rs1] + imm) & M64, size) ^ sign) - sign) & M64
+                return next_pc
+            return execute
+        return factory
+
+    def store_factory(self, size):
+        def factory(pc, inst, operands):
+            x = self.x
+            store = self.memory.store
+            rs1 = operands['rs1']
+            rs2 = operands['rs2']
+            imm = operands['imm']
+            next_pc = pc + 4
+            def execute():
+                store((x[rs1] + imm) & M64, size, x[rs2])
+                return next_pc
+            return execute
+        return factory
+
+    def amo_factory(self, op, size):
+        def factory(pc, inst, operands):
+            x = self.x
+            memory = self.memory
+            rd = operands['rd'] or 32
+            rs1 = operands['rs1']
+            rs2 = operands['rs2']
+            mask = (1 << (8 * size)) - 1
+            sign = 1 << (8 * size - 1)
+            next_pc = pc + 4
+            def execute():
+                addr = x[rs1]
+                value = memory.load(addr, size, cause_misaligned_store, cause_store_fault)
+                memory.store(addr, size, op(value, x[rs2] & mask, mask, sign))
+                x[rd] = ((value ^ sign) - sign) & M64
+                return next_pc
+            return execute
+        return factory
+
+    def lr_factory(self, size):
+        def factory(pc, inst, operands):
+            x = self.x
+            load = self.memory.load
+            rd = operands['rd'] or 32
+            rs1 = operands['rs1']
+            sign = 1 << (8 * size - 1)
+            next_pc = pc + 4
+            def execute():
+                addr = x[rs1]
+                x[rd] = ((load(addr, size) ^ sign) - sign) & M64
+                self.reservation = addr
+                return next_pc
+            return execute
+        return factory
+
+    def sc_factory(self, size):
+        def factory(pc, inst, operands):
+            x = self.x
+            store = self.memory.store
+            rd = operands['rd'] or 32
+            rs1 = operands['rs1']
+            rs2 = operands['rs2']
+            next_pc = pc + 4
+            def execute():
+                addr = x[rs1]
+                if addr & (size - 1):
+                    raise Trap(cause_misaligned_store, addr)
+                if self.reservation == addr:
+                    store(addr, size, x[rs2])
+                    x[rd] = 0
+                else:
+                    x[rd] = 1
+                self.reservation = None
+                return next_pc
+            return execute
+        return factory
+
+    def exec_fence(self, pc, inst, operands):
+        next_pc = pc + 4
+        def execute():
+            return next_pc
+        return execute
+
+    def exec_fence_i(self, pc, inst, operands):
+        next_pc = pc + 4
+        def execute():
+            self.flush_blocks()
+            return next_pc
+        return execute
+
+    def exec_sfence_vm(self, pc, inst, operands):
+        next_pc = pc + 4
+        def execute():
+            if self.prv < prv_s:
+                raise Trap(cause_illegal)
+            self.flush_blocks()
+            return next_pc
+        return execute
+
+    def exec_wfi(self, pc, inst, operands):
+        # there are no interrupts to wait for
+        return self.exec_fence(pc, inst, operands)
+
+    def exec_ecall(self, pc, inst, operands):
+        def execute():
+            raise Trap(cause_ecall + self.prv)
+        return execute
+
+    def exec_ebreak(self, pc, inst, operands):
+        def execute():
+            raise Trap(cause_breakpoint)
+        return execute
+
+    def exec_mret(self, pc, inst, operands):
+        def execute():
+            if self.prv < prv_m:
+                raise Trap(cause_illegal)
+            return self.mret()
+        return execute
+
+    def exec_sret(self, pc, inst, operands):
+        def execute():
+            if self.prv < prv_s:
+                raise Trap(cause_illegal)
+            return self.sret()
+        return execute
+
+    def csr_factory(self, kind, immediate):
+        # kind is 'w', 's' or 'c'. csrrs and csrrc with x0 or a zero
+        # immediate only read the CSR, as in RVCsrFile.bsv.
+        def factory(pc, inst, operands):
+            x = self.x
+            rd = operands['rd'] or 32
+            csr = operands['csr']
+            source = (inst >> 15) & 0x1f
+            write = kind == 'w' or source != 0
+            next_pc = pc + 4
+            def execute():
+                old = self.read_csr(csr, write)
+                value = source if immediate else x[source]
+                if write:
+                    if kind == 's':
+                        value = old | value
+                    elif kind == 'c':
+                        value = old & ~value
+                    self.write_csr(csr, value)
+                x[rd] = old
+                return next_pc
+            return execute
+        return factory
+
+    # Floating point
+
+    def rounding_mode(self, inst):
+        # the static rounding mode of inst, or None for the dynamic one
+        rm = (inst >> 12) & 7
+        if rm == 7:
+            return None
+        if rm > softfloat.rmm:
+            raise Trap(cause_illegal)
+        return rm
+
+    def fp_factory(self, factory):
+        # FP instructions are illegal while mstatus.fs is off
+        def fp_enabled_factory(pc, inst, operands):
+            if self.mstatus & mstatus_fs == 0:
+                return self.illegal()
+            try:
+                return factory(pc, inst, operands)
+            except Trap:
+                return self.illegal()
+        return fp_enabled_factory
+
+    def fp_result(self, flags):
+        # marks the FP state dirty and accumulates fflags
+        self.fflags = self.fflags | flags
+        self.mstatus = self.mstatus | mstatus_fs
+
+    def fp_memory_factory(self, is_load, size):
+        def factory(pc, inst, operands):
+            x = self.x
+            f = self.f
+            memory = self.memory
+            rs1 = operands['rs1']
+            imm = operands['imm']
+            next_pc = pc + 4
+            if is_load:
+                rd = operands['frd']
+                def execute():
+                    f[rd] = memory.load((x[rs1] + imm) & M64, size)
+                    self.mstatus = self.mstatus | mstatus_fs
+                    return next_pc
+            else:
+                rs2 = operands['frs2']
+                def execute():
+                    memory.store((x[rs1] + imm) & M64, size, f[rs2])
+                    return next_pc
+            return execute
+        return factory
+
+    def fp_op_factory(self, op, suffix):
+        # everything in OP-FP and the fused multiply-adds
+        def factory(pc, inst, operands):
+            x = self.x
+            f = self.f
+            next_pc = pc + 4
+            static_rm = self.rounding_mode(inst)
+            def rounding():
+                if static_rm is not None:
+                    return static_rm
+                if self.frm > softfloat.rmm:
+                    raise Trap(cause_illegal)
+                return self.frm
+            (fmt_name, _, int_name) = suffix.partition('.')
+            fmt = fp_formats.get(fmt_name)
+            mask = fp_masks.get(fmt_name)
+            sign = fp_sign_bits.get(fmt_name)
+            rd = operands.get('frd', operands.get('rd', 0) or 32)
+            rs1 = operands.get('frs1', operands.get('rs1'))
+            rs2 = operands.get('frs2')
+            rs3 = operands.get('frs3')
+            if op in fp_arith_ops:
+                arith = fp_arith_ops[op]
+                def execute():
+                    (f[rd], flags) = arith(f[rs1] & mask, f[rs2] & mask, fmt, rounding())
+                    self.fp_result(flags)
+                    return next_pc
+            elif op in fp_fma_ops:
+                (negate_product, negate_addend) = fp_fma_ops[op]
+                def execute():
+                    (f[rd], flags) = softfloat.fma(f[rs1] & mask, f[rs2] & mask, f[rs3] & mask, fmt, rounding(), negate_product, negate_addend)
+                    self.fp_result(flags)
+                    return next_pc
+            elif op == 'fsqrt':
+                def execute():
+                    (f[rd], flags) = softfloat.sqrt(f[rs1] & mask, fmt, rounding())
+                    self.fp_result(flags)
+                    return next_pc
+            elif op in ('fsgnj', 'fsgnjn', 'fsgnjx'):
+                def execute():
+                    a = f[rs1] & mask
+                    b = f[rs2] & sign
+                    if op == 'fsgnjn':
+                        b = b ^ sign
+                    elif op == 'fsgnjx':
+                        b = b ^ (a & sign)
+                    f[rd] = (a & ~sign) | b
+                    self.fp_result(0)
+                    return next_pc
+            elif op in ('fmin', 'fmax'):
+                is_max = op == 'fmax'
+                def execute():
+                    (f[rd], flags) = softfloat.min_max(f[rs1] & mask, f[rs2] & mask, fmt, is_max)
+                    self.fp_result(flags)
+                    return next_pc
+            elif op in fp_compare_ops:
+                compare = fp_compare_ops[op]
+                def execute():
+                    (x[rd], flags) = compare(f[rs1] & mask, f[rs2] & mask, fmt)
+                    if flags:
+                        self.fp_result(flags)
+                    return next_pc
+            elif op == 'fclass':
+                def execute():
+                    x[rd] = softfloat.classify(f[rs1] & mask, fmt)
+                    return next_pc
+            elif op == 'fmv':
+                # fmv.x.s, fmv.s.x, fmv.x.d and fmv.d.x
+                (to_fmt, from_fmt) = suffix.split('.')
+                if to_fmt == 'x':
+                    extend = sext32 if from_fmt == 's' else (lambda value: value)
+                    def execute():
+                        x[rd] = extend(f[rs1])
+                        return next_pc
+                else:
+                    to_mask = fp_masks[to_fmt]
+                    def execute():
+                        f[rd] = x[rs1] & to_mask
+                        self.fp_result(0)
+                        return next_pc
+            elif op == 'fcvt':
+                # fcvt.<to>.<from>
+                (to_name, from_name) = suffix.split('.')
+                if to_name in fp_int_types:
+                    (width, is_signed) = fp_int_types[to_name]
+                    from_fmt = fp_formats[from_name]
+                    from_mask = fp_masks[from_name]
+                    def execute():
+                        (value, flags) = softfloat.to_int(f[rs1] & from_mask, from_fmt, rounding(), width, is_signed)
+                        x[rd] = sext32(value) if width == 32 else value & M64
+                        if flags:
+                            self.fp_result(flags)
+                        return next_pc
+                elif from_name in fp_int_types:
+                    (width, is_signed) = fp_int_types[from_name]
+                    to_fmt = fp_formats[to_name]
+                    def execute():
+                        value = x[rs1]
+                        if width == 32:
+                            value = signed32(value) if is_signed else value & 0xffffffff
+                        elif is_signed:
+                            value = signed(value)
+                        (f[rd], flags) = softfloat.from_int(value, to_fmt, rounding())
+                        self.fp_result(flags)
+                        return next_pc
+                else:
+                    to_fmt = fp_formats[to_name]
+                    from_fmt = fp_formats[from_name]
+                    from_mask = fp_masks[from_name]
+                    def execute():
+                        (f[rd], flags) = softfloat.convert(f[rs1] & from_mask, from_fmt, to_fmt, rounding())
+                        self.fp_result(flags)
+                        return next_pc
+            else:
+                return self.illegal()
+            return execute
+        return factory
+
+    # CSRs and traps
+
+    def csr_legal(self, name):
+        # isLegalCSR from RVCsrFile.bsv
+        if name in ('fflags', 'frm', 'fcsr'):
+            legal = self.mstatus & mstatus_fs != 0
+        elif name in counter_csrs:
+            (counter, delta, counteren, bit) = counter_csrs[name]
+            legal = (self.csrs[counteren] >> bit) & 1 == 1
+        else:
+            legal = name in plain_csrs or name in read_only_csrs or name in ('sstatus', 'sie', 'sip', 'mstatus', 'mip')
+        return legal
+
+    def read_csr(self, csr, write):
+        name = self.csr_names.get(csr)
+        # isLegalCSR and hasCSRPermission
+        if (name is None or not self.csr_legal(name) or self.prv < (csr >> 8) & 3
+                or (write and csr >> 10 == 3)):
+            raise Trap(cause_illegal)
+        if name in unpredictable_csrs:
+            self.unpredictable = True
+        if name in plain_csrs:
+            return self.csrs[name]
+        if name in counter_csrs:
+            (counter, delta, counteren, bit) = counter_csrs[name]
+            return (self.counter(counter) + self.csrs[delta]) & M64
+        if name == 'fflags':
+            return self.fflags
+        if name == 'frm':
+            return self.frm
+        if name == 'fcsr':
+            return (self.frm << 5) | self.fflags
+        if name == 'mstatus' or name == 'sstatus':
+            value = self.mstatus
+            if value & mstatus_fs == mstatus_fs or value & mstatus_xs == mstatus_xs:
+                value = value | mstatus_sd
+            return value if name == 'mstatus' else value & (sstatus_mask | mstatus_sd)
+        if name == 'sie':
+            return self.csrs['mie'] & sie_mask
+        if name == 'mip':
+            return self.mip
+        if name == 'sip':
+            return self.mip & sie_mask
+        if name == 'misa':
+            return self.misa
+        if name in ('mcycle', 'mtime', 'minstret'):
+            return self.counter(name[1:])
+        # mvendorid, marchid, mimpid and mhartid
+        return 0
+
+    def counter(self, name):
+        # the model retires an instruction every cycle
+        if name == 'time':
+            return self.memory.time()
+        return self.instret
+
+    def write_csr(self, csr, value):
+        name = self.csr_names[csr]
+        if name in plain_csrs:
+            self.csrs[name] = value & plain_csrs[name]
+        elif name == 'fflags':
+            self.fflags = value & 0x1f
+        elif name == 'frm':
+            self.frm = value & 7
+        elif name == 'fcsr':
+            self.fflags = value & 0x1f
+            self.frm = (value >> 5) & 7
+        elif name == 'mstatus':
+            self.set_mstatus((self.mstatus & ~mstatus_mask) | (value & mstatus_mask))
+        elif name == 'sstatus':
+            self.set_mstatus((self.mstatus & ~sstatus_mask) | (value & sstatus_mask))
+        elif name == 'sie':
+            self.csrs['mie'] = (self.csrs['mie'] & ~sie_mask) | (value & sie_mask)
+        elif name == 'mip':
+            self.mip = (self.mip & ~mip_mask) | (value & mip_mask)
+        elif name == 'sip':
+            self.mip = (self.mip & ~sip_mask) | (value & sip_mask)
+        # writes to the read only CSRs are ignored
+        if name in ('fflags', 'frm', 'fcsr'):
+            self.mstatus = self.mstatus | mstatus_fs
+
+    def set_mstatus(self, value):
+        fpu_was_on = self.mstatus & mstatus_fs != 0
+        self.mstatus = value
+        if (value & mstatus_fs != 0) != fpu_was_on:
+            # the FP closures check mstatus.fs when they are built
+            self.flush_blocks()
+        self.check_vm()
+
+    def check_vm(self):
+        # only bare addressing is implemented
+        data_prv = (self.mstatus >> 11) & 3 if self.mstatus & mstatus_mprv else self.prv
+        if (self.mstatus >> mstatus_vm_shift) & 0x1f != 0 and min(self.prv, data_prv) < prv_m:
+            raise ModelError('virtual memory (mstatus.vm = %d) is not supported' % ((self.mstatus >> mstatus_vm_shift) & 0x1f))
+
+    def take_trap(self, cause, interrupt, pc, badaddr):
+        # Returns the trap handler address. The same as RVCsrFile.wr for a
+        # trap.
+        self.reservation = None
+        self.cursor = None
+        deleg = self.csrs['mideleg' if interrupt else 'medeleg']
+        code = (1 << 63) | cause if interrupt else cause
+        prv = self.prv
+        mstatus = self.mstatus
+        if prv <= prv_s and (deleg >> cause) & 1:
+            self.csrs['sepc'] = pc
+            self.csrs['scause'] = code
+            if not interrupt and cause in badaddr_causes:
+                self.csrs['sbadaddr'] = badaddr
+            # spp = (prv != U), spie = uie or sie, sie = 0
+            spie = mstatus & 1 if prv == prv_u else (mstatus >> 1) & 1
+            mstatus = mstatus & ~0x122
+            mstatus = mstatus | (spie << 5) | ((prv != prv_u) << 8)
+            self.mstatus = mstatus
+            self.prv = prv_s
+            handler = self.csrs['stvec']
+        else:
+            self.csrs['mepc'] = pc
+            self.csrs['mcause'] = code
+            if not interrupt and cause in badaddr_causes:
+                self.csrs['mbadaddr'] = badaddr
+            # mpp = prv, mpie = the interrupt enable for prv, mie = 0
+            mpie = (mstatus >> prv) & 1
+            mstatus = mstatus & ~0x1888
+            mstatus = mstatus | (mpie << 7) | (prv << 11)
+            self.mstatus = mstatus
+            self.prv = prv_m
+            handler = self.csrs['mtvec']
+        self.check_vm()
+        return handler
+
+    def mret(self):
+        mstatus = self.mstatus
+        next_prv = (mstatus >> 11) & 3
+        mpie = (mstatus >> 7) & 1
+        if next_prv != 2:
+            mstatus = (mstatus & ~(1 << next_prv)) | (mpie << next_prv)
+        # mpie = 0, mpp = U
+        self.mstatus = mstatus & ~0x1880
+        self.prv = next_prv
+        self.check_vm()
+        return self.csrs['mepc']
+
+    def sret(self):
+        mstatus = self.mstatus
+        next_prv = (mstatus >> 8) & 1
+        spie = (mstatus >> 5) & 1
+        mstatus = (mstatus & ~(1 << next_prv)) | (spie << next_prv)
+        # spie = 0, spp = 0
+        self.mstatus = mstatus & ~0x120
+        self.prv = next_prv
+        self.check_vm()
+        return self.csrs['sepc']
+
+    # HTIF
+
+    def htif(self):
+        # Handles a write to tohost the way fesvr does for riscv-tests and
+        # the riscv-tests benchmarks
+        memory = self.memory
+        memory.tohost_written = False
+        value = memory.load(memory.tohost, 8)
+        if value == 0:
+            return
+        memory.store(memory.tohost, 8, 0)
+        device = value >> 56
+        command = (value >> 48) & 0xff
+        payload = value & ((1 << 48) - 1)
+        response = None
+        if device == 0 and command == 0:
+            if payload & 1:
+                self.exit_code = payload >> 1
+            else:
+                self.syscall(payload)
+                response = 1
+        elif device == 1 and command == 1:
+            # console putchar
+            if self.console is not None:
+                self.console.write(bytes([payload & 0xff]))
+                self.console.flush()
+            response = (value & ~((1 << 48) - 1)) | 0x100 | (payload & 0xff)
+        if response is not None and memory.fromhost is not None:
+            memory.store(memory.fromhost, 8, response)
+
+    def syscall(self, magic_mem):
+        memory = self.memory
+        args = struct.unpack('<4Q', memory.read_bytes(magic_mem, 32))
+        (which, args) = (args[0], args[1:])
+        result = -enosys
+        if which == sys_write:
+            (fd, buf, length) = args
+            if self.console is not None and fd in (1, 2):
+                self.console.write(memory.read_bytes(buf, length))
+                self.console.flush()
+            result = length
+        elif which == sys_exit:
+            self.exit_code = args[0]
+            result = 0
+        memory.write_bytes(magic_mem, struct.pack('<Q', result & M64))
+
+    # Execution
+
+    def run(self, max_instructions):
+        # Runs until the program exits through HTIF or max_instructions
+        # retire. Returns the exit code, or None.
+        memory = self.memory
+        pc = self.pc
+        while self.exit_code is None and self.instret < max_instructions:
+            count = 0
+            try:
+                (closures, insts) = self.get_block(pc)
+                for execute in closures:
+                    next_pc = execute()
+                    count = count + 1
+                pc = next_pc
+            except Trap as trap:
+                pc = self.take_trap(trap.cause, False, pc + 4 * count, trap.badaddr)
+            self.instret = self.instret + count
+            if memory.tohost_written:
+                self.htif()
+        self.pc = pc
+        return self.exit_code
+
+    def step(self):
+        # Executes one instruction. Returns (pc, instruction, trap cause or
+        # None); the instruction is None if it couldn't be fetched.
+        pc = self.pc
+        self.unpredictable = False
+        self.memory.unpredictable = False
+        cursor = self.cursor
+        self.cursor = None
+        inst = None
+        try:
+            if cursor is not None and cursor[2] == pc:
+                (block, index) = (cursor[0], cursor[1])
+            else:
+                (block, index) = (self.get_block(pc), 0)
+            inst = block[1][index]
+            next_pc = block[0][index]()
+        except Trap as trap:
+            self.pc = self.take_trap(trap.cause, False, pc, trap.badaddr)
+            if self.memory.tohost_written:
+                self.htif()
+            return (pc, inst, trap.cause)
+        self.instret = self.instret + 1
+        self.pc = next_pc
+        if next_pc == pc + 4 and index + 1 < len(block[0]) and block is self.blocks.get(pc - 4 * index):
+            self.cursor = (block, index + 1, next_pc)
+        if self.memory.tohost_written:
+            self.htif()
+        return (pc, inst, None)
+
+    def interrupt(self, cause):
+        # takes an interrupt the processor took, which the model has no
+        # source for
+        self.pc = self.take_trap(cause, True, self.pc, 0)
+
+    def reg_value(self, dst):
+        # the value of the register a VerificationPacket dst names
+        if dst & 0x20:
+            return self.f[dst & 0x1f]
+        return self.x[dst & 0x1f]
+
+    def set_reg(self, dst, value):
+        if dst & 0x20:
+            self.f[dst & 0x1f] = value
+        elif dst & 0x1f:
+            self.x[dst & 0x1f] = value
+
+    def reference_packet(self, packet):
+        # Executes the next instruction and returns the packet Spike would
+        # make for it in SpikeTandemVerifier::synchronizedSimStep, given the
+        # processor's packet
+        (pc, inst, cause) = self.step()
+        if inst is None:
+            # spike uses the processor's instruction if it can't fetch one
+            inst = packet.instruction
+        exception = cause is not None
+        dst = 0
+        data = 0
+        if inst == packet.instruction:
+            dst = packet.dst
+            if dst & 0x40 and not exception:
+                if self.unpredictable or self.memory.unpredictable:
+                    # counters, time, and interrupt pending bits: take the
+                    # processor's value
+                    self.set_reg(dst, packet.data)
+                data = self.reg_value(dst)
+            else:
+                data = packet.data
+        return tracelib.VerificationPacket(0, pc, inst, data, packet.addr, dst,
+                exception, False, cause if exception else 0)
+
+def replay(model, packets, decoder, context):
+    # Checks a processor trace against the model. Returns the number of
+    # the first packet that doesn't match, or None.
+    def disassemble(packet, disasm):
+        if disasm == '' and decoder is not None:
+            disasm = tracelib.disassemble(decoder, packet.instruction)
+        return disasm
+    history = collections.deque(maxlen = context)
+    number = 0
+    for (packet, disasm) in packets:
+        number = number + 1
+        for i in range(packet.skipped_packets):
+            model.step()
+        if number == 1 and model.instret == 0:
+            # like spike, assume the model starts where the processor does
+            model.pc = packet.pc
+        if packet.interrupt and packet.cause in (3, 7):
+            # interrupts from the IPI and timer are forced on the model
+            model.interrupt(packet.cause)
+            ref = packet
+        else:
+            ref = model.reference_packet(packet)
+        if not tracelib.packets_match(packet, ref):
+            print('[ERROR] Verification error in packet %d (instruction %d)' % (number, model.instret))
+            for line in history:
+                print('          %s' % line)
+            print('  [PROC]  %s' % tracelib.format_trace_line(packet, disassemble(packet, disasm)))
+            print('  [MODEL] %s' % tracelib.format_trace_line(ref, disassemble(ref, '')))
+            return number
+        history.append(tracelib.format_trace_line(packet, disassemble(packet, disasm)))
+    print('%d packets match' % number)
+    return None
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Run an ELF on a Python RISC-V model, or check a processor trace against it.')
+    parser.add_argument('elf', help = 'program to load')
+    parser.add_argument('--trace', default = None,
+            help = "PrintTrace text trace or binary trace to check, or '-' for stdin")
+    parser.add_argument('--isa', default = 'rv64:imafds',
+            help = 'base:extensions to decode (default: rv64:imafds)')
+    parser.add_argument('--meta', default = tracelib.default_meta_dir,
+            help = 'path to riscv-meta/meta')
+    parser.add_argument('--ram-size', type = int, default = default_ram_size >> 20,
+            help = 'RAM size in MB (default: %d)' % (default_ram_size >> 20))
+    parser.add_argument('--max-instructions', type = int, default = 1 << 32,
+            help = 'stop after this many instructions')
+    parser.add_argument('-n', '--context', type = int, default = 20,
+            help = 'matching packets to print before a mismatch (default: 20)')
+    args = parser.parse_args()
+
+    rvmeta = tracelib.load_rvmeta(args.meta, args.isa)
+    assert rvmeta.base == 'rv64', 'the model only implements RV64'
+    model = None
+    memory = Memory(args.ram_size << 20, lambda: model.instret)
+    memory.load_elf(args.elf)
+    model = GoldenModel(rvmeta, memory)
+
+    if args.trace is None:
+        model.console = sys.stdout.buffer
+        try:
+            exit_code = model.run(args.max_instructions)
+        except ModelError as e:
+            print('stopped at pc 0x%x: %s' % (model.pc, e), file = sys.stderr)
+            sys.exit(2)
+        if exit_code is None:
+            print('stopped after %d instructions at pc 0x%x' % (model.instret, model.pc), file = sys.stderr)
+            sys.exit(2)
+        if exit_code != 0:
+            print('*** FAILED *** (tohost = %d) after %d instructions' % (exit_code, model.instret), file = sys.stderr)
+        sys.exit(min(exit_code, 255))
+    else:
+        if args.trace == '-':
+            packets = tracelib.parse_trace(line.rstrip(b'\n') for line in sys.stdin.buffer)
+        elif tracelib.is_binary_trace(args.trace):
+            packets = tracelib.binary_trace_packets(tracelib.open_binary_trace(args.trace))
+        else:
+            packets = tracelib.parse_trace(tracelib.read_lines(args.trace))
+        try:
+            mismatch = replay(model, packets, model.decoder, args.context)
+        except ModelError as e:
+            print('stopped at pc 0x%x: %s' % (model.pc, e), file = sys.stderr)
+            sys.exit(2)
+        sys.exit(1 if mismatch is not None else 0)
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2016 Massachusetts Institute of Technology
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, copy,
+# modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Runs riscv-tests ISA tests on a simulator executable in parallel. Each
+# test runs in its own working directory so the connectal sockets
+# (SOCK.<pid>) and other files the simulator creates don't collide.
+# Results are cached by the contents of the test and the simulator, so
+# tests only re-run when one of them changes.
+
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing.pool
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+default_suites = ['rv64ui', 'rv64um', 'rv64ua', 'rv64uf', 'rv64ud', 'rv64mi', 'rv64si']
+
+scripts_dir = os.path.dirname(os.path.abspath(__file__))
+
+def default_cache_inputs():
+    # Generated and configuration sources a simulator is built from. The
+    # built simulator is hashed too (see simulator_files); these make the
+    # key robust to rebuilds that don't change its bytes in the same way.
+    inputs = [os.path.join(scripts_dir, '..', 'riscy-lib', 'Opcodes.bsv')]
+    if os.path.isfile('ProcConfig.bsv'):
+        inputs.append('ProcConfig.bsv')
+    return inputs
+
+def default_isa_dir():
+    return os.path.join(os.environ.get('RISCY_TOOLS', ''), 'riscv64-unknown-elf', 'share', 'riscv-tests', 'isa')
+
+def find_tests(isa_dir, suites):
+    # The test binaries for suites, e.g. rv64ui-p-add for rv64ui. Files
+    # with a '.' in their name are dumps and hex files, not tests.
+    tests = []
+    for suite in suites:
+        for f in sorted(glob.glob(os.path.join(isa_dir, suite + '-p-*'))):
+            if os.path.isfile(f) and '.' not in os.path.basename(f):
+                tests.append(f)
+    return tests
+
+def classify(returncode, divergence):
+    # The same classification isatest.sh and runtest.sh used
+    if returncode is None:
+        return 'FAILED timeout'
+    if returncode != 0:
+        if divergence:
+            return 'FAILED %d' % returncode
+        return 'FAILED %d (without divergence)' % returncode
+    if divergence:
+        return 'PASSED (with divergence)'
+    return 'OK'
+
+class TestResult:
+    def __init__(self, name, returncode, divergence, seconds, output_file, cached = False):
+        self.name = name
+        self.returncode = returncode
+        self.divergence = divergence
+        self.seconds = seconds
+        self.output_file = output_file
+        self.cached = cached
+        self.status = classify(returncode, divergence)
+
+    def failed(self):
+        return self.status.startswith('FAILED')
+
+    def to_json(self):
+        return {'name': self.name, 'status': self.status,
+                'returncode': self.returncode, 'divergence': self.divergence,
+                'seconds': self.seconds, 'output': self.output_file,
+                'cached': self.cached}
+
+def hash_file(filename):
+    h = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def simulator_files(executable):
+    # Every file in the directory of run_exe, sorted by name. run_exe is
+    # the connectal host program, which starts the hardware model next to
+    # it (bin/vlsim, or bin/bsim for Bluesim), so a change to the processor
+    # only shows up in that sibling.
+    directory = os.path.dirname(executable)
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name)))
+
+class ResultCache:
+    # Test results stored in cache_dir as <key>.json and <key>.out (the
+    # test's output), where the key is a hash of the test binary and of
+    # everything the simulator depends on. Entries are touched when they
+    # are used, and the least recently used ones are evicted once the cache
+    # grows beyond max_bytes.
+    def __init__(self, cache_dir, max_bytes, simulator_key):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.simulator_key = simulator_key
+        os.makedirs(cache_dir, exist_ok = True)
+
+    def key(self, test):
+        return hashlib.sha1((self.simulator_key + hash_file(test)).encode()).hexdigest()
+
+    def get(self, key, name, output_file):
+        # Returns the cached TestResult for key, copying the cached output to
+        # output_file, or None if there isn't one
+        entry = os.path.join(self.cache_dir, key)
+        try:
+            with open(entry + '.json', 'r') as f:
+                cached = json.load(f)
+            shutil.copyfile(entry + '.out', output_file)
+            # another run may have evicted the entry by now
+            os.utime(entry + '.json')
+            os.utime(entry + '.out')
+        except (OSError, ValueError):
+            return None
+        return TestResult(name, cached['returncode'], cached['divergence'], cached['seconds'], output_file, True)
+
+    def put(self, key, result):
+        entry = os.path.join(self.cache_dir, key)
+        # write to temporary files first so concurrent runs never see a
+        # partial entry
+        tmp = '%s.%d.%d.tmp' % (entry, os.getpid(), threading.get_ident())
+        shutil.copyfile(result.output_file, tmp + '.out')
+        with open(tmp + '.json', 'w') as f:
+            json.dump({'returncode': result.returncode, 'divergence': result.divergence, 'seconds': result.seconds}, f)
+        os.replace(tmp + '.out', entry + '.out')
+        os.replace(tmp + '.json', entry + '.json')
+
+    def evict(self):
+        # remove least recently used entries until the cache fits in
+        # max_bytes; returns the number of entries removed
+        entries = {}
+        for dir_entry in os.scandir(self.cache_dir):
+            (key, ext) = os.path.splitext(dir_entry.name)
+            stat = dir_entry.stat()
+            (size, mtime) = entries.get(key, (0, 0))
+            entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime))
+        total = sum(size for (size, mtime) in entries.values())
+        evicted = 0
+        for (key, (size, mtime)) in sorted(entries.items(), key = lambda e: e[1][1]):
+            if total <= self.max_bytes:
+                break
+            for ext in ['.json', '.out']:
+                try:
+                    os.remove(os.path.join(self.cache_dir, key + ext))
+                except OSError:
+                    pass
+            total = total - size
+            evicted = evicted + 1
+        return evicted
+
+def run_test(command, test, out_dir, timeout, cache = None):
+    # Runs one test in out_dir/work/<test> and returns its TestResult. The
+    # output goes to out_dir/<test>.out like it did with the shell scripts.
+    # If cache is given, a cached result is used instead of running the
+    # test, and new results are added to it.
+    name = os.path.basename(test)
+    output_file = os.path.join(out_dir, name + '.out')
+    if cache is not None:
+        key = cache.key(test)
+        result = cache.get(key, name, output_file)
+        if result is not None:
+            return result
+    work_dir = os.path.join(out_dir, 'work', name)
+    # the simulator writes verilator/Proc.perfmon.txt relative to its
+    # working directory
+    os.makedirs(os.path.join(work_dir, 'verilator'), exist_ok = True)
+    start = time.time()
+    with open(output_file, 'wb') as output:
+        process = subprocess.Popen(command + [test], cwd = work_dir,
+                stdout = output, stderr = subprocess.STDOUT,
+                start_new_session = True)
+        try:
+            returncode = process.wait(timeout = timeout)
+        except subprocess.TimeoutExpired:
+            # kill the whole process group in case the simulator started
+            # helper processes
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                # it exited after all
+                pass
+            process.wait()
+            returncode = None
+    seconds = time.time() - start
+    with open(output_file, 'rb') as output:
+        divergence = b'ERROR' in output.read()
+    shutil.rmtree(work_dir, ignore_errors = True)
+    result = TestResult(name, returncode, divergence, seconds, output_file)
+    # a timeout may just mean the machine was busy, so don't remember it
+    if cache is not None and returncode is not None:
+        cache.put(key, result)
+    return result
+
+def write_json(filename, results):
+    with open(filename, 'w') as f:
+        json.dump([result.to_json() for result in results], f, indent = 2)
+        f.write('\n')
+
+def write_junit(filename, results, suite_name):
+    testsuite = ET.Element('testsuite', name = suite_name,
+            tests = str(len(results)),
+            failures = str(sum(1 for result in results if result.failed())),
+            time = '%.3f' % sum(result.seconds for result in results))
+    for result in results:
+        testcase = ET.SubElement(testsuite, 'testcase', classname = suite_name,
+                name = result.name, time = '%.3f' % result.seconds)
+        if result.failed():
+            failure = ET.SubElement(testcase, 'failure', message = result.status)
+            failure.text = 'see ' + result.output_file
+        elif result.divergence:
+            ET.SubElement(testcase, 'system-out').text = result.status
+    ET.ElementTree(testsuite).write(filename, encoding = 'utf-8', xml_declaration = True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Run riscv-tests ISA tests in parallel.')
+    parser.add_argument('run_exe', help = 'simulator executable, e.g. verilator/bin/ubuntu.exe')
+    parser.add_argument('--exe-args', default = '',
+            help = 'extra arguments for run_exe, e.g. --exe-args=--just-trace')
+    parser.add_argument('--suites', nargs = '+', default = default_suites,
+            help = 'test suites to run (default: %s)' % ' '.join(default_suites))
+    parser.add_argument('--isa-dir', default = default_isa_dir(),
+            help = 'directory with the riscv-tests isa binaries (default: $RISCY_TOOLS/riscv64-unknown-elf/share/riscv-tests/isa)')
+    parser.add_argument('--out', default = 'out',
+            help = 'directory for test output (default: out)')
+    parser.add_argument('-j', '--jobs', type = int, default = None,
+            help = 'number of tests to run at once (default: number of cpus)')
+    parser.add_argument('--timeout', type = float, default = 600,
+            help = 'seconds before a test is killed (default: 600)')
+    parser.add_argument('--cache-dir', default = '.isatest-cache',
+            help = 'where to cache test results (default: .isatest-cache)')
+    parser.add_argument('--cache-size', type = int, default = 1024,
+            help = 'maximum size of the result cache in MB (default: 1024)')
+    parser.add_argument('--cache-inputs', nargs = '*', default = default_cache_inputs(),
+            help = 'files that invalidate cached results when they change, besides every file in the directory of run_exe, which holds the vlsim or bsim it starts (default: riscy-lib/Opcodes.bsv and ./ProcConfig.bsv)')
+    parser.add_argument('--no-cache', action = 'store_true',
+            help = 'run every test, ignoring and not updating the cache')
+    parser.add_argument('--name', default = os.path.basename(os.getcwd()),
+            help = 'test suite name in the JUnit summary (default: current directory name)')
+    parser.add_argument('--json', help = 'write a JSON summary to this file')
+    parser.add_argument('--junit', help = 'write a JUnit XML summary to this file')
+    args = parser.parse_args()
+
+    command = [os.path.abspath(args.run_exe)] + shlex.split(args.exe_args)
+    tests = [os.path.abspath(test) for test in find_tests(args.isa_dir, args.suites)]
+    if len(tests) == 0:
+        print('[ERROR] no tests for %s in %s' % (' '.join(args.suites), args.isa_dir))
+        sys.exit(1)
+    out_dir = os.path.abspath(args.out)
+    shutil.rmtree(out_dir, ignore_errors = True)
+    os.makedirs(out_dir)
+
+    cache = None
+    if not args.no_cache:
+        # everything about the simulator that can change a test's result
+        simulator_key = ' '.join(['%s:%s' % (os.path.basename(f), hash_file(f)) for f in simulator_files(command[0])] + command[1:] + [hash_file(f) for f in args.cache_inputs])
+        cache = ResultCache(args.cache_dir, args.cache_size << 20, simulator_key)
+
+    jobs = args.jobs if args.jobs is not None else multiprocessing.cpu_count()
+    results = []
+    # the tests are separate processes, so threads are enough to run them
+    with multiprocessing.pool.ThreadPool(jobs) as pool:
+        for result in pool.imap(lambda test: run_test(command, test, out_dir, args.timeout, cache), tests):
+            print('%s %s' % (result.name, result.status))
+            sys.stdout.flush()
+            results.append(result)
+    shutil.rmtree(os.path.join(out_dir, 'work'), ignore_errors = True)
+
+    failed = sum(1 for result in results if result.failed())
+    diverged = sum(1 for result in results if result.divergence and not result.failed())
+    print('%d tests: %d OK, %d PASSED (with divergence), %d FAILED' % (len(results), len(results) - failed - diverged, diverged, failed))
+    if cache is not None:
+        evicted = cache.evict()
+        print('%d results from the cache, %d cache entries evicted' % (sum(1 for result in results if result.cached), evicted))
+    if args.json is not None:
+        write_json(args.json, results)
+    if args.junit is not None:
+        write_junit(args.junit, results, args.name)
+    sys.exit(1 if failed > 0 else 0)
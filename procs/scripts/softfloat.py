@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2016 Massachusetts Institute of Technology
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, copy,
+# modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# IEEE 754 single and double precision arithmetic on raw bit patterns, with
+# the RISC-V rounding modes, exception flags and NaN rules, for the golden
+# model (goldenmodel.py). Finite values are unpacked into exact integer
+# (sign, significand, exponent) triples, so every result is computed exactly
+# and rounded once. Where the ISA leaves a choice, this follows the
+# processors' FPU (procs/riscy-lib/RVFpu.bsv).
+
+import math
+
+# formats as (exponent bits, fraction bits)
+f32 = (8, 23)
+f64 = (11, 52)
+
+# rounding modes, as encoded in the rm field and frm
+rne = 0
+rtz = 1
+rdn = 2
+rup = 3
+rmm = 4
+
+# fflags bits
+nx = 0x01
+uf = 0x02
+of = 0x04
+dz = 0x08
+nv = 0x10
+
+def canonical_nan(fmt):
+    (ebits, fbits) = fmt
+    return (((1 << ebits) - 1) << fbits) | (1 << (fbits - 1))
+
+def infinity(sign, fmt):
+    (ebits, fbits) = fmt
+    return (sign << (ebits + fbits)) | (((1 << ebits) - 1) << fbits)
+
+def zero(sign, fmt):
+    (ebits, fbits) = fmt
+    return sign << (ebits + fbits)
+
+def unpack(bits, fmt):
+    # Returns (kind, sign, significand, exponent) for the bits of a number
+    # in format fmt. kind is 'zero', 'finite' (normal or subnormal), 'inf',
+    # 'qnan' or 'snan'. Finite values are (-1)**sign * significand *
+    # 2**exponent.
+    (ebits, fbits) = fmt
+    sign = (bits >> (ebits + fbits)) & 1
+    exp = (bits >> fbits) & ((1 << ebits) - 1)
+    frac = bits & ((1 << fbits) - 1)
+    bias = (1 << (ebits - 1)) - 1
+    if exp == (1 << ebits) - 1:
+        if frac == 0:
+            return ('inf', sign, 0, 0)
+        return ('qnan' if frac >> (fbits - 1) else 'snan', sign, 0, 0)
+    if exp == 0:
+        if frac == 0:
+            return ('zero', sign, 0, 0)
+        return ('finite', sign, frac, 1 - bias - fbits)
+    return ('finite', sign, frac | (1 << fbits), exp - bias - fbits)
+
+def is_nan(kind):
+    return kind == 'qnan' or kind == 'snan'
+
+def round_at(sign, m, e, shift, rm, sticky):
+    # Rounds (-1)**sign * m * 2**e to a multiple of 2**(e + shift). sticky
+    # means the exact value is a little larger in magnitude than m * 2**e
+    # (by less than one unit of m's last bit, which callers make sure is
+    # well below the rounding position). Returns (rounded significand,
+    # inexact).
+    # rem_half: 0 exact, -1 below half, 1 exactly half, 2 above half
+    if shift <= 0:
+        # only the sticky bits are dropped
+        r = m << -shift
+        rem_half = -1 if sticky else 0
+    else:
+        r = m >> shift
+        rem = m & ((1 << shift) - 1)
+        half = 1 << (shift - 1)
+        if rem == 0 and not sticky:
+            rem_half = 0
+        elif rem < half:
+            rem_half = -1
+        elif rem == half and not sticky:
+            rem_half = 1
+        else:
+            rem_half = 2
+    if rem_half == 0:
+        return (r, False)
+    if rm == rne:
+        up = rem_half == 2 or (rem_half == 1 and (r & 1) == 1)
+    elif rm == rmm:
+        up = rem_half >= 1
+    elif rm == rdn:
+        up = sign == 1
+    elif rm == rup:
+        up = sign == 0
+    else:
+        up = False
+    return (r + 1 if up else r, True)
+
+def round_pack(sign, m, e, fmt, rm, sticky = False):
+    # Rounds (-1)**sign * m * 2**e (m > 0) to format fmt. Returns (bits,
+    # flags). Tininess is detected after rounding, as RISC-V requires.
+    (ebits, fbits) = fmt
+    p = fbits + 1
+    bias = (1 << (ebits - 1)) - 1
+    emin = 1 - bias
+    unbounded = e + m.bit_length() - p
+    lsb = max(unbounded, emin - fbits)
+    (r, inexact) = round_at(sign, m, e, lsb - e, rm, sticky)
+    if r == 1 << p:
+        r = r >> 1
+        lsb = lsb + 1
+    flags = nx if inexact else 0
+    if inexact and unbounded + p - 1 < emin:
+        # tiny if rounding to p bits with no lower exponent limit would
+        # still be below the smallest normal number
+        (r2, inexact2) = round_at(sign, m, e, unbounded - e, rm, sticky)
+        if r2.bit_length() + unbounded - 1 < emin:
+            flags = flags | uf
+    if r == 0:
+        return (zero(sign, fmt), flags)
+    if lsb + r.bit_length() - 1 > bias:
+        # overflow: the largest finite number or infinity, depending on the
+        # direction of rounding
+        flags = flags | of | nx
+        if rm == rtz or (rm == rdn and sign == 0) or (rm == rup and sign == 1):
+            return ((sign << (ebits + fbits)) | ((((1 << ebits) - 2) << fbits) | ((1 << fbits) - 1)), flags)
+        return (infinity(sign, fmt), flags)
+    if r >> fbits == 0:
+        # subnormal
+        return ((sign << (ebits + fbits)) | r, flags)
+    return ((sign << (ebits + fbits)) | ((lsb + fbits + bias) << fbits) | (r & ((1 << fbits) - 1)), flags)
+
+def exact_sum(s1, m1, e1, s2, m2, e2):
+    # (sign, significand, exponent) of the exact sum of two finite values;
+    # the significand is 0 when the sum is zero
+    e = min(e1, e2)
+    v = (-1 if s1 else 1) * (m1 << (e1 - e)) + (-1 if s2 else 1) * (m2 << (e2 - e))
+    return (1 if v < 0 else 0, abs(v), e)
+
+def zero_sum_sign(s1, s2, rm):
+    # sign of an exact zero sum: the sign of the operands if they agree,
+    # otherwise +0 except when rounding down
+    return s1 if s1 == s2 else (1 if rm == rdn else 0)
+
+def add(a, b, fmt, rm, subtract = False):
+    (ka, sa, ma, ea) = unpack(a, fmt)
+    (kb, sb, mb, eb) = unpack(b, fmt)
+    if subtract:
+        sb = sb ^ 1
+    if is_nan(ka) or is_nan(kb):
+        return (canonical_nan(fmt), nv if ka == 'snan' or kb == 'snan' else 0)
+    if ka == 'inf' or kb == 'inf':
+        if ka == 'inf' and kb == 'inf' and sa != sb:
+            return (canonical_nan(fmt), nv)
+        return (infinity(sa if ka == 'inf' else sb, fmt), 0)
+    (s, m, e) = exact_sum(sa, ma, ea, sb, mb, eb)
+    if m == 0:
+        return (zero(zero_sum_sign(sa, sb, rm), fmt), 0)
+    return round_pack(s, m, e, fmt, rm)
+
+def mul(a, b, fmt, rm):
+    (ka, sa, ma, ea) = unpack(a, fmt)
+    (kb, sb, mb, eb) = unpack(b, fmt)
+    s = sa ^ sb
+    if is_nan(ka) or is_nan(kb):
+        return (canonical_nan(fmt), nv if ka == 'snan' or kb == 'snan' else 0)
+    if ka == 'inf' or kb == 'inf':
+        if ka == 'zero' or kb == 'zero':
+            return (canonical_nan(fmt), nv)
+        return (infinity(s, fmt), 0)
+    if ka == 'zero' or kb == 'zero':
+        return (zero(s, fmt), 0)
+    return round_pack(s, ma * mb, ea + eb, fmt, rm)
+
+def div(a, b, fmt, rm):
+    (ka, sa, ma, ea) = unpack(a, fmt)
+    (kb, sb, mb, eb) = unpack(b, fmt)
+    s = sa ^ sb
+    if is_nan(ka) or is_nan(kb):
+        return (canonical_nan(fmt), nv if ka == 'snan' or kb == 'snan' else 0)
+    if ka == 'inf':
+        if kb == 'inf':
+            return (canonical_nan(fmt), nv)
+        return (infinity(s, fmt), 0)
+    if kb == 'inf':
+        return (zero(s, fmt), 0)
+    if kb == 'zero':
+        if ka == 'zero':
+            return (canonical_nan(fmt), nv)
+        return (infinity(s, fmt), dz)
+    if ka == 'zero':
+        return (zero(s, fmt), 0)
+    # enough quotient bits for the significand and two more for rounding
+    k = max(0, fmt[1] + 3 + mb.bit_length() - ma.bit_length())
+    (q, r) = divmod(ma << k, mb)
+    return round_pack(s, q, ea - eb - k, fmt, rm, r != 0)
+
+def sqrt(a, fmt, rm):
+    (ka, sa, ma, ea) = unpack(a, fmt)
+    if is_nan(ka):
+        return (canonical_nan(fmt), nv if ka == 'snan' else 0)
+    if ka == 'zero':
+        return (a, 0)
+    if sa == 1:
+        return (canonical_nan(fmt), nv)
+    if ka == 'inf':
+        return (a, 0)
+    if ea & 1:
+        ma = ma << 1
+        ea = ea - 1
+    # enough root bits for the significand and two more for rounding
+    k = max(0, fmt[1] + 3 - ma.bit_length() // 2)
+    n = ma << (2 * k)
+    r = math.isqrt(n)
+    return round_pack(0, r, ea // 2 - k, fmt, rm, r * r != n)
+
+def fma(a, b, c, fmt, rm, negate_product = False, negate_addend = False):
+    # (a * b) + c with a single rounding; fmsub, fnmsub and fnmadd negate
+    # the product and/or the addend
+    (ka, sa, ma, ea) = unpack(a, fmt)
+    (kb, sb, mb, eb) = unpack(b, fmt)
+    (kc, sc, mc, ec) = unpack(c, fmt)
+    sp = sa ^ sb ^ (1 if negate_product else 0)
+    if negate_addend:
+        sc = sc ^ 1
+    product_invalid = (ka == 'inf' and kb == 'zero') or (ka == 'zero' and kb == 'inf')
+    if is_nan(ka) or is_nan(kb) or is_nan(kc):
+        signaling = ka == 'snan' or kb == 'snan' or kc == 'snan'
+        # inf * 0 is invalid even if the addend is a quiet NaN
+        invalid = product_invalid and not is_nan(ka) and not is_nan(kb)
+        return (canonical_nan(fmt), nv if signaling or invalid else 0)
+    if product_invalid:
+        return (canonical_nan(fmt), nv)
+    if ka == 'inf' or kb == 'inf':
+        if kc == 'inf' and sc != sp:
+            return (canonical_nan(fmt), nv)
+        return (infinity(sp, fmt), 0)
+    if kc == 'inf':
+        return (infinity(sc, fmt), 0)
+    (s, m, e) = exact_sum(sp, ma * mb, ea + eb, sc, mc, ec)
+    if m == 0:
+        return (zero(zero_sum_sign(sp, sc, rm), fmt), 0)
+    return round_pack(s, m, e, fmt, rm)
+
+def compare(a, b, fmt):
+    # -1, 0 or 1 for two numbers that aren't NaNs; -0 and +0 are equal
+    (ka, sa, ma, ea) = unpack(a, fmt)
+    (kb, sb, mb, eb) = unpack(b, fmt)
+    def key(kind, sign, m, e):
+        if kind == 'inf':
+            return (-2 if sign else 2, 0, 0)
+        if kind == 'zero':
+            return (0, 0, 0)
+        return (-1 if sign else 1, m, e)
+    (ta, xa, ya) = key(ka, sa, ma, ea)
+    (tb, xb, yb) = key(kb, sb, mb, eb)
+    if ta != tb:
+        return -1 if ta < tb else 1
+    if ta == -1 or ta == 1:
+        (s, m, e) = exact_sum(0, xa, ya, 1, xb, yb)
+        if m == 0:
+            return 0
+        diff = 1 if s == 0 else -1
+        return diff if ta == 1 else -diff
+    return 0
+
+def eq(a, b, fmt):
+    (ka, sa, ma, ea) = unpack(a, fmt)
+    (kb, sb, mb, eb) = unpack(b, fmt)
+    if is_nan(ka) or is_nan(kb):
+        return (0, nv if ka == 'snan' or kb == 'snan' else 0)
+    return (1 if compare(a, b, fmt) == 0 else 0, 0)
+
+def lt(a, b, fmt):
+    (ka, sa, ma, ea) = unpack(a, fmt)
+    (kb, sb, mb, eb) = unpack(b, fmt)
+    if is_nan(ka) or is_nan(kb):
+        return (0, nv)
+    return (1 if compare(a, b, fmt) < 0 else 0, 0)
+
+def le(a, b, fmt):
+    (ka, sa, ma, ea) = unpack(a, fmt)
+    (kb, sb, mb, eb) = unpack(b, fmt)
+    if is_nan(ka) or is_nan(kb):
+        return (0, nv)
+    return (1 if compare(a, b, fmt) <= 0 else 0, 0)
+
+def min_max(a, b, fmt, is_max):
+    # Like fmin_s and friends in RVFpu.bsv: a signaling NaN or two NaNs
+    # give the canonical NaN, one quiet NaN gives the other operand, and
+    # -0 is less than +0
+    (ka, sa, ma, ea) = unpack(a, fmt)
+    (kb, sb, mb, eb) = unpack(b, fmt)
+    if ka == 'snan' or kb == 'snan' or (is_nan(ka) and is_nan(kb)):
+        return (canonical_nan(fmt), nv)
+    if is_nan(kb):
+        return (a, 0)
+    if is_nan(ka):
+        return (b, 0)
+    c = compare(a, b, fmt)
+    if c == 0:
+        # only differs for -0 and +0
+        c = sb - sa
+    return (a if (c > 0) == is_max else b, 0)
+
+def classify(a, fmt):
+    (ebits, fbits) = fmt
+    (kind, sign, m, e) = unpack(a, fmt)
+    if kind == 'inf':
+        return 1 << 0 if sign else 1 << 7
+    if kind == 'zero':
+        return 1 << 3 if sign else 1 << 4
+    if kind == 'snan':
+        return 1 << 8
+    if kind == 'qnan':
+        return 1 << 9
+    subnormal = (a >> fbits) & ((1 << ebits) - 1) == 0
+    if subnormal:
+        return 1 << 2 if sign else 1 << 5
+    return 1 << 1 if sign else 1 << 6
+
+def to_int(a, fmt, rm, width, signed):
+    # Converts to a width bit integer, saturating out of range values.
+    # Returns (Python int, flags); the caller does any sign extension.
+    if signed:
+        (lo, hi) = (-(1 << (width - 1)), (1 << (width - 1)) - 1)
+    else:
+        (lo, hi) = (0, (1 << width) - 1)
+    (kind, sign, m, e) = unpack(a, fmt)
+    if is_nan(kind):
+        return (hi, nv)
+    if kind == 'inf':
+        return (lo if sign else hi, nv)
+    if kind == 'zero':
+        return (0, 0)
+    (r, inexact) = round_at(sign, m, e, -e, rm, False) if e < 0 else (m << e, False)
+    value = -r if sign else r
+    if value < lo or value > hi:
+        return (lo if sign else hi, nv)
+    return (value, nx if inexact else 0)
+
+def from_int(value, fmt, rm):
+    if value == 0:
+        return (zero(0, fmt), 0)
+    return round_pack(1 if value < 0 else 0, abs(value), 0, fmt, rm)
+
+def convert(a, from_fmt, to_fmt, rm):
+    (kind, sign, m, e) = unpack(a, from_fmt)
+    if is_nan(kind):
+        return (canonical_nan(to_fmt), nv if kind == 'snan' else 0)
+    if kind == 'inf':
+        return (infinity(sign, to_fmt), 0)
+    if kind == 'zero':
+        return (zero(sign, to_fmt), 0)
+    return round_pack(sign, m, e, to_fmt, rm)
@@ -22,77 +22,306 @@
 # CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import sys
+import argparse
+import hashlib
+import json
+import mmap
+import multiprocessing
 import os
+import re
+import subprocess
+import sys
 
 def print_usage():
     print("%s bsvfile" % sys.argv[0])
     print("    checks the style for the provided file")
     print("%s bsvdirectory" % sys.argv[0])
     print("    checks the style for all bsv files in the directory")
+    print("%s --changed REV [bsvdirectory ...]" % sys.argv[0])
+    print("    checks the bsv files changed since git revision REV")
+    print("options:")
+    print("    -j N                       number of worker processes")
+    print("    --format text|json|sarif   output format (default: text)")
+    print("    --cache FILE, --no-cache   results cache (default: .stylecheck-cache.json)")
 
 def get_bsv_files(foldername):
     bsvfiles = []
-    contents = list(map(lambda f : foldername + '/' + f, os.listdir(foldername)))
-    for f in contents:
-        if os.path.isdir(f):
-            bsvfiles = bsvfiles + get_bsv_files(f)
-        elif os.path.isfile(f):
-            if f.endswith('.bsv'):
-                bsvfiles = bsvfiles + [f]
-    return bsvfiles
+    folders = [foldername]
+    while len(folders) > 0:
+        with os.scandir(folders.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    folders.append(entry.path)
+                elif entry.is_file() and entry.name.endswith('.bsv'):
+                    bsvfiles.append(entry.path)
+    return sorted(bsvfiles)
+
+def get_changed_bsv_files(revision, paths):
+    # bsv files under paths that differ from revision in git, including
+    # untracked ones
+    changed = subprocess.check_output(['git', 'diff', '--name-only', '--diff-filter=d', '--relative', revision, '--'] + paths)
+    untracked = subprocess.check_output(['git', 'ls-files', '--others', '--exclude-standard', '--'] + paths)
+    files = (changed + untracked).decode().split('\n')
+    return sorted(set(f for f in files if f.endswith('.bsv') and os.path.isfile(f)))
+
+class Rule:
+    # A style rule. pattern is a bytes regular expression (without capturing
+    # groups) matching violations, and first is the set of bytes, written as
+    # the inside of a character class, that its matches can start with.
+    # check, if given, is called with the decoded line and the 1-based
+    # column of a match and returns the column to report, or None if the
+    # match isn't a violation after all. show formats the line for the
+    # message, and is None for rules whose messages don't include the line.
+    # A rule is reported at most once per line, or once per file if
+    # per_file is set.
+    def __init__(self, number, description, first, pattern, check = None, show = lambda line: line, per_file = False):
+        self.regex = re.compile(pattern)
+        assert self.regex.groups == 0, 'rule %d pattern has capturing groups' % number
+        self.number = number
+        self.description = description
+        self.first = first
+        self.pattern = pattern
+        self.check = check
+        self.show = show
+        self.per_file = per_file
+
+rules = []
+scanner = None
+
+def add_rule(rule):
+    # Rules are only compiled into the scanner when it's first needed, so
+    # rules can be added by other scripts that import this one
+    global scanner
+    assert rule.number not in [r.number for r in rules], 'rule %d already exists' % rule.number
+    rules.append(rule)
+    scanner = None
+
+def get_scanner():
+    # All the rules are combined into one pattern so each file is scanned
+    # once however many rules there are. The pattern starts with the bytes
+    # any rule can start with, so re skips over everything else without
+    # trying the rules, and then looks back at that byte to try the rules
+    # from there. The empty group after each rule tells which one matched.
+    global scanner
+    if scanner is None:
+        first = b''.join(r.first for r in rules)
+        alternatives = b'|'.join(b'(?:' + r.pattern + b')()' for r in rules)
+        scanner = re.compile(b'[' + first + b'](?<=(?=' + alternatives + b')[\x00-\xff])')
+    return scanner
+
+def scan(data):
+    # Returns (offset, rule) for every match of every rule in data, in
+    # order of offset. Only the first rule that matches at an offset is
+    # found by the scanner, so the rules after it are tried there too.
+    matches = []
+    for m in get_scanner().finditer(data):
+        offset = m.start()
+        index = m.lastindex - 1
+        matches.append((offset, rules[index]))
+        for rule in rules[index + 1:]:
+            if rule.regex.match(data, offset) is not None:
+                matches.append((offset, rule))
+    return matches
+
+# whitespace as str.isspace() sees it, in utf-8
+whitespace = [rb'[ \t\x0b\x0c\x1c-\x1f]', rb'\xc2[\x85\xa0]', rb'\xe1\x9a\x80',
+        rb'\xe2\x80[\x80-\x8a\xa8\xa9\xaf]', rb'\xe2\x81\x9f', rb'\xe3\x80\x80']
+
+# Rule 0 - lines end with '\n'
+add_rule(Rule(0, 'only unix newlines', rb'\r', rb'\r', show = None, per_file = True))
+# Rule 1 - no tab characters
+add_rule(Rule(1, 'no tab characters', rb'\t', rb'\t', show = lambda line: line.replace('\t','--->')))
+# Rule 2 - no XXX, TODO, or FIXME messages
+add_rule(Rule(2, 'no XXX, TODO, or FIXME', rb'xXtTfF', rb'(?i:XXX|TODO|FIXME)'))
+# Rule 3 - lines don't end wtih whitespace (a line that is just one
+# whitespace character is allowed). Matches the newline at the end of the
+# line.
+add_rule(Rule(3, 'no whitespace at end of line', rb'\n',
+        rb'\n(?:' + b'|'.join(rb'(?<=[^\n]' + w + rb'\n)' for w in whitespace) + rb')',
+        check = lambda line, column: len(line)))
+# Rule 4 - lines aren't longer than 80 characters. Matches the newline at
+# the end of the line; the pattern counts bytes, but the limit is in
+# characters.
+add_rule(Rule(4, 'line too long', rb'\n', rb'\n(?<=[^\n]{81}\n)',
+        check = lambda line, column: 81 if len(line) > 80 else None))
+# Rule 5 - no when(cond, noAction) guards; see TODO
+add_rule(Rule(5, 'no when(cond, noAction)', rb'w', rb'\bwhen\s*\([^;]*,\s*noAction\s*\)'))
+
+def find_violations(data):
+    # Returns the violations in the bytes-like object data as a list of
+    # [rule number, line, column, line text] sorted by line and rule.
+    # Matches are found as byte offsets; lines are only counted and
+    # decoded for the offsets that matched.
+    if data[-1:] != b'\n':
+        # so the last line ends like the others
+        data = data[:] + b'\n'
+    matches = scan(data)
+    if len(matches) == 0:
+        return []
+    newline_errors = [(offset, rule) for (offset, rule) in matches if rule.number == 0]
+    if len(newline_errors) > 0:
+        # Python reads '\r' and '\r\n' as line endings too, so scan again
+        # with the line endings translated. Nothing changes before the first
+        # '\r', so its offset still points at the end of its line.
+        data = data[:].replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        matches = newline_errors[:1] + scan(data)
+        matches.sort(key = lambda m: m[0])
+    violations = []
+    seen = set()
+    linenum = 1
+    counted = 0
+    line_start = None
+    for (offset, rule) in matches:
+        if offset > counted:
+            newlines = data[counted:offset].count(b'\n')
+            if newlines > 0:
+                linenum = linenum + newlines
+                line_start = None
+            counted = offset
+        key = rule.number if rule.per_file else (rule.number, linenum)
+        if key in seen:
+            continue
+        if line_start is None:
+            line_start = data.rfind(b'\n', 0, offset) + 1
+            line = data[line_start:data.find(b'\n', offset)].decode('utf-8', 'replace')
+        column = len(data[line_start:offset].decode('utf-8', 'replace')) + 1
+        if rule.check is not None:
+            column = rule.check(line, column)
+            if column is None:
+                continue
+        seen.add(key)
+        violations.append([rule.number, linenum, column, line if rule.show is not None else None])
+    violations.sort(key = lambda v: (v[1], v[0]))
+    return violations
 
 def check_file(filename):
-    error = False
-    newline_error = False
-    with open(filename, 'r') as f:
-        linenum = 0
-        for line in f:
-            linenum = linenum + 1
-            # Rule 0 - lines end with '\n'
-            if not newline_error:
-                if ('\r\n' in f.newlines) or ('\r' in f.newlines):
-                    print("[%s:%d] [rule 0 - only unix newlines]" % (os.path.basename(filename), linenum))
-                    error = True
-                    newline_error = True
-            # strip newline characters if it exists
-            if len(line) > 1:
-                if line[-1] == '\n':
-                    line = line[:-1]
-            # Rule 1 - no tab characters
-            if '\t' in line:
-                error = True
-                print("[%s:%d] [rule 1 - no tab characters] %s" % (os.path.basename(filename), linenum, line.replace('\t','--->')))
-            # Rule 2 - no XXX, TODO, or FIXME messages
-            upperline = line.upper()
-            if ('XXX' in upperline) or ('TODO' in upperline) or ('FIXME' in upperline):
-                error = True
-                print("[%s:%d] [rule 2 - no XXX, TODO, or FIXME] %s" % (os.path.basename(filename), linenum, line))
-            # Rule 3 - lines don't end wtih whitespace
-            if len(line) > 1:
-                if line[-1].isspace():
-                    print("[%s:%d] [rule 3 - no whitespace at end of line] %s" % (os.path.basename(filename), linenum, line))
-                    error = True
-            # Rule 4 - lines aren't longer than 80 characters
-            if len(line) > 80:
-                print("[%s:%d] [rule 4 - line too long] %s" % (os.path.basename(filename), linenum, line))
-                error = True
-    return error
+    # Returns the list of style violations in filename
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as data:
+            return find_violations(data)
+
+def get_rule(number):
+    return [r for r in rules if r.number == number][0]
+
+def format_text(filename, violation):
+    (number, linenum, column, line) = violation
+    rule = get_rule(number)
+    message = "[%s:%d] [rule %d - %s]" % (os.path.basename(filename), linenum, number, rule.description)
+    if rule.show is not None:
+        message = message + ' ' + rule.show(line)
+    return message
+
+def format_json(results):
+    return json.dumps([{'file': f, 'line': linenum, 'column': column, 'rule': number,
+            'description': get_rule(number).description, 'text': line}
+            for (f, violations) in results for (number, linenum, column, line) in violations], indent = 2)
+
+def format_sarif(results):
+    sarif_rules = [{'id': 'rule%d' % r.number, 'shortDescription': {'text': r.description}} for r in rules]
+    index = dict((r.number, i) for (i, r) in enumerate(rules))
+    sarif_results = []
+    for (f, violations) in results:
+        uri = os.path.relpath(f).replace(os.sep, '/')
+        for (number, linenum, column, line) in violations:
+            sarif_results.append({'ruleId': 'rule%d' % number, 'ruleIndex': index[number], 'level': 'error',
+                    'message': {'text': rules[index[number]].description},
+                    'locations': [{'physicalLocation': {'artifactLocation': {'uri': uri},
+                        'region': {'startLine': linenum, 'startColumn': column}}}]})
+    return json.dumps({'$schema': 'https://json.schemastore.org/sarif-2.1.0.json', 'version': '2.1.0',
+            'runs': [{'tool': {'driver': {'name': 'stylecheck', 'rules': sarif_rules}}, 'results': sarif_results}]}, indent = 2)
+
+def rules_version():
+    # results are only reused while this script is unchanged
+    with open(os.path.abspath(__file__), 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def content_key(filename, version):
+    # the key is the file contents plus the stylecheck.py hash; the file name
+    # is deliberately left out because no rule depends on it, so identical
+    # files share an entry
+    h = hashlib.sha1(version.encode())
+    with open(filename, 'rb') as f:
+        h.update(f.read())
+    return h.hexdigest()
+
+# number of files the cache remembers
+max_cache_entries = 100000
+
+def read_cache(cache_file):
+    try:
+        with open(cache_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_cache(cache_file, cache):
+    tmp_file = '%s.%d' % (cache_file, os.getpid())
+    with open(tmp_file, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp_file, cache_file)
 
 if __name__ == "__main__":
-    if len(sys.argv) <= 1:
+    parser = argparse.ArgumentParser(add_help = False)
+    parser.add_argument('paths', nargs = '*')
+    parser.add_argument('--changed', metavar = 'REV')
+    parser.add_argument('-j', '--jobs', type = int, default = None)
+    parser.add_argument('--cache', default = '.stylecheck-cache.json')
+    parser.add_argument('--no-cache', action = 'store_true')
+    parser.add_argument('--format', choices = ['text', 'json', 'sarif'], default = 'text')
+    parser.add_argument('-h', '--help', action = 'store_true')
+    args = parser.parse_args()
+    if args.help or (len(args.paths) == 0 and args.changed is None):
         print_usage()
         sys.exit(1)
 
-    for arg in sys.argv[1:]:
-        files = []
-        if os.path.isdir(arg):
-            files = get_bsv_files(arg)
-        elif os.path.isfile(arg):
-            files = [arg]
-        else:
-            print("[ERROR] Can't find " + arg)
-            sys.exit(1)
-
-        for f in files:
-            check_file(f)
+    files = []
+    if args.changed is not None:
+        files = get_changed_bsv_files(args.changed, args.paths)
+    else:
+        for arg in args.paths:
+            if os.path.isdir(arg):
+                files = files + get_bsv_files(arg)
+            elif os.path.isfile(arg):
+                files = files + [arg]
+            else:
+                print("[ERROR] Can't find " + arg)
+                sys.exit(1)
+
+    # violations are cached by file contents, so only new or edited files
+    # are checked again
+    version = rules_version()
+    cache = {} if args.no_cache else read_cache(args.cache)
+    keys = [content_key(f, version) for f in files]
+    misses = [f for (f, key) in zip(files, keys) if key not in cache]
+    if args.jobs == 1 or len(misses) < 2:
+        checked = list(map(check_file, misses))
+    else:
+        with multiprocessing.Pool(args.jobs) as pool:
+            checked = pool.map(check_file, misses, chunksize = 16)
+    results = dict(zip(misses, checked))
+
+    error = False
+    output = []
+    for (f, key) in zip(files, keys):
+        violations = results[f] if f in results else cache[key]
+        if args.format == 'text':
+            for v in violations:
+                print(format_text(f, v))
+        if len(violations) > 0:
+            output.append((f, violations))
+            error = True
+        # move entries that were used to the end, so the oldest ones are
+        # the first to go when the cache is trimmed
+        cache.pop(key, None)
+        cache[key] = violations
+    if args.format == 'json':
+        print(format_json(output))
+    elif args.format == 'sarif':
+        print(format_sarif(output))
+    if not args.no_cache and (len(misses) > 0 or len(cache) > max_cache_entries):
+        while len(cache) > max_cache_entries:
+            del cache[next(iter(cache))]
+        write_cache(args.cache, cache)
+    sys.exit(1 if error else 0)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2016 Massachusetts Institute of Technology
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, copy,
+# modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# Finds the first packet where a processor trace and a reference trace
+# disagree, offline. Either trace can be a PrintTrace text trace or a
+# BinaryTrace dump. Both are read in lockstep a chunk at a time through
+# memory maps. Packets are lined up by instruction number, counting the
+# skippedPackets of each packet, so a packet that was skipped in one trace
+# is not compared. Packets are compared with the rules of
+# SpikeTandemVerifier::comparePackets. A chunk is compared packet by packet
+# only if its checksum differs from the other trace's; the first divergence
+# is printed with the packets around it and the differing fields marked.
+# A trace that ends before the other one (a processor that hung or
+# crashed) is a divergence too, unless --allow-prefix is given.
+
+import argparse
+import bisect
+import hashlib
+import mmap
+import os
+import sys
+
+import numpy as np
+
+import tracelib
+
+record_dtype = np.dtype(tracelib.binary_trace_fields)
+
+# The fields comparePackets looks at. The cause is zeroed if the packet
+# didn't trap, and the register write if it did, so equal packets have
+# equal bytes.
+key_dtype = np.dtype([('pc', '<u8'), ('instruction', '<u4'), ('exception', '?'),
+        ('interrupt', '?'), ('cause', 'u1'), ('dst', 'u1'), ('data', '<u8')])
+
+def packet_keys(records):
+    trap = records['exception'] | records['interrupt']
+    keys = np.zeros(len(records), key_dtype)
+    for field in ['pc', 'instruction', 'exception', 'interrupt']:
+        keys[field] = records[field]
+    keys['cause'] = np.where(trap, records['cause'], 0)
+    keys['dst'] = np.where(trap, 0, records['dst'])
+    keys['data'] = np.where(trap, 0, records['data'])
+    return keys
+
+def checksum(keys):
+    return hashlib.blake2b(keys.tobytes(), digest_size = 16).digest()
+
+# The fields of a packet that comparePackets compares, for the report
+compared_fields = ['pc', 'instruction', 'exception', 'interrupt', 'cause', 'dst', 'data']
+
+def differing_fields(dut, ref):
+    keys = packet_keys(np.array([(dut.skipped_packets, dut.pc, dut.data, dut.addr, dut.instruction, dut.dst, dut.exception, dut.interrupt, dut.cause),
+            (ref.skipped_packets, ref.pc, ref.data, ref.addr, ref.instruction, ref.dst, ref.exception, ref.interrupt, ref.cause)], record_dtype))
+    return [field for field in compared_fields if keys[0][field] != keys[1][field]]
+
+class BinaryTraceReader:
+    def __init__(self, filename):
+        self.records = tracelib.open_binary_trace(filename)
+
+    def chunks(self, chunk_size):
+        # Yields the records of the trace chunk_size packets at a time
+        for start in range(0, len(self.records), chunk_size):
+            yield self.records[start:start + chunk_size]
+
+    def window(self, start, end):
+        # Returns (VerificationPacket, disassembly) for packets [start, end)
+        return list(tracelib.binary_trace_packets(self.records[max(start, 0):end]))
+
+class TextTraceReader:
+    def __init__(self, filename):
+        self.filename = filename
+        # (first packet, file offset) of each chunk read so far
+        self.chunk_starts = []
+
+    def chunks(self, chunk_size):
+        # Yields the packets of the trace as binary trace records, parsing
+        # about chunk_size packets' worth of text at a time
+        chunk_bytes = 64 * chunk_size
+        if os.path.getsize(self.filename) == 0:
+            return
+        with open(self.filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as m:
+            offset = 0
+            index = 0
+            while offset < len(m):
+                end = m.find(b'\n', offset + chunk_bytes)
+                end = len(m) if end < 0 else end + 1
+                packets = [packet for (packet, disasm) in tracelib.parse_trace(m[offset:end].split(b'\n'))]
+                self.chunk_starts.append((index, offset))
+                yield np.array([(p.skipped_packets, p.pc, p.data, p.addr, p.instruction, p.dst, p.exception, p.interrupt, p.cause)
+                        for p in packets], record_dtype)
+                index = index + len(packets)
+                offset = end
+
+    def window(self, start, end):
+        start = max(start, 0)
+        if start >= end or len(self.chunk_starts) == 0:
+            return []
+        # re-read from the start of the chunk holding packet start
+        (index, offset) = self.chunk_starts[bisect.bisect_right(self.chunk_starts, (start, float('inf'))) - 1]
+        packets = []
+        for packet in tracelib.parse_trace(tracelib.read_lines(self.filename, offset)):
+            if index >= end:
+                break
+            if index >= start:
+                packets.append(packet)
+            index = index + 1
+        return packets
+
+def open_trace(filename):
+    if tracelib.is_binary_trace(filename):
+        return BinaryTraceReader(filename)
+    return TextTraceReader(filename)
+
+class TraceStream:
+    # The packets of one trace that have been read but not compared yet,
+    # with the instruction number of each packet
+    def __init__(self, reader, chunk_size):
+        self.chunks = reader.chunks(chunk_size)
+        self.positions = np.zeros(0, np.int64)
+        self.keys = np.zeros(0, key_dtype)
+        # packet number in the trace of the first buffered packet
+        self.first = 0
+        # instruction number after the last buffered packet
+        self.end = 0
+        self.done = False
+
+    def fill(self):
+        # Reads chunks until some packets are buffered or the trace ends
+        while len(self.positions) == 0 and not self.done:
+            records = next(self.chunks, None)
+            if records is None:
+                self.done = True
+                return
+            if len(records) == 0:
+                continue
+            positions = np.cumsum(records['skipped_packets'].astype(np.int64) + 1) + (self.end - 1)
+            self.positions = positions
+            self.keys = packet_keys(records)
+            self.end = int(positions[-1]) + 1
+
+    def take(self, end):
+        # Removes and returns (first packet number, instruction numbers,
+        # keys) for the buffered packets before instruction number end
+        count = int(np.searchsorted(self.positions, end))
+        taken = (self.first, self.positions[:count], self.keys[:count])
+        self.positions = self.positions[count:]
+        self.keys = self.keys[count:]
+        self.first = self.first + count
+        return taken
+
+def first_divergence(dut, ref):
+    # Returns (instruction number, dut packet number, ref packet number,
+    # ended) of the first mismatch, or None, and the number of packets
+    # compared. If one trace ends before the other, ended is 'DUT' or 'REF'
+    # and the divergence is the next packet of the longer trace.
+    compared = 0
+    while True:
+        dut.fill()
+        ref.fill()
+        if len(dut.positions) == 0 and len(ref.positions) == 0:
+            return (None, compared)
+        if len(dut.positions) == 0 or len(ref.positions) == 0:
+            longer = dut if len(dut.positions) > 0 else ref
+            return ((int(longer.positions[0]), dut.first, ref.first, 'DUT' if longer is ref else 'REF'), compared)
+        end = min(dut.end, ref.end)
+        (dut_first, dut_positions, dut_keys) = dut.take(end)
+        (ref_first, ref_positions, ref_keys) = ref.take(end)
+        if np.array_equal(dut_positions, ref_positions):
+            # the usual case: the same packets are in both traces
+            compared = compared + len(dut_positions)
+            if checksum(dut_keys) == checksum(ref_keys):
+                continue
+            dut_index = np.arange(len(dut_keys))
+            ref_index = dut_index
+        else:
+            (common, dut_index, ref_index) = np.intersect1d(dut_positions, ref_positions, assume_unique = True, return_indices = True)
+            compared = compared + len(common)
+        mismatches = np.flatnonzero(dut_keys[dut_index] != ref_keys[ref_index])
+        if len(mismatches) > 0:
+            i = mismatches[0]
+            compared = compared - len(dut_index) + i
+            return ((int(dut_positions[dut_index[i]]), dut_first + int(dut_index[i]), ref_first + int(ref_index[i]), None), compared)
+
+def marks(a, b):
+    # A line with ^ under the characters where a and b differ
+    width = max(len(a), len(b))
+    return ''.join('^' if x != y else ' ' for (x, y) in zip(a.ljust(width), b.ljust(width))).rstrip()
+
+def report(divergence, dut_reader, ref_reader, decoder, before, after):
+    (position, dut_index, ref_index, ended) = divergence
+    def line(packet, disasm):
+        if disasm == '' and decoder is not None:
+            disasm = tracelib.disassemble(decoder, packet.instruction)
+        return tracelib.format_trace_line(packet, disasm)
+    if ended is not None:
+        if ended == 'DUT':
+            (index, reader, other, other_index, other_reader) = (dut_index, dut_reader, 'REF', ref_index, ref_reader)
+        else:
+            (index, reader, other, other_index, other_reader) = (ref_index, ref_reader, 'DUT', dut_index, dut_reader)
+        print('[ERROR] %s trace ends after %d packets, before instruction %d (%s packet %d)' % (ended, index, position + 1, other, other_index + 1))
+        for (packet, disasm) in reader.window(index - before, index):
+            print('          %s' % line(packet, disasm))
+        for (packet, disasm) in other_reader.window(other_index, other_index + after + 1):
+            print('  [%s]   %s' % (other, line(packet, disasm)))
+        return
+    dut_before = dut_reader.window(dut_index - before, dut_index)
+    dut_window = dut_reader.window(dut_index, dut_index + after + 1)
+    ref_window = ref_reader.window(ref_index, ref_index + after + 1)
+    (dut_packet, dut_disasm) = dut_window[0]
+    (ref_packet, ref_disasm) = ref_window[0]
+    print('[ERROR] First divergence at instruction %d (DUT packet %d, reference packet %d)' % (position + 1, dut_index + 1, ref_index + 1))
+    for (packet, disasm) in dut_before:
+        print('          %s' % line(packet, disasm))
+    if dut_packet.instruction == ref_packet.instruction:
+        # binary traces have no disassembly; don't mark that as a difference
+        dut_disasm = dut_disasm or ref_disasm
+        ref_disasm = ref_disasm or dut_disasm
+    dut_line = line(dut_packet, dut_disasm)
+    ref_line = line(ref_packet, ref_disasm)
+    print('  [DUT]   %s' % dut_line)
+    print('  [REF]   %s' % ref_line)
+    print('          %s' % marks(dut_line, ref_line))
+    print('  differing fields: %s' % ', '.join(differing_fields(dut_packet, ref_packet)))
+    if after > 0:
+        for (name, window) in [('DUT', dut_window[1:]), ('REF', ref_window[1:])]:
+            for (packet, disasm) in window:
+                print('  [%s]   %s' % (name, line(packet, disasm)))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Find the first packet where a processor trace and a reference trace differ.')
+    parser.add_argument('dut', help = 'processor trace (PrintTrace text or binary)')
+    parser.add_argument('ref', help = 'reference trace (PrintTrace text or binary)')
+    parser.add_argument('-B', '--before', type = int, default = 20,
+            help = 'matching packets to print before the divergence (default: 20)')
+    parser.add_argument('-A', '--after', type = int, default = 5,
+            help = 'packets of each trace to print after the divergence (default: 5)')
+    parser.add_argument('--isa', default = 'rv64:imafds',
+            help = 'base:extensions used to disassemble binary traces (default: rv64:imafds)')
+    parser.add_argument('--meta', default = tracelib.default_meta_dir,
+            help = 'path to riscv-meta/meta')
+    parser.add_argument('--no-decode', action = 'store_true',
+            help = "don't load riscv-meta to disassemble binary traces")
+    parser.add_argument('--chunk-size', type = int, default = 1 << 20,
+            help = 'packets compared at a time (default: 1M)')
+    parser.add_argument('--allow-prefix', action = 'store_true',
+            help = 'accept a trace that stops early if it matches the other one up to there')
+    args = parser.parse_args()
+
+    dut_reader = open_trace(args.dut)
+    ref_reader = open_trace(args.ref)
+    (divergence, compared) = first_divergence(TraceStream(dut_reader, args.chunk_size), TraceStream(ref_reader, args.chunk_size))
+    if divergence is None:
+        print('%d packets match' % compared)
+        sys.exit(0)
+    if divergence[3] is not None and args.allow_prefix:
+        print('%d packets match (the %s trace stops early)' % (compared, 'DUT' if divergence[3] == 'DUT' else 'reference'))
+        sys.exit(0)
+    decoder = None
+    if not args.no_decode and (isinstance(dut_reader, BinaryTraceReader) or isinstance(ref_reader, BinaryTraceReader)):
+        decoder = tracelib.load_rvmeta(args.meta, args.isa).get_decoder()
+    report(divergence, dut_reader, ref_reader, decoder, args.before, args.after)
+    sys.exit(1)
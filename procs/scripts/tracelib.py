@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2016 Massachusetts Institute of Technology
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, copy,
+# modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Helpers shared by the trace analysis scripts: reading the text traces
+# written by PrintTrace and SpikeTandemVerifier, splitting trace files into
+# segments for parallel workers, and loading the riscv-meta tables through
+# codegen/scripts/meta-parse.py.
+
+import collections
+import contextlib
+import importlib.util
+import io
+import os
+import re
+import struct
+
+scripts_dir = os.path.dirname(os.path.abspath(__file__))
+riscy_dir = os.path.dirname(os.path.dirname(scripts_dir))
+meta_parse_path = os.path.join(riscy_dir, 'codegen', 'scripts', 'meta-parse.py')
+default_meta_dir = os.path.join(riscy_dir, 'codegen', 'riscv-meta', 'meta')
+
+# The fields of VerificationPacket in procs/riscy-lib/VerificationPacket.bsv
+VerificationPacket = collections.namedtuple('VerificationPacket',
+        ['skipped_packets', 'pc', 'instruction', 'data', 'addr', 'dst',
+         'exception', 'interrupt', 'cause'])
+
+# The cause strings printed by verificationPacketToString, indexed by cause
+exception_causes = ['Instruction address misaligned', 'Instruction access fault',
+        'Illegal instruction', 'Breakpoint', 'Load address misaligned',
+        'Load access fault', 'Store/AMO address misaligned',
+        'Store/AMO access fault', 'Environment call from U-mode',
+        'Environment call from S-mode', 'Environment call from H-mode',
+        'Environment call from M-mode']
+interrupt_causes = ['User software interrupt', 'Supervisor software interrupt',
+        'Hypervisor software interrupt', 'Machine software interrupt',
+        'User timer interrupt', 'Supervisor timer interrupt',
+        'Hypervisor timer interrupt', 'Machine timer interrupt',
+        'User external interrupt', 'Supervisor external interrupt',
+        'Hypervisor external interrupt', 'Machine external interrupt']
+# causes that print as [Unknown Exception] / [Unknown Interrupt] come back
+# as unknown_cause since the text doesn't say which one it was
+unknown_cause = 0xf
+
+# Register names used by spike's disassembler (xpr_name and fpr_name)
+xpr_names = ['zero', 'ra', 'sp', 'gp', 'tp', 't0', 't1', 't2',
+        's0', 's1', 'a0', 'a1', 'a2', 'a3', 'a4', 'a5',
+        'a6', 'a7', 's2', 's3', 's4', 's5', 's6', 's7',
+        's8', 's9', 's10', 's11', 't3', 't4', 't5', 't6']
+fpr_names = ['ft0', 'ft1', 'ft2', 'ft3', 'ft4', 'ft5', 'ft6', 'ft7',
+        'fs0', 'fs1', 'fa0', 'fa1', 'fa2', 'fa3', 'fa4', 'fa5',
+        'fa6', 'fa7', 'fs2', 'fs3', 'fs4', 'fs5', 'fs6', 'fs7',
+        'fs8', 'fs9', 'fs10', 'fs11', 'ft8', 'ft9', 'ft10', 'ft11']
+
+# dst field of VerificationPacket for each register name
+dst_codes = {}
+for (index, name) in enumerate(xpr_names):
+    dst_codes[name] = 0x40 | index
+for (index, name) in enumerate(fpr_names):
+    dst_codes[name] = 0x60 | index
+
+# Major opcodes (inst[6:2]) from the RISC-V ISA manual, used as a coarse
+# instruction class
+major_opcodes = {0x00: 'LOAD', 0x01: 'LOAD-FP', 0x03: 'MISC-MEM',
+        0x04: 'OP-IMM', 0x05: 'AUIPC', 0x06: 'OP-IMM-32', 0x08: 'STORE',
+        0x09: 'STORE-FP', 0x0b: 'AMO', 0x0c: 'OP', 0x0d: 'LUI', 0x0e: 'OP-32',
+        0x10: 'MADD', 0x11: 'MSUB', 0x12: 'NMSUB', 0x13: 'NMADD',
+        0x14: 'OP-FP', 0x18: 'BRANCH', 0x19: 'JALR', 0x1b: 'JAL',
+        0x1c: 'SYSTEM'}
+
+def major_opcode(instruction):
+    if instruction & 0x3 != 0x3:
+        return 'COMPRESSED'
+    return major_opcodes.get((instruction >> 2) & 0x1f, 'UNKNOWN')
+
+def inst_length(instruction):
+    # length in bytes of an instruction from its low bits
+    return 4 if instruction & 0x3 == 0x3 else 2
+
+# One line of verificationPacketToString:
+#   0xPC: (0xINST) disassembly [Exception: ...] (addr = 0xADDR)
+# where the bracketed part is an exception, an interrupt, or a register
+# write, and the addr part is only there for memory instructions. Only the
+# fixed prefix is matched with a regular expression; the optional parts are
+# found with plain searches, which is much faster.
+trace_line_re = re.compile(rb'0x([0-9a-f]+): \(0x([0-9a-f]+)\) ')
+
+exception_cause_codes = dict((name.encode(), cause) for (cause, name) in enumerate(exception_causes))
+interrupt_cause_codes = dict((name.encode(), cause) for (cause, name) in enumerate(interrupt_causes))
+
+def parse_trace_line(line):
+    # Returns (VerificationPacket, disassembly) for a trace line (bytes), or
+    # None if the line isn't a trace line. The text doesn't include
+    # skippedPackets, so it is always 0.
+    m = trace_line_re.match(line)
+    if m is None:
+        return None
+    rest = line[m.end():].rstrip()
+    addr = 0
+    addr_start = rest.find(b' (addr = 0x')
+    if addr_start >= 0:
+        addr = int(rest[addr_start + 11:-1], 16)
+        rest = rest[:addr_start]
+    exception = False
+    interrupt = False
+    cause = 0
+    dst = 0
+    data = 0
+    bracket_start = rest.find(b' [')
+    if bracket_start >= 0:
+        bracket = rest[bracket_start + 2:-1]
+        rest = rest[:bracket_start]
+        if bracket.startswith(b'Exception: '):
+            exception = True
+            cause = exception_cause_codes.get(bracket[11:], unknown_cause)
+        elif bracket.startswith(b'Interrupt: '):
+            interrupt = True
+            cause = interrupt_cause_codes.get(bracket[11:], unknown_cause)
+        elif bracket == b'Unknown Exception':
+            exception = True
+            cause = unknown_cause
+        elif bracket == b'Unknown Interrupt':
+            interrupt = True
+            cause = unknown_cause
+        else:
+            (reg, value) = bracket.split(b' = 0x', 1)
+            dst = dst_codes[reg.decode()]
+            data = int(value, 16)
+    packet = VerificationPacket(0, int(m.group(1), 16), int(m.group(2), 16),
+            data, addr, dst, exception, interrupt, cause)
+    return (packet, rest.rstrip().decode())
+
+def read_lines(filename, start = 0, end = None, chunk_size = 1 << 24):
+    # Yields the lines of filename (bytes, without the newline) that start
+    # at a file offset in [start, end), reading chunk_size bytes at a time.
+    # Splitting a file at arbitrary offsets and reading each piece with
+    # read_lines sees every line exactly once.
+    with open(filename, 'rb') as f:
+        if end is None:
+            end = os.fstat(f.fileno()).st_size
+        if start > 0:
+            # skip the rest of a line that started before start
+            f.seek(start - 1)
+            start = start - 1 + len(f.readline())
+        pos = start
+        rest = b''
+        while pos < end:
+            chunk = f.read(chunk_size)
+            if len(chunk) == 0:
+                if len(rest) > 0:
+                    yield rest
+                return
+            lines = (rest + chunk).split(b'\n')
+            rest = lines.pop()
+            for line in lines:
+                if pos >= end:
+                    return
+                yield line
+                pos = pos + len(line) + 1
+
+def parse_trace(lines):
+    # Yields (VerificationPacket, disassembly) for each trace line in lines,
+    # skipping everything else the host prints
+    for line in lines:
+        parsed = parse_trace_line(line)
+        if parsed is not None:
+            yield parsed
+
+# major opcodes (inst[6:0]) that verificationPacketToString prints the
+# address for: loads, stores, AMOs, FP loads and FP stores
+addr_opcodes = (0x03, 0x23, 0x2f, 0x07, 0x27)
+
+def format_trace_line(packet, disasm):
+    # The inverse of parse_trace_line: formats a packet the way
+    # verificationPacketToString does
+    line = '0x%08x: (0x%08x) %-32s' % (packet.pc, packet.instruction, disasm)
+    if packet.exception:
+        if packet.cause < len(exception_causes):
+            line += ' [Exception: %s]' % exception_causes[packet.cause]
+        else:
+            line += ' [Unknown Exception]'
+    elif packet.interrupt:
+        if packet.cause < len(interrupt_causes):
+            line += ' [Interrupt: %s]' % interrupt_causes[packet.cause]
+        else:
+            line += ' [Unknown Interrupt]'
+    elif packet.dst & 0x40:
+        names = fpr_names if packet.dst & 0x20 else xpr_names
+        line += ' [%s = 0x%x]' % (names[packet.dst & 0x1f], packet.data)
+    if packet.instruction & 0x7f in addr_opcodes:
+        line += ' (addr = 0x%x)' % packet.addr
+    return line
+
+def packets_match(dut, ref):
+    # SpikeTandemVerifier::comparePackets: the register write only matters
+    # if the instruction didn't trap, and the cause only if it did
+    if (dut.pc != ref.pc or dut.instruction != ref.instruction
+            or dut.exception != ref.exception or dut.interrupt != ref.interrupt):
+        return False
+    if dut.exception or dut.interrupt:
+        return dut.cause == ref.cause
+    return dut.dst == ref.dst and dut.data == ref.data
+
+def disassemble(decoder, instruction):
+    # The instruction name from a RiscvMeta decoder, for traces that don't
+    # include the disassembly
+    index = decoder.decode(instruction)
+    return decoder.names[index].lower().replace('_', '.') if index is not None else 'unknown'
+
+def split_segments(filename, count):
+    # Returns count (start, end) ranges covering filename: packet indices
+    # for a binary trace, byte offsets for a text trace
+    if is_binary_trace(filename):
+        size = len(open_binary_trace(filename))
+    else:
+        size = os.path.getsize(filename)
+    return [(size * i // count, size * (i + 1) // count) for i in range(count)]
+
+# Binary traces written by BinaryTrace (procs/connectal/cpp/BinaryTrace.hpp):
+# a 16 byte header (magic, version, record size) followed by one fixed-width
+# little endian record per VerificationPacket.
+binary_trace_magic = b'RISCYTRC'
+binary_trace_version = 1
+binary_trace_header = struct.Struct('<8sII')
+binary_trace_fields = [('skipped_packets', '<u8'), ('pc', '<u8'), ('data', '<u8'),
+        ('addr', '<u8'), ('instruction', '<u4'), ('dst', 'u1'),
+        ('exception', '?'), ('interrupt', '?'), ('cause', 'u1')]
+binary_trace_record = struct.Struct('<QQQQIBBBB')
+
+def is_binary_trace(filename):
+    with open(filename, 'rb') as f:
+        return f.read(len(binary_trace_magic)) == binary_trace_magic
+
+def open_binary_trace(filename):
+    # Returns the packets in a binary trace as a read-only NumPy structured
+    # array with the fields of VerificationPacket. The array is memory
+    # mapped, so slicing it or indexing it by packet number doesn't read the
+    # rest of the file. A partial record at the end (from a simulation that
+    # is still running) is ignored.
+    import numpy as np
+    dtype = np.dtype(binary_trace_fields)
+    with open(filename, 'rb') as f:
+        (magic, version, record_size) = binary_trace_header.unpack(f.read(binary_trace_header.size))
+    assert magic == binary_trace_magic, '%s is not a binary trace' % filename
+    assert version == binary_trace_version, '%s has binary trace version %d, expected %d' % (filename, version, binary_trace_version)
+    assert record_size == dtype.itemsize, '%s has %d byte records, expected %d' % (filename, record_size, dtype.itemsize)
+    count = (os.path.getsize(filename) - binary_trace_header.size) // record_size
+    if count == 0:
+        # np.memmap can't map an empty range
+        return np.zeros(0, dtype)
+    return np.memmap(filename, dtype, mode = 'r', offset = binary_trace_header.size, shape = (count,))
+
+def binary_trace_packets(records, chunk_size = 1 << 16):
+    # Yields (VerificationPacket, '') for each record of a binary trace array
+    # (or a slice of one), like parse_trace does for text traces
+    for start in range(0, len(records), chunk_size):
+        for (skipped_packets, pc, data, addr, instruction, dst, exception, interrupt, cause) in records[start:start + chunk_size].tolist():
+            yield (VerificationPacket(skipped_packets, pc, instruction, data, addr, dst, exception, interrupt, cause), '')
+
+def write_binary_trace(filename, packets):
+    # Writes (VerificationPacket, disassembly) pairs, e.g. from parse_trace,
+    # as a binary trace. Returns the number of packets written.
+    count = 0
+    with open(filename, 'wb') as f:
+        f.write(binary_trace_header.pack(binary_trace_magic, binary_trace_version, binary_trace_record.size))
+        for (packet, disasm) in packets:
+            f.write(binary_trace_record.pack(packet.skipped_packets, packet.pc, packet.data, packet.addr,
+                    packet.instruction, packet.dst, packet.exception, packet.interrupt, packet.cause))
+            count = count + 1
+    return count
+
+def load_meta_parse():
+    # meta-parse.py isn't a valid module name, so load it by path
+    spec = importlib.util.spec_from_file_location('meta_parse', meta_parse_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def load_rvmeta(meta_dir, isa, cache_dir = None):
+    # Returns a RiscvMeta for isa, given as base:extensions (e.g. rv64:imafds).
+    # RiscvMeta reports the extensions it selected on stdout, which would
+    # end up in the reports of the scripts (once per worker process).
+    meta_parse = load_meta_parse()
+    (base, extension_letters) = isa.split(':', 1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return meta_parse.RiscvMeta(os.path.join(meta_dir, ''), base, extension_letters, cache_dir)
+
+def decoder_extensions(rvmeta):
+    # The extension letter of each instruction ID of rvmeta.get_decoder()
+    extensions = set(rvmeta.extensions)
+    return [[ext for ext in inst[3] if ext in extensions][0][len(rvmeta.base):]
+            for (inst, selected) in zip(rvmeta.insts, rvmeta.selected) if selected]
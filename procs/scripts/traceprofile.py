@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2016 Massachusetts Institute of Technology
+
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use, copy,
+# modify, merge, publish, distribute, sublicense, and/or sell copies
+# of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS
+# BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN
+# ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+# CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Profiles a trace written by PrintTrace (--just-trace) or BinaryTrace
+# (--binary-trace) in one pass:
+# hot PCs and basic blocks, instruction mix, and exception and interrupt
+# rates. Large traces are split into segments that are profiled in parallel
+# and merged in order.
+
+import argparse
+import collections
+import multiprocessing
+import sys
+
+import tracelib
+
+class SegmentProfile:
+    # Counts for a contiguous piece of a trace. Basic blocks start at every
+    # PC that doesn't follow on from the previous packet, so the block that
+    # is open at the start of a segment (head) and the one still open at its
+    # end (tail) can only be finished once the neighbouring segments are
+    # known; see TraceProfile.add.
+    def __init__(self):
+        self.pcs = collections.Counter()
+        self.insts = {}
+        self.disasm = {}
+        self.traps = collections.Counter()
+        # start pc -> [executions, instructions]
+        self.blocks = {}
+        self.first_pc = None
+        self.head_count = 0
+        self.tail = None
+        self.next_pc = None
+
+    def add_block(self, start_pc, count):
+        if start_pc in self.blocks:
+            block = self.blocks[start_pc]
+            block[0] = block[0] + 1
+            block[1] = block[1] + count
+        else:
+            self.blocks[start_pc] = [1, count]
+
+    def profile(self, packets):
+        pcs = self.pcs
+        insts = self.insts
+        block_start = None
+        block_count = 0
+        head = True
+        next_pc = None
+        for (packet, disasm) in packets:
+            pc = packet.pc
+            if pc != next_pc:
+                if next_pc is None:
+                    self.first_pc = pc
+                elif head:
+                    self.head_count = block_count
+                    head = False
+                else:
+                    self.add_block(block_start, block_count)
+                block_start = pc
+                block_count = 0
+            block_count = block_count + 1
+            pcs[pc] += 1
+            if pc not in insts:
+                insts[pc] = packet.instruction
+                self.disasm[pc] = disasm
+            if packet.exception:
+                self.traps[('Exception', packet.cause)] += 1
+            elif packet.interrupt:
+                self.traps[('Interrupt', packet.cause)] += 1
+            next_pc = pc + tracelib.inst_length(packet.instruction)
+        if head:
+            self.head_count = block_count
+        else:
+            self.tail = (block_start, block_count)
+        self.next_pc = next_pc
+        return self
+
+def profile_segment(segment):
+    (filename, start, end, chunk_size) = segment
+    if tracelib.is_binary_trace(filename):
+        packets = tracelib.binary_trace_packets(tracelib.open_binary_trace(filename)[start:end])
+    else:
+        packets = tracelib.parse_trace(tracelib.read_lines(filename, start, end, chunk_size))
+    return SegmentProfile().profile(packets)
+
+class TraceProfile(SegmentProfile):
+    # The profile of a whole trace, built by adding SegmentProfiles in trace
+    # order
+    def __init__(self):
+        SegmentProfile.__init__(self)
+        # the block that is still open, as [start pc, instructions]
+        self.open_block = None
+
+    def add(self, segment):
+        if segment.first_pc is None:
+            # no packets
+            return
+        self.pcs.update(segment.pcs)
+        for (pc, inst) in segment.insts.items():
+            if pc not in self.insts:
+                self.insts[pc] = inst
+                self.disasm[pc] = segment.disasm[pc]
+        self.traps.update(segment.traps)
+        for (start_pc, (executions, count)) in segment.blocks.items():
+            if start_pc in self.blocks:
+                block = self.blocks[start_pc]
+                block[0] = block[0] + executions
+                block[1] = block[1] + count
+            else:
+                self.blocks[start_pc] = [executions, count]
+        # stitch the head of segment onto the block left open by the
+        # previous segment if it carries straight on from it
+        if self.open_block is not None and self.next_pc == segment.first_pc:
+            self.open_block[1] = self.open_block[1] + segment.head_count
+        else:
+            self.finish()
+            self.open_block = [segment.first_pc, segment.head_count]
+        if segment.tail is not None:
+            self.finish()
+            self.open_block = list(segment.tail)
+        self.next_pc = segment.next_pc
+
+    def finish(self):
+        # close the open block at the end of the trace
+        if self.open_block is not None:
+            self.add_block(*self.open_block)
+            self.open_block = None
+
+    def report(self, decoder, extensions, top):
+        total = sum(self.pcs.values())
+        print('%d instructions, %d distinct PCs, %d basic block executions, %d distinct basic blocks' % (total, len(self.pcs), sum(b[0] for b in self.blocks.values()), len(self.blocks)))
+        if total == 0:
+            return
+
+        print('')
+        print('Exceptions and interrupts (per 1000 instructions):')
+        for ((kind, cause), count) in sorted(self.traps.items()):
+            names = tracelib.exception_causes if kind == 'Exception' else tracelib.interrupt_causes
+            name = names[cause] if cause < len(names) else 'Unknown'
+            print('    %-9s %2d %-34s %12d %10.3f' % (kind, cause, name, count, 1000.0 * count / total))
+
+        print('')
+        print('Hottest PCs:')
+        cumulative = 0
+        for (pc, count) in self.pcs.most_common(top):
+            cumulative = cumulative + count
+            disasm = self.disasm[pc]
+            if disasm == '' and decoder is not None:
+                # binary traces don't have the disassembly
+                disasm = tracelib.disassemble(decoder, self.insts[pc])
+            print('    0x%08x %12d %6.2f%% %6.2f%%  %s' % (pc, count, 100.0 * count / total, 100.0 * cumulative / total, disasm))
+
+        print('')
+        print('Hottest basic blocks (by instructions executed):')
+        hot_blocks = sorted(self.blocks.items(), key = lambda b: -b[1][1])[:top]
+        for (start_pc, (executions, count)) in hot_blocks:
+            print('    0x%08x %12d executions %12d instructions %6.2f%% %6.1f avg length' % (start_pc, executions, count, 100.0 * count / total, count / executions))
+
+        # instruction mix, weighting each static instruction by how often
+        # its pc was executed
+        by_opcode = collections.Counter()
+        by_extension = collections.Counter()
+        by_name = collections.Counter()
+        for (pc, count) in self.pcs.items():
+            inst = self.insts[pc]
+            by_opcode[tracelib.major_opcode(inst)] += count
+            if decoder is not None:
+                index = decoder.decode(inst)
+                by_extension[extensions[index] if index is not None else 'unknown'] += count
+                by_name[tracelib.disassemble(decoder, inst)] += count
+        mixes = [('major opcode', by_opcode)]
+        if decoder is not None:
+            mixes = mixes + [('extension', by_extension), ('instruction', by_name)]
+        for (title, counts) in mixes:
+            print('')
+            print('Instruction mix by %s:' % title)
+            for (name, count) in counts.most_common(top):
+                print('    %-16s %12d %6.2f%%' % (name, count, 100.0 * count / total))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Profile a PrintTrace text trace or a binary trace.')
+    parser.add_argument('trace', help = "trace file, or '-' for stdin")
+    parser.add_argument('--isa', default = 'rv64:imafds',
+            help = 'base:extensions used to decode instructions (default: rv64:imafds)')
+    parser.add_argument('--meta', default = tracelib.default_meta_dir,
+            help = 'path to riscv-meta/meta')
+    parser.add_argument('--no-decode', action = 'store_true',
+            help = "don't load riscv-meta; only report the mix by major opcode")
+    parser.add_argument('-n', '--top', type = int, default = 20,
+            help = 'number of entries in each table')
+    parser.add_argument('-j', '--jobs', type = int, default = None,
+            help = 'number of worker processes')
+    parser.add_argument('--chunk-size', type = int, default = 1 << 24,
+            help = 'bytes read at a time')
+    args = parser.parse_args()
+
+    decoder = None
+    extensions = None
+    if not args.no_decode:
+        rvmeta = tracelib.load_rvmeta(args.meta, args.isa)
+        decoder = rvmeta.get_decoder()
+        extensions = tracelib.decoder_extensions(rvmeta)
+
+    profile = TraceProfile()
+    if args.trace == '-':
+        profile.add(SegmentProfile().profile(tracelib.parse_trace(line.rstrip(b'\n') for line in sys.stdin.buffer)))
+    else:
+        jobs = args.jobs if args.jobs is not None else multiprocessing.cpu_count()
+        # several segments per worker keeps the workers busy until the end
+        segments = [(args.trace, start, end, args.chunk_size) for (start, end) in tracelib.split_segments(args.trace, 4 * jobs)]
+        if jobs == 1:
+            for segment in segments:
+                profile.add(profile_segment(segment))
+        else:
+            with multiprocessing.Pool(jobs) as pool:
+                # imap hands back the segments in order as they finish
+                for segment in pool.imap(profile_segment, segments):
+                    profile.add(segment)
+    profile.finish()
+    profile.report(decoder, extensions, args.top)